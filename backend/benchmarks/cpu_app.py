@@ -0,0 +1,23 @@
+"""
+The backend app plus one benchmark-only route, for worker_scaling.py:
+
+    gunicorn -c gunicorn.conf.py benchmarks.cpu_app:app
+
+POST /_bench/verify-image runs the real OpenCV garbage verifier
+(services.image_verification) on the event loop. The public /reporting
+routes use the mock verifier, which returns immediately, so they would
+measure framework overhead rather than CPU-bound work.
+"""
+from pydantic import BaseModel
+
+from main import app
+from services.image_verification import verify_garbage_image
+
+
+class BenchImageRequest(BaseModel):
+    image_base64: str
+
+
+@app.post("/_bench/verify-image")
+async def bench_verify_image(request: BenchImageRequest):
+    return await verify_garbage_image(request.image_base64)
@@ -0,0 +1,95 @@
+"""
+Serialization time and payload size for large list responses.
+
+Builds report-like documents (with Firestore-style datetime values) and
+compares, at 10k and 100k items:
+- FastAPI default: jsonable_encoder + JSONResponse (json.dumps)
+- FastJSONResponse returned directly (orjson, no jsonable_encoder)
+and the gzip / brotli size of the body at the configured level.
+
+Usage (from backend/):
+    python benchmarks/json_payloads.py --sizes 10000,100000 --repeat 3
+"""
+import argparse
+import gzip
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from services.json_response import FastJSONResponse, orjson
+
+
+class Timestamp(datetime):
+    """Stand-in for Firestore's DatetimeWithNanoseconds"""
+
+
+def make_reports(count: int) -> list:
+    rng = random.Random(42)
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    waste_types = ["plastic", "organic", "mixed", "toxic", "sewage"]
+    reports = []
+    for i in range(count):
+        created = base + timedelta(minutes=rng.randrange(500_000))
+        reports.append({
+            "id": f"report{i:08d}",
+            "latitude": round(26.1 + rng.random(), 6),
+            "longitude": round(91.7 + rng.random(), 6),
+            "wasteType": rng.choice(waste_types),
+            "imageUrl": f"https://res.cloudinary.com/demo/image/upload/v1/luit/reports/{i:08d}.jpg",
+            "imagePublicId": f"luit/reports/{i:08d}",
+            "userId": f"user{rng.randrange(5000):05d}",
+            "userName": "Reporter",
+            "userType": "individual",
+            "status": rng.choice(["active", "cleaned"]),
+            "reportedAt": Timestamp.fromtimestamp(created.timestamp(), timezone.utc),
+            "createdAt": created.isoformat(),
+        })
+    return reports
+
+
+def best_of(repeat: int, func):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--level", type=int, default=5, help="gzip/brotli level (COMPRESSION_LEVEL)")
+    args = parser.parse_args()
+
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    print(f"orjson: {'yes' if orjson else 'no (stdlib fallback)'}, brotli: {'yes' if brotli else 'no'}")
+    print(f"{'items':>7} {'encoder':<22} {'ms':>9} {'raw KB':>9} {'gzip KB':>9} {'br KB':>9} {'gzip ms':>8}")
+    for count in (int(n) for n in args.sizes.split(",")):
+        reports = make_reports(count)
+        variants = [
+            ("default JSONResponse", lambda: JSONResponse(jsonable_encoder(reports)).body),
+            ("FastJSONResponse", lambda: FastJSONResponse(reports).body),
+        ]
+        for name, render in variants:
+            ms, body = best_of(args.repeat, render)
+            gzip_ms, gzipped = best_of(1, lambda: gzip.compress(body, compresslevel=args.level))
+            br_kb = f"{len(brotli.compress(body, quality=args.level)) / 1024:9.0f}" if brotli else f"{'-':>9}"
+            print(f"{count:>7} {name:<22} {ms:9.1f} {len(body) / 1024:9.0f} {len(gzipped) / 1024:9.0f} "
+                  f"{br_kb} {gzip_ms:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Startup profile for the backend.
+
+1. Import-time breakdown: runs `python -X importtime -c "import main"` and
+   prints the modules with the largest cumulative import time.
+2. Time-to-ready: starts uvicorn and polls /health until it answers, failing
+   (exit code 1) when that takes longer than --target-ms.
+
+Usage (from backend/):
+    python benchmarks/startup_profile.py --top 25 --target-ms 3000
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_profile(top: int):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+        except ValueError:
+            continue
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit("import main failed")
+
+    total = max((row[0] for row in rows), default=0)
+    print(f"import main: {total / 1000:.1f} ms cumulative ({len(rows)} modules)")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+    return total
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_ready(timeout: float) -> float:
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise SystemExit("uvicorn exited before becoming ready")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.05)
+        raise SystemExit(f"/health not ready after {timeout}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=25, help="modules to list (default 25)")
+    parser.add_argument("--target-ms", type=float, default=3000, help="time-to-ready budget for /health")
+    parser.add_argument("--skip-server", action="store_true", help="only print the import profile")
+    args = parser.parse_args()
+
+    import_profile(args.top)
+    if args.skip_server:
+        return
+
+    ready_ms = time_to_ready(timeout=max(args.target_ms / 1000 * 5, 30))
+    print(f"/health ready after {ready_ms:.0f} ms (target {args.target_ms:.0f} ms)")
+    if ready_ms > args.target_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
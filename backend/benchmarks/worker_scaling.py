@@ -0,0 +1,133 @@
+"""
+Throughput by worker count.
+
+Starts the app under gunicorn (gunicorn.conf.py) with 1, 2, 4... workers and
+drives it with a fixed number of concurrent keep-alive connections for a few
+seconds per run, then prints requests/s and speedup over one worker.
+
+The server is benchmarks/cpu_app.py: the app plus /_bench/verify-image, which
+runs the real OpenCV verifier on a generated 1024x1024 image. That is CPU-bound
+work on the event loop, which is what extra workers help with; /livez shows the
+pure overhead. (/reporting/verify-image is backed by the mock verifier and
+returns without doing any image work.)
+
+More than one worker needs INVALIDATION_BUS=redis (see gunicorn.conf.py), so a
+Redis server must be reachable on REDIS_URL for those runs.
+
+Usage (from backend/):
+    INVALIDATION_BUS=redis python benchmarks/worker_scaling.py --workers 1,2,4 --concurrency 32 --seconds 10
+    python benchmarks/worker_scaling.py --path /livez --method GET
+"""
+import argparse
+import asyncio
+import base64
+import io
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def sample_image_payload(size: int = 1024) -> dict:
+    from PIL import Image
+    image = Image.effect_noise((size, size), 64).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    return {"image_base64": base64.b64encode(buffer.getvalue()).decode()}
+
+
+async def _wait_ready(base_url: str, timeout: float = 60):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get(base_url + "/livez")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    raise SystemExit("server did not become ready")
+
+
+async def _drive(base_url: str, method: str, path: str, payload, concurrency: int, seconds: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies = []
+    errors = 0
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + seconds
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=payload)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0,
+    }
+
+
+def run(workers: int, args, payload) -> dict:
+    port = _free_port()
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port), LOG_LEVEL="WARNING")
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "benchmarks.cpu_app:app"],
+                              cwd=BACKEND_DIR, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        asyncio.run(_wait_ready(base_url))
+        # Warm-up pass so imports/first-use initialization don't count
+        asyncio.run(_drive(base_url, args.method, args.path, payload, args.concurrency, 1))
+        return asyncio.run(_drive(base_url, args.method, args.path, payload, args.concurrency, args.seconds))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--method", default="POST")
+    parser.add_argument("--path", default="/_bench/verify-image")
+    args = parser.parse_args()
+
+    payload = sample_image_payload() if args.method.upper() != "GET" else None
+    print(f"{args.method} {args.path}, {args.concurrency} connections, {args.seconds:.0f}s per run")
+    print(f"{'workers':>7} {'req/s':>9} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    baseline = None
+    for workers in (int(w) for w in args.workers.split(",")):
+        result = run(workers, args, payload)
+        baseline = baseline or result["rps"]
+        print(f"{workers:>7} {result['rps']:>9.1f} {result['rps'] / baseline:>7.2f}x "
+              f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,12 @@ class Settings(BaseSettings):
     firebase_client_email: str = Field(default="", alias="FIREBASE_CLIENT_EMAIL")
     firebase_client_id: str = Field(default="", alias="FIREBASE_CLIENT_ID")
     firebase_web_api_key: str = Field(default="", alias="FIREBASE_WEB_API_KEY")
+    firebase_certs_url: str = Field(
+        default="https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com",
+        alias="FIREBASE_CERTS_URL",
+    )
+    enforce_auth: bool = Field(default=False, alias="ENFORCE_AUTH")  # require verified ID tokens on protected routes
+    firebase_auth_base_url: str = Field(default="https://identitytoolkit.googleapis.com/v1", alias="FIREBASE_AUTH_BASE_URL")
     
     # Google Cloud
     google_cloud_project_id: str = Field(default="", alias="GOOGLE_CLOUD_PROJECT_ID")
@@ -18,11 +24,49 @@ class Settings(BaseSettings):
     cloudinary_cloud_name: str = Field(default="", alias="CLOUDINARY_CLOUD_NAME")
     cloudinary_api_key: str = Field(default="", alias="CLOUDINARY_API_KEY")
     cloudinary_api_secret: str = Field(default="", alias="CLOUDINARY_API_SECRET")
+    # Base URLs for direct (signed) uploads and derived-image fetches; point at a local stand-in for testing
+    cloudinary_api_base_url: str = Field(default="https://api.cloudinary.com/v1_1", alias="CLOUDINARY_API_BASE_URL")
+    cloudinary_delivery_base_url: str = Field(default="https://res.cloudinary.com", alias="CLOUDINARY_DELIVERY_BASE_URL")
     
     # Backend
     backend_port: int = 5000
     backend_env: str = "development"
     frontend_url: str = "http://localhost:3000"
+
+    # Caching
+    cache_backend: str = Field(default="memory", alias="CACHE_BACKEND")  # memory, redis or none
+    cache_ttl_seconds: float = Field(default=60.0, alias="CACHE_TTL_SECONDS")
+    cache_max_entries: int = Field(default=2048, alias="CACHE_MAX_ENTRIES")
+    redis_url: str = Field(default="redis://localhost:6379/0", alias="REDIS_URL")
+    invalidation_bus: str = Field(default="local", alias="INVALIDATION_BUS")  # local or redis (multi-worker)
+
+    # Firestore cost guard: per-route read budgets by path prefix, e.g. "/analytics/=2000,default=500"
+    firestore_read_budgets: str = Field(default="", alias="FIRESTORE_READ_BUDGETS")
+    firestore_budget_mode: str = Field(default="log", alias="FIRESTORE_BUDGET_MODE")  # log or reject
+
+    # Outbound HTTP (shared pooled client)
+    http_timeout_seconds: float = Field(default=10.0, alias="HTTP_TIMEOUT_SECONDS")
+    http_connect_timeout_seconds: float = Field(default=5.0, alias="HTTP_CONNECT_TIMEOUT_SECONDS")
+    http_max_connections: int = Field(default=50, alias="HTTP_MAX_CONNECTIONS")
+    http_max_keepalive: int = Field(default=20, alias="HTTP_MAX_KEEPALIVE")
+    http_max_concurrency: int = Field(default=32, alias="HTTP_MAX_CONCURRENCY")
+
+    # How long a successful result is replayed for retries with the same Idempotency-Key
+    idempotency_ttl_seconds: float = Field(default=600.0, alias="IDEMPOTENCY_TTL_SECONDS")
+
+    # Background report ingestion (POST /reporting/report/async)
+    ingest_workers: int = Field(default=2, alias="INGEST_WORKERS")
+    ingest_queue_size: int = Field(default=100, alias="INGEST_QUEUE_SIZE")
+    ingest_job_timeout_seconds: float = Field(default=120.0, alias="INGEST_JOB_TIMEOUT_SECONDS")
+    ingest_stale_seconds: float = Field(default=600.0, alias="INGEST_STALE_SECONDS")  # pending longer = lost
+
+    # Response compression (brotli when brotli-asgi is installed, gzip otherwise)
+    compression_min_size: int = Field(default=1024, alias="COMPRESSION_MIN_SIZE")  # bytes; smaller bodies sent as-is
+    compression_level: int = Field(default=5, alias="COMPRESSION_LEVEL")
+
+    # Readiness: dependency checks run by a background task, /readyz only reads the result
+    health_check_interval_seconds: float = Field(default=60.0, alias="HEALTH_CHECK_INTERVAL_SECONDS")
+    health_check_timeout_seconds: float = Field(default=10.0, alias="HEALTH_CHECK_TIMEOUT_SECONDS")
     
     class Config:
         env_file = ".env"
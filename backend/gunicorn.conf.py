@@ -0,0 +1,57 @@
+"""
+Gunicorn settings for multi-worker deployments:
+
+    gunicorn -c gunicorn.conf.py main:app
+
+Each worker is a separate process with its own event loop, so CPU-heavy work
+(image decoding/verification) in one request no longer stalls every other
+request. Per-worker caches stay consistent only through the Redis invalidation
+bus, so the app runs a single worker unless INVALIDATION_BUS=redis; asking for
+more workers on the local bus is refused at startup.
+"""
+import os
+import time
+
+
+def _available_cpus() -> int:
+    # Respects container CPU affinity where the platform exposes it
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+bus = os.getenv("INVALIDATION_BUS", "local").lower()
+if bus == "redis":
+    workers = int(os.getenv("WEB_CONCURRENCY", min(_available_cpus(), int(os.getenv("MAX_WORKERS", "8")))))
+else:
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Workers import the app themselves: Firebase/gRPC and the logging thread must not be forked
+preload_app = False
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then to return memory held by image libraries
+max_requests = int(os.getenv("MAX_REQUESTS", "2000"))
+max_requests_jitter = 200
+
+# Requests are access-logged by the app's own sampled middleware
+accesslog = None
+
+# With Redis, data versions outlive workers, so all workers (including ones restarted by
+# max_requests) share one boot token and compute the same ETags (see cache_service.data_version).
+# Local versions restart from 0 in every new worker, which must then mint its own token.
+if bus == "redis":
+    os.environ.setdefault("LUIT_BOOT_TOKEN", format(time.time_ns() & 0xFFFFFFFFFF, "x"))
+
+
+def on_starting(server):
+    if workers > 1 and bus != "redis":
+        # Per-worker caches would serve stale data after writes in other workers
+        raise SystemExit(
+            f"{workers} workers need INVALIDATION_BUS=redis (got {bus!r}); "
+            "set it, or run WEB_CONCURRENCY=1")
+    server.log.info("Starting %d %s workers", workers, worker_class)
@@ -1,32 +1,81 @@
 #!/usr/bin/env python3
 """
 Keep-alive service to prevent Railway free-tier sleep.
-Usage: Add as a cron job or background task.
-Example Railway cron: python keep_alive.py
+
+Pings the cheap /livez endpoint (no I/O, no logging on the server) on a
+jittered interval, backing off exponentially while the backend is unreachable.
+
+Usage:
+    python keep_alive.py            # run as a small scheduler (background service)
+    python keep_alive.py --once     # single ping, e.g. from a Railway cron job
+
+Environment:
+- KEEP_ALIVE_URL: endpoint to ping (default http://localhost:5000/livez)
+- KEEP_ALIVE_INTERVAL: seconds between pings (default 600)
+- KEEP_ALIVE_JITTER: +/- fraction of the interval to randomize by (default 0.2)
+- KEEP_ALIVE_MAX_BACKOFF: cap on the retry delay after failures (default 1800)
 """
 
+import argparse
+import os
+import random
+import time
 import requests
 import logging
-from datetime import datetime
 
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger(__name__)
 
-def ping_backend():
-    """Ping backend health endpoint to keep it awake"""
+DEFAULT_URL = "http://localhost:5000/livez"
+
+
+def ping_backend(url: str = None, session: requests.Session = None) -> bool:
+    """Ping the backend liveness endpoint once"""
+    url = url or os.getenv("KEEP_ALIVE_URL", DEFAULT_URL)
     try:
-        # Replace with your actual Railway app URL once deployed
-        backend_url = "http://localhost:5000/health"
-        response = requests.get(backend_url, timeout=10)
+        response = (session or requests).get(url, timeout=10)
         if response.status_code == 200:
-            logger.info(f"✅ Keep-alive ping successful at {datetime.now()}")
+            logger.info("✅ Keep-alive ping successful (%.0f ms)", response.elapsed.total_seconds() * 1000)
             return True
-        else:
-            logger.warning(f"⚠️ Ping returned {response.status_code}")
-            return False
+        logger.warning("⚠️ Ping returned %s", response.status_code)
+        return False
     except Exception as e:
-        logger.error(f"❌ Keep-alive ping failed: {str(e)}")
+        logger.error("❌ Keep-alive ping failed: %s", e)
         return False
 
+
+def next_delay(interval: float, jitter: float, failures: int, max_backoff: float) -> float:
+    """Jittered interval; after failures retry sooner first, then back off exponentially.
+    Jitter keeps several replicas/schedulers from pinging in lockstep."""
+    if failures:
+        base = min(max_backoff, 30 * 2 ** (failures - 1))
+    else:
+        base = interval
+    return max(1.0, base * random.uniform(1 - jitter, 1 + jitter))
+
+
+def run_forever(url: str, interval: float, jitter: float, max_backoff: float):
+    failures = 0
+    with requests.Session() as session:  # reuse the connection between pings
+        while True:
+            failures = 0 if ping_backend(url, session) else failures + 1
+            delay = next_delay(interval, jitter, failures, max_backoff)
+            logger.debug("Next ping in %.0fs", delay)
+            time.sleep(delay)
+
+
 if __name__ == "__main__":
-    ping_backend()
+    parser = argparse.ArgumentParser(description="Keep the backend awake")
+    parser.add_argument("--once", action="store_true", help="ping once and exit (for cron)")
+    parser.add_argument("--url", default=os.getenv("KEEP_ALIVE_URL", DEFAULT_URL))
+    parser.add_argument("--interval", type=float, default=float(os.getenv("KEEP_ALIVE_INTERVAL", "600")))
+    parser.add_argument("--jitter", type=float, default=float(os.getenv("KEEP_ALIVE_JITTER", "0.2")))
+    parser.add_argument("--max-backoff", type=float, default=float(os.getenv("KEEP_ALIVE_MAX_BACKOFF", "1800")))
+    args = parser.parse_args()
+
+    if args.once:
+        raise SystemExit(0 if ping_backend(args.url) else 1)
+    try:
+        run_forever(args.url, args.interval, args.jitter, args.max_backoff)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,146 @@
+"""
+Non-blocking structured logging.
+
+Request handlers only enqueue LogRecords (QueueHandler); a background
+QueueListener thread formats them as JSON and writes to stdout, so slow
+stdout never blocks the event loop. Messages should use lazy %-style
+arguments, which are only rendered by the writer thread and only for
+records that pass the level check.
+
+Environment:
+- LOG_LEVEL: root level (default WARNING in production, INFO otherwise)
+- LOG_FORMAT: "json" (default) or "text"
+- LOG_SAMPLE_RATES: per-route request-log sampling, e.g. "/health=0,/analytics/=0.1,default=1"
+"""
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; extra={...} fields are included as top-level keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+    The stock prepare() renders the message in the caller; the queue is in-process,
+    so the record can be passed through untouched."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _default_level() -> str:
+    return "WARNING" if os.getenv("BACKEND_ENV") == "production" else "INFO"
+
+
+def setup_logging():
+    """Install the queue-based root handler. Safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "text":
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    else:
+        stream.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.setLevel(os.getenv("LOG_LEVEL", _default_level()).upper())
+
+    # Requests are logged (sampled) by our middleware; uvicorn's access log would duplicate them
+    logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
+
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def set_log_level(level: str) -> str:
+    """Change the root level at runtime (e.g. switch production to DEBUG on demand)"""
+    level = level.upper()
+    logging.getLogger().setLevel(level)
+    return level
+
+
+class RequestSampler:
+    """Decides which requests get an access-log line, by longest matching path prefix"""
+
+    def __init__(self, spec: str = None):
+        self.default = 1.0
+        self.rates = []
+        for part in (spec or "").split(","):
+            if "=" not in part:
+                continue
+            prefix, rate = part.rsplit("=", 1)
+            prefix = prefix.strip()
+            if prefix == "default":
+                self.default = float(rate)
+            else:
+                self.rates.append((prefix, float(rate)))
+        self.rates.sort(key=lambda item: len(item[0]), reverse=True)
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.getenv("LOG_SAMPLE_RATES", "/health=0,/livez=0,/readyz=0"))
+
+    def rate_for(self, path: str) -> float:
+        for prefix, rate in self.rates:
+            if path.startswith(prefix):
+                return rate
+        return self.default
+
+    def should_log(self, path: str) -> bool:
+        rate = self.rate_for(path)
+        return rate >= 1.0 or (rate > 0 and random.random() < rate)
+
+
+def log_request(logger: logging.Logger, sampler: RequestSampler, method: str, path: str,
+                status: int, started: float):
+    """Emit one structured access-log line; server errors are always logged"""
+    if status >= 500:
+        level = logging.ERROR
+    elif not logger.isEnabledFor(logging.INFO) or not sampler.should_log(path):
+        return
+    else:
+        level = logging.INFO
+    duration_ms = round((time.perf_counter() - started) * 1000, 2)
+    logger.log(level, "%s %s %s", method, path, status,
+               extra={"method": method, "path": path, "status": status, "duration_ms": duration_ms})
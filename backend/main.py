@@ -1,25 +1,67 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, JSONResponse
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+from datetime import datetime
+import asyncio
 import os
 import logging
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+import time
 
 load_dotenv()
 
-app = FastAPI(title="LUIT Backend", version="1.0.0")
- 
-# Initialize Firebase Admin SDK before importing any routes that use Firestore/Auth
-try:
-    from services.firebase_service import init_firebase
-    init_firebase()
-    logger.info("✅ Firebase Admin SDK initialized")
-except Exception as e:
-    logger.error(f"❌ Firebase initialization failed: {e}")
-    # Proceeding allows health endpoint to work; Firestore routes will raise until fixed
+# Configure logging (queue-based JSON; see logging_config for LOG_LEVEL / LOG_SAMPLE_RATES)
+from logging_config import setup_logging, log_request, RequestSampler
+setup_logging()
+logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("luit.access")
+request_sampler = RequestSampler.from_env()
+
+from config import get_settings
+from services import metrics
+from services.firebase_service import begin_request_usage, FirestoreBudgetExceeded
+
+settings = get_settings()
+is_production = os.getenv("BACKEND_ENV") == "production"
+
+def warm_up_sdks():
+    """Initialize Firebase and Cloudinary off the request path. Runs in a worker thread
+    after startup so /health answers immediately; first use initializes them otherwise."""
+    from services.firebase_service import ensure_firebase, get_firestore_client
+    from services.cloudinary_service import ensure_cloudinary
+    try:
+        ensure_firebase()
+        get_firestore_client()
+        logger.info("Firebase Admin SDK initialized")
+    except Exception as e:
+        # Proceeding allows health endpoint to work; Firestore routes will raise until fixed
+        logger.error("Firebase initialization failed: %s", e)
+    try:
+        ensure_cloudinary()
+    except Exception as e:
+        logger.error("Cloudinary configuration failed: %s", e)
+
+@asynccontextmanager
+async def lifespan(app):
+    from services.http_client import start_http_client, close_http_client
+    from services.health_service import monitor_dependencies
+    from services.cache_service import start_invalidation_bus, stop_invalidation_bus
+    from services.ingestion_queue import get_ingestion_queue
+    await start_http_client()
+    await asyncio.to_thread(start_invalidation_bus)
+    get_ingestion_queue().start()
+    loop_monitor = asyncio.create_task(metrics.monitor_event_loop_lag())
+    warm_up = asyncio.create_task(asyncio.to_thread(warm_up_sdks))
+    health_monitor = asyncio.create_task(monitor_dependencies())
+    yield
+    await get_ingestion_queue().stop()
+    for task in (loop_monitor, warm_up, health_monitor):
+        task.cancel()
+    await asyncio.to_thread(stop_invalidation_bus)
+    await close_http_client()
+
+app = FastAPI(title="LUIT Backend", version="1.0.0", lifespan=lifespan)
 
 # CORS Configuration - Allow specific origins
 allowed_origins = [
@@ -29,15 +71,17 @@ allowed_origins = [
     "http://localhost:3000",
 ]
 
-# Middleware to log ALL incoming requests for debugging 405 errors
-@app.middleware("http")
-async def log_requests(request, call_next):
-    method = request.method
-    path = request.url.path
-    logger.info(f"📥 🔍 [SERVER-LOG] {method} request to {path}")
-    response = await call_next(request)
-    logger.info(f"📤 🔍 [SERVER-LOG] Response: {response.status_code} for {path}")
-    return response
+# Conditional GET / stale-while-revalidate caching for endpoints the frontend polls
+from services.response_cache import ResponseCacheMiddleware, CacheRule
+
+app.add_middleware(
+    ResponseCacheMiddleware,
+    rules=[
+        CacheRule("/analytics/global", ("reports",), max_age=30, stale_while_revalidate=120),
+        CacheRule("/analytics/time-buckets", ("reports", "cleanings"), max_age=60, stale_while_revalidate=300),
+        CacheRule("/analytics/leaderboard/", ("reports", "cleanings"), max_age=30, stale_while_revalidate=120),
+    ],
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -50,16 +94,86 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-logger.info(f"✅ CORS enabled with dynamic regex for Vercel deployments")
+logger.info("CORS enabled with dynamic regex for Vercel deployments")
+
+# Compress large JSON bodies (admin lists, /cleaning/available). Sits outside the
+# response cache so cached bodies stay uncompressed and each client gets its own encoding.
+try:
+    from brotli_asgi import BrotliMiddleware  # optional
+    app.add_middleware(
+        BrotliMiddleware,
+        minimum_size=settings.compression_min_size,
+        quality=min(settings.compression_level, 11),
+        gzip_fallback=True,
+    )
+except ImportError:
+    from fastapi.middleware.gzip import GZipMiddleware
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=settings.compression_min_size,
+        compresslevel=min(settings.compression_level, 9),
+    )
+
+# Outermost middleware: request metrics, Firestore usage per endpoint and one
+# sampled, structured access-log line per request (including cached 304s)
+@app.middleware("http")
+async def log_requests(request, call_next):
+    started = time.perf_counter()
+    usage = begin_request_usage(request.url.path)
+    status = 500
+    try:
+        try:
+            response = await call_next(request)
+        except FirestoreBudgetExceeded:
+            response = None
+        if usage.exceeded:
+            logger.warning("Firestore read budget exceeded: %s %s read %d docs (budget %d)",
+                           request.method, request.url.path, usage.reads, usage.budget)
+            if settings.firestore_budget_mode == "reject":
+                response = JSONResponse(status_code=429, content={"detail": "Firestore read budget exceeded"})
+        if not is_production:
+            response.headers["X-Firestore-Reads"] = str(usage.reads)
+            response.headers["X-Firestore-Writes"] = str(usage.writes)
+        status = response.status_code
+        return response
+    finally:
+        metrics.record_request(request.scope, request.method, status, time.perf_counter() - started)
+        if usage.reads or usage.writes:
+            route = metrics.route_label(request.scope)
+            metrics.firestore_reads_total.inc(route, amount=usage.reads)
+            metrics.firestore_writes_total.inc(route, amount=usage.writes)
+            metrics.firestore_reads_per_request.observe(usage.reads, route)
+            if usage.exceeded:
+                metrics.firestore_budget_exceeded_total.inc(route)
+        log_request(access_logger, request_sampler, request.method, request.url.path, status, started)
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus text exposition of request, Firestore, Cloudinary and event-loop metrics"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Liveness: no I/O, no logging (sampled at 0), one prebuilt response
+_LIVEZ = PlainTextResponse("ok", headers={"cache-control": "no-store"})
+
+@app.get("/livez", include_in_schema=False)
+async def livez():
+    """Process is up and the event loop is serving requests. Point keep-alive pings here."""
+    return _LIVEZ
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """Firestore/Cloudinary reachability as last checked by the background monitor"""
+    from services.health_service import readiness
+    ready, report = readiness()
+    return JSONResponse(status_code=200 if ready else 503, content=report)
 
 @app.get("/health")
-def health_check():
-    """Health check endpoint for uptime monitoring and keep-alive"""
-    logger.info("🏥 Health check called")
+async def health_check():
+    """Health check endpoint for uptime monitoring (kept for existing monitors; prefer /livez)"""
     return {
         "status": "healthy", 
         "message": "LUIT Backend is running", 
-        "timestamp": str(__import__('datetime').datetime.utcnow()),
+        "timestamp": str(datetime.utcnow()),
         "admin_enabled": True
     }
 
@@ -92,7 +206,7 @@ app.include_router(analytics.router)
 app.include_router(location.router)
 app.include_router(admin.router)
 
-logger.info("✅ All routes registered")
+logger.info("All routes registered")
 
 if __name__ == "__main__":
     import uvicorn
@@ -119,4 +233,16 @@ if __name__ == "__main__":
     else:
         logger.info(f"☁️  Starting LUIT Cloud version on http://0.0.0.0:{port}")
 
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # WEB_CONCURRENCY > 1 runs several worker processes (production uses gunicorn.conf.py)
+    workers = int(os.getenv("WEB_CONCURRENCY", 1))
+    bus = os.getenv("INVALIDATION_BUS", "local").lower()
+    if workers > 1 and bus != "redis":
+        # Same rule as gunicorn.conf.py: per-worker caches need the Redis bus to stay consistent
+        raise SystemExit(
+            f"{workers} workers need INVALIDATION_BUS=redis (got {bus!r}); "
+            "set it, or run WEB_CONCURRENCY=1")
+    if workers > 1:
+        os.environ.setdefault("LUIT_BOOT_TOKEN", format(time.time_ns() & 0xFFFFFFFFFF, "x"))
+        uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port)
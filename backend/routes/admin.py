@@ -1,20 +1,41 @@
-from fastapi import APIRouter, HTTPException
-from firebase_admin import firestore, auth
+from fastapi import APIRouter, HTTPException, Depends
+from services.firebase_service import get_firestore_client, get_auth
+from services.cache_service import cache_stats, invalidate_collection, invalidate_document
+from services.token_verifier import require_admin
+from services.json_response import FastJSONResponse
+import logging
 
-router = APIRouter(prefix="/admin", tags=["admin"])
-db = firestore.client()
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)],
+                   default_response_class=FastJSONResponse)
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """Cache hit/miss/eviction counters for sizing the read-through cache"""
+    return cache_stats()
+
+@router.post("/log-level")
+async def update_log_level(level: str = "DEBUG"):
+    """Switch the root log level at runtime (e.g. DEBUG while investigating production)"""
+    from logging_config import set_log_level
+    try:
+        return {"level": set_log_level(level)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/reports")
 async def get_all_reports():
     """Get all reports for admin view"""
     try:
+        db = get_firestore_client()
         reports_ref = db.collection('reports')
         reports = []
         for doc in reports_ref.stream():
             report_data = doc.to_dict()
             report_data['id'] = doc.id
             reports.append(report_data)
-        return reports
+        return FastJSONResponse(reports)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -22,13 +43,14 @@ async def get_all_reports():
 async def get_all_cleanings():
     """Get all cleanings for admin view"""
     try:
+        db = get_firestore_client()
         cleanings_ref = db.collection('cleanings')
         cleanings = []
         for doc in cleanings_ref.stream():
             cleaning_data = doc.to_dict()
             cleaning_data['id'] = doc.id
             cleanings.append(cleaning_data)
-        return cleanings
+        return FastJSONResponse(cleanings)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -39,6 +61,7 @@ async def get_all_users():
     reflect immediately and login remains consistent.
     """
     try:
+        db = get_firestore_client()
         users_list = []
 
         # Read canonical profiles from Firestore
@@ -59,15 +82,16 @@ async def get_all_users():
                 'createdAt': str(user.get('createdAt'))
             })
 
-        return users_list
+        return FastJSONResponse(users_list)
     except Exception as e:
-        print(f"Error fetching users: {str(e)}")
+        logger.error("Error fetching users: %s", e)
         return []
 
 @router.get("/ngos")
 async def get_all_ngos():
     """Get all NGOs from Firestore with activity counts."""
     try:
+        db = get_firestore_client()
         ngos_list = []
 
         ngos_ref = db.collection('users').where('userType', '==', 'ngo')
@@ -86,15 +110,16 @@ async def get_all_ngos():
                 'createdAt': str(ngo.get('createdAt'))
             })
 
-        return ngos_list
+        return FastJSONResponse(ngos_list)
     except Exception as e:
-        print(f"Error fetching NGOs: {str(e)}")
+        logger.error("Error fetching NGOs: %s", e)
         return []
 
 @router.delete("/clear/reports")
 async def clear_all_reports():
     """Delete all reports from database and their images from Cloudinary"""
     try:
+        db = get_firestore_client()
         from services.cloudinary_service import delete_image_from_cloudinary
         reports_ref = db.collection('reports')
         batch = db.batch()
@@ -109,7 +134,7 @@ async def clear_all_reports():
                 try:
                     await delete_image_from_cloudinary(public_id)
                 except Exception as img_err:
-                    print(f"⚠️  Could not delete image {public_id}: {str(img_err)}")
+                    logger.warning("Could not delete image %s: %s", public_id, img_err)
             
             batch.delete(doc.reference)
             count += 1
@@ -120,6 +145,7 @@ async def clear_all_reports():
                 batch = db.batch()
         
         batch.commit()
+        invalidate_collection('reports')
         return {"message": f"Cleared {count} reports and their images"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -128,6 +154,7 @@ async def clear_all_reports():
 async def clear_all_cleanings():
     """Delete all cleanings and reset user points"""
     try:
+        db = get_firestore_client()
         # Clear cleanings
         cleanings_ref = db.collection('cleanings')
         batch = db.batch()
@@ -178,6 +205,9 @@ async def clear_all_cleanings():
                 ngo_batch = db.batch()
         
         ngo_batch.commit()
+        invalidate_collection('cleanings')
+        invalidate_collection('users')
+        invalidate_collection('ngos')
         
         return {"message": f"Cleared {count} cleanings and reset all points"}
     except Exception as e:
@@ -187,6 +217,7 @@ async def clear_all_cleanings():
 async def clear_all_users():
     """Delete all user documents from Firestore and related user data and images"""
     try:
+        db = get_firestore_client()
         from services.cloudinary_service import delete_image_from_cloudinary
         
         # 1) Delete all documents in 'users' collection
@@ -216,7 +247,7 @@ async def clear_all_users():
                     try:
                         await delete_image_from_cloudinary(public_id)
                     except Exception as img_err:
-                        print(f"⚠️  Could not delete image {public_id}: {str(img_err)}")
+                        logger.warning("Could not delete image %s: %s", public_id, img_err)
                 
                 reports_batch.delete(doc.reference)
                 reports_count += 1
@@ -242,6 +273,9 @@ async def clear_all_users():
 
         cleanings_batch.commit()
 
+        for collection in ('users', 'reports', 'cleanings'):
+            invalidate_collection(collection)
+
         return {
             "message": (
                 f"Cleared {users_count} user profiles, "
@@ -255,6 +289,7 @@ async def clear_all_users():
 async def clear_all_ngos():
     """Delete all NGO data from reports and cleanings, and their images"""
     try:
+        db = get_firestore_client()
         from services.cloudinary_service import delete_image_from_cloudinary
         
         count = 0
@@ -271,7 +306,7 @@ async def clear_all_ngos():
                     try:
                         await delete_image_from_cloudinary(public_id)
                     except Exception as img_err:
-                        print(f"⚠️  Could not delete image {public_id}: {str(img_err)}")
+                        logger.warning("Could not delete image %s: %s", public_id, img_err)
                 
                 batch.delete(doc.reference)
                 count += 1
@@ -298,6 +333,8 @@ async def clear_all_ngos():
                     cleaning_batch = db.batch()
         
         cleaning_batch.commit()
+        invalidate_collection('reports')
+        invalidate_collection('cleanings')
         
         return {"message": f"Cleared {count} NGO records with images and {cleaning_count} cleanings"}
     except Exception as e:
@@ -307,6 +344,7 @@ async def clear_all_ngos():
 async def delete_report(report_id: str):
     """Delete a single report by ID and its associated image from Cloudinary"""
     try:
+        db = get_firestore_client()
         # Get report data to retrieve public_id before deletion
         report_doc = db.collection('reports').document(report_id).get()
         if report_doc.exists:
@@ -317,15 +355,14 @@ async def delete_report(report_id: str):
             if public_id:
                 try:
                     from services.cloudinary_service import delete_image_from_cloudinary
-                    print(f"🗑️  Deleting image with public_id: {public_id}")
                     await delete_image_from_cloudinary(public_id)
-                    print(f"✅ Image deleted successfully")
                 except Exception as img_err:
-                    print(f"⚠️  Could not delete image: {str(img_err)}")
+                    logger.warning("Could not delete image %s: %s", public_id, img_err)
                     # Continue with report deletion even if image delete fails
         
         # Delete the report from Firestore
         db.collection('reports').document(report_id).delete()
+        invalidate_document('reports', report_id)
         return {"message": f"Deleted report {report_id} and associated image"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -334,7 +371,9 @@ async def delete_report(report_id: str):
 async def delete_cleaning(cleaning_id: str):
     """Delete a single cleaning by ID"""
     try:
+        db = get_firestore_client()
         db.collection('cleanings').document(cleaning_id).delete()
+        invalidate_document('cleanings', cleaning_id)
         return {"message": f"Deleted cleaning {cleaning_id}"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -343,6 +382,7 @@ async def delete_cleaning(cleaning_id: str):
 async def delete_user(user_id: str):
     """Delete all data for a single user (reports and cleanings)"""
     try:
+        db = get_firestore_client()
         count = 0
         
         # Delete user's reports
@@ -368,11 +408,14 @@ async def delete_user(user_id: str):
         db.collection('users').document(user_id).delete()
         # Attempt to delete auth user as well so Admin table stays consistent
         try:
-            auth.delete_user(user_id)
+            get_auth().delete_user(user_id)
         except Exception as _:
             pass
 
         batch.commit()
+        invalidate_document('users', user_id)
+        invalidate_collection('reports')
+        invalidate_collection('cleanings')
         
         return {"message": f"Deleted user {user_id} and {count} associated records"}
     except Exception as e:
@@ -382,6 +425,7 @@ async def delete_user(user_id: str):
 async def delete_ngo(ngo_id: str):
     """Delete all data for a single NGO (reports and cleanings)"""
     try:
+        db = get_firestore_client()
         count = 0
         
         # Delete NGO's reports
@@ -406,11 +450,14 @@ async def delete_ngo(ngo_id: str):
         # Delete NGO profile and auth account
         db.collection('users').document(ngo_id).delete()
         try:
-            auth.delete_user(ngo_id)
+            get_auth().delete_user(ngo_id)
         except Exception as _:
             pass
 
         batch.commit()
+        invalidate_document('users', ngo_id)
+        invalidate_collection('reports')
+        invalidate_collection('cleanings')
         
         return {"message": f"Deleted NGO {ngo_id} and {count} associated records"}
     except Exception as e:
@@ -1,7 +1,10 @@
 from fastapi import APIRouter
-from services.firebase_service import get_firestore_client
-from google.cloud.firestore import FieldFilter
+from services.firebase_service import get_firestore_client, field_filter
+from services.response_cache import mark_uncacheable
 from datetime import datetime, timedelta, timezone
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
@@ -12,15 +15,15 @@ async def get_user_analytics(userId: str):
         db = get_firestore_client()
         
         # Count reports by user
-        reports = db.collection("reports").where(filter=FieldFilter("userId", "==", userId)).stream()
+        reports = db.collection("reports").where(filter=field_filter("userId", "==", userId)).stream()
         reports_count = sum(1 for _ in reports)
         
         # Count cleanings by user
-        cleanings = db.collection("cleanings").where(filter=FieldFilter("userId", "==", userId)).stream()
+        cleanings = db.collection("cleanings").where(filter=field_filter("userId", "==", userId)).stream()
         cleanings_count = sum(1 for _ in cleanings)
         
         # Calculate total points
-        cleanings_list = db.collection("cleanings").where(filter=FieldFilter("userId", "==", userId)).stream()
+        cleanings_list = db.collection("cleanings").where(filter=field_filter("userId", "==", userId)).stream()
         total_points = sum(c.to_dict().get("pointsAwarded", 0) for c in cleanings_list)
         total_points += reports_count * 10  # 10 points per report
         
@@ -32,6 +35,7 @@ async def get_user_analytics(userId: str):
             "userRank": 0
         }
     except Exception as e:
+        mark_uncacheable()  # zeros are a fallback, not data: never cache or revalidate them
         return {
             "userId": userId,
             "reportsCount": 0,
@@ -46,13 +50,13 @@ async def get_ngo_analytics(ngoId: str):
     try:
         db = get_firestore_client()
         
-        reports = db.collection("reports").where(filter=FieldFilter("userId", "==", ngoId)).stream()
+        reports = db.collection("reports").where(filter=field_filter("userId", "==", ngoId)).stream()
         reports_count = sum(1 for _ in reports)
         
-        cleanings = db.collection("cleanings").where(filter=FieldFilter("userId", "==", ngoId)).stream()
+        cleanings = db.collection("cleanings").where(filter=field_filter("userId", "==", ngoId)).stream()
         cleanings_count = sum(1 for _ in cleanings)
         
-        cleanings_list = db.collection("cleanings").where(filter=FieldFilter("userId", "==", ngoId)).stream()
+        cleanings_list = db.collection("cleanings").where(filter=field_filter("userId", "==", ngoId)).stream()
         total_points = sum(c.to_dict().get("pointsAwarded", 0) for c in cleanings_list)
         total_points += reports_count * 10
         
@@ -64,6 +68,7 @@ async def get_ngo_analytics(ngoId: str):
             "ngoRank": 0
         }
     except Exception as e:
+        mark_uncacheable()
         return {
             "ngoId": ngoId,
             "reportsCount": 0,
@@ -113,6 +118,7 @@ async def get_global_analytics():
             "wasteBreakdown": waste_breakdown
         }
     except Exception as e:
+        mark_uncacheable()
         return {
             "totalReports": 0,
             "totalCleanings": 0,
@@ -136,7 +142,7 @@ async def get_users_leaderboard(category: str = "reporting", limit: int = 20):
         
         if category == "reporting":
             # Get all users with their reports count
-            reports = db.collection("reports").where(filter=FieldFilter("userType", "==", "individual")).stream()
+            reports = db.collection("reports").where(filter=field_filter("userType", "==", "individual")).stream()
             user_stats = {}
             
             for report in reports:
@@ -154,7 +160,7 @@ async def get_users_leaderboard(category: str = "reporting", limit: int = 20):
             
         elif category == "cleaning":
             # Get all users with their cleanings points
-            cleanings = db.collection("cleanings").where(filter=FieldFilter("userType", "==", "individual")).stream()
+            cleanings = db.collection("cleanings").where(filter=field_filter("userType", "==", "individual")).stream()
             user_stats = {}
             
             for cleaning in cleanings:
@@ -176,7 +182,7 @@ async def get_users_leaderboard(category: str = "reporting", limit: int = 20):
             user_stats = {}
             
             # Add reporting points
-            reports = db.collection("reports").where(filter=FieldFilter("userType", "==", "individual")).stream()
+            reports = db.collection("reports").where(filter=field_filter("userType", "==", "individual")).stream()
             for report in reports:
                 data = report.to_dict()
                 user_id = data.get("userId")
@@ -188,7 +194,7 @@ async def get_users_leaderboard(category: str = "reporting", limit: int = 20):
                     user_stats[user_id]["points"] += 10
             
             # Add cleaning points
-            cleanings = db.collection("cleanings").where(filter=FieldFilter("userType", "==", "individual")).stream()
+            cleanings = db.collection("cleanings").where(filter=field_filter("userType", "==", "individual")).stream()
             for cleaning in cleanings:
                 data = cleaning.to_dict()
                 user_id = data.get("userId")
@@ -206,7 +212,8 @@ async def get_users_leaderboard(category: str = "reporting", limit: int = 20):
         
         return {"leaderboard": leaderboard}
     except Exception as e:
-        print(f"Error getting leaderboard: {str(e)}")
+        mark_uncacheable()
+        logger.error("Error getting leaderboard: %s", e)
         return {"leaderboard": []}
 
 @router.get("/leaderboard/ngos")
@@ -216,7 +223,7 @@ async def get_ngos_leaderboard(category: str = "reporting", limit: int = 20):
         db = get_firestore_client()
         
         if category == "reporting":
-            reports = db.collection("reports").where(filter=FieldFilter("userType", "==", "ngo")).stream()
+            reports = db.collection("reports").where(filter=field_filter("userType", "==", "ngo")).stream()
             ngo_stats = {}
             
             for report in reports:
@@ -233,7 +240,7 @@ async def get_ngos_leaderboard(category: str = "reporting", limit: int = 20):
             leaderboard = sorted(ngo_stats.values(), key=lambda x: x["points"], reverse=True)[:limit]
             
         elif category == "cleaning":
-            cleanings = db.collection("cleanings").where(filter=FieldFilter("userType", "==", "ngo")).stream()
+            cleanings = db.collection("cleanings").where(filter=field_filter("userType", "==", "ngo")).stream()
             ngo_stats = {}
             
             for cleaning in cleanings:
@@ -255,7 +262,7 @@ async def get_ngos_leaderboard(category: str = "reporting", limit: int = 20):
             ngo_stats = {}
             
             # Add reporting points
-            reports = db.collection("reports").where(filter=FieldFilter("userType", "==", "ngo")).stream()
+            reports = db.collection("reports").where(filter=field_filter("userType", "==", "ngo")).stream()
             for report in reports:
                 data = report.to_dict()
                 ngo_id = data.get("userId")
@@ -267,7 +274,7 @@ async def get_ngos_leaderboard(category: str = "reporting", limit: int = 20):
                     ngo_stats[ngo_id]["points"] += 10
             
             # Add cleaning points
-            cleanings = db.collection("cleanings").where(filter=FieldFilter("userType", "==", "ngo")).stream()
+            cleanings = db.collection("cleanings").where(filter=field_filter("userType", "==", "ngo")).stream()
             for cleaning in cleanings:
                 data = cleaning.to_dict()
                 ngo_id = data.get("userId")
@@ -285,7 +292,8 @@ async def get_ngos_leaderboard(category: str = "reporting", limit: int = 20):
         
         return {"leaderboard": leaderboard}
     except Exception as e:
-        print(f"Error getting NGO leaderboard: {str(e)}")
+        mark_uncacheable()
+        logger.error("Error getting NGO leaderboard: %s", e)
         return {"leaderboard": []}
 
 @router.get("/time-buckets")
@@ -354,7 +362,8 @@ async def get_time_buckets():
             'cleanings': { 'week': c_w, 'month': c_m, 'year': c_y }
         }
     except Exception as e:
-        print(f"Error computing time buckets: {str(e)}")
+        mark_uncacheable()
+        logger.error("Error computing time buckets: %s", e)
         return {
             'reports': { 'week': 0, 'month': 0, 'year': 0 },
             'cleanings': { 'week': 0, 'month': 0, 'year': 0 }
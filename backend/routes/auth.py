@@ -1,22 +1,58 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel, EmailStr
 from typing import Literal, Optional
-from firebase_admin import auth, firestore
-from firebase_admin.auth import UserNotFoundError
-import requests
-import os
+import asyncio
+import base64
+import json
+import logging
+import time
 
-from services.firebase_service import get_firestore_client
-from config import get_settings
+from services.firebase_service import get_document, set_document, get_auth
+from services.http_client import identity_toolkit_post
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
-db = get_firestore_client()
-settings = get_settings()
 
-# Firebase Web API Key
-FIREBASE_WEB_API_KEY = settings.firebase_web_api_key
-FIREBASE_AUTH_ENDPOINT = f"https://identitytoolkit.googleapis.com/v1/accounts:signUp?key={FIREBASE_WEB_API_KEY}"
-FIREBASE_LOGIN_ENDPOINT = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={FIREBASE_WEB_API_KEY}"
+# Firebase Identity Toolkit REST endpoints (base URL and key come from settings)
+FIREBASE_SIGNUP_ENDPOINT = "accounts:signUp"
+FIREBASE_LOGIN_ENDPOINT = "accounts:signInWithPassword"
+
+logger = logging.getLogger(__name__)
+
+def _token_claims(id_token: str) -> dict:
+    """Read the payload of an ID token we just received from Identity Toolkit.
+    The token came straight from Google over TLS, so the signature isn't re-checked here;
+    custom claims (e.g. userType) are top-level keys of the payload."""
+    try:
+        payload = id_token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))
+    except Exception:
+        return {}
+
+# Claims Firebase puts in every ID token; the other keys of the payload are custom claims
+_STANDARD_TOKEN_CLAIMS = frozenset({
+    'acr', 'amr', 'at_hash', 'aud', 'auth_time', 'azp', 'cnf', 'c_hash', 'exp', 'iat', 'iss', 'jti',
+    'nbf', 'nonce', 'sub', 'firebase', 'user_id', 'email', 'email_verified', 'phone_number', 'name',
+    'picture',
+})
+
+def _custom_claims(claims: dict) -> dict:
+    return {key: value for key, value in claims.items() if key not in _STANDARD_TOKEN_CLAIMS}
+
+class _StepTimer:
+    """Collects per-step durations for a request, exposed as a Server-Timing header"""
+
+    def __init__(self):
+        self.steps = []
+        self._last = time.perf_counter()
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        self.steps.append((name, (now - self._last) * 1000))
+        self._last = now
+
+    def header(self) -> str:
+        return ", ".join(f"{name};dur={ms:.1f}" for name, ms in self.steps)
 
 class RegisterRequest(BaseModel):
     userType: Literal["individual", "ngo"]
@@ -39,12 +75,15 @@ async def register(request: RegisterRequest):
         if request.userType == "ngo" and not request.ngoName:
             raise HTTPException(status_code=400, detail="NGO name is required for NGO registration")
 
+        auth = get_auth()
+        from firebase_admin import firestore
+
         # Prevent duplicate accounts on the same email
         try:
             existing = auth.get_user_by_email(request.email)
             if existing:
                 raise HTTPException(status_code=400, detail="An account with this email already exists")
-        except UserNotFoundError:
+        except auth.UserNotFoundError:
             existing = None
 
         # Create user in Firebase Auth via REST API
@@ -54,7 +93,7 @@ async def register(request: RegisterRequest):
             "returnSecureToken": True
         }
         
-        response = requests.post(FIREBASE_AUTH_ENDPOINT, json=payload)
+        response = await identity_toolkit_post(FIREBASE_SIGNUP_ENDPOINT, payload)
         auth_data = response.json()
         
         if response.status_code != 200:
@@ -79,9 +118,9 @@ async def register(request: RegisterRequest):
             'createdAt': firestore.SERVER_TIMESTAMP
         }
         
-        db.collection('users').document(user_id).set(user_data)
+        set_document('users', user_id, user_data)
         
-        print(f"✅ User registered: {user_id} ({request.userType})")
+        logger.info("User registered: %s (%s)", user_id, request.userType)
         
         return {
             "message": "Registration successful",
@@ -91,12 +130,13 @@ async def register(request: RegisterRequest):
             "email": request.email
         }
     except Exception as e:
-        print(f"❌ Registration error: {str(e)}")
+        logger.warning("Registration error: %s", e)
         raise HTTPException(status_code=400, detail=f"Registration failed: {str(e)}")
 
 @router.post("/login")
-async def login(request: LoginRequest):
+async def login(request: LoginRequest, response: Response):
     """Login user or NGO with Firebase Auth"""
+    timer = _StepTimer()
     try:
         # For now, we need to get email from identifier
         # In production, you'd query Firestore to find user by name/ngoName
@@ -108,36 +148,44 @@ async def login(request: LoginRequest):
             "returnSecureToken": True
         }
         
-        response = requests.post(FIREBASE_LOGIN_ENDPOINT, json=payload)
-        auth_data = response.json()
+        signin_response = await identity_toolkit_post(FIREBASE_LOGIN_ENDPOINT, payload)
+        auth_data = signin_response.json()
+        timer.mark("signin")
         
-        if response.status_code != 200:
+        if signin_response.status_code != 200:
             error_msg = auth_data.get('error', {}).get('message', 'Login failed')
             raise HTTPException(status_code=401, detail=error_msg)
         
         user_id = auth_data.get('localId')
         id_token = auth_data.get('idToken')
 
-        # Get user profile from Firestore
-        user_doc = db.collection('users').document(user_id).get()
-        if not user_doc.exists:
+        # Claims come from decoding the token payload we already have (no get_user call);
+        # the Firestore profile read is the only I/O here and runs off the event loop
+        token_claims = _token_claims(id_token)
+        token_user_type = token_claims.get('userType')
+        user_data = await asyncio.to_thread(get_document, 'users', user_id)
+        timer.mark("profile")
+
+        if user_data is None:
             raise HTTPException(status_code=401, detail="Account not found")
-        user_data = user_doc.to_dict() or {}
         stored_user_type = user_data.get('userType')
 
         # Enforce account type to prevent cross-login between NGO and individual
         if stored_user_type and stored_user_type != request.userType:
             raise HTTPException(status_code=403, detail="Account type mismatch. Use the correct portal to sign in.")
 
-        # Align custom claims with stored type if needed
-        try:
-            claims = auth.get_user(user_id).custom_claims or {}
-            if stored_user_type and claims.get('userType') != stored_user_type:
-                auth.set_custom_user_claims(user_id, {'userType': stored_user_type})
-        except Exception:
-            pass
+        # Align custom claims with stored type only when the token disagrees. The call replaces
+        # all custom claims, so the others (e.g. admin) are carried over from the fresh token.
+        if stored_user_type and token_user_type != stored_user_type:
+            claims = {**_custom_claims(token_claims), 'userType': stored_user_type}
+            try:
+                await asyncio.to_thread(get_auth().set_custom_user_claims, user_id, claims)
+            except Exception as e:
+                logger.warning("Could not align claims for %s: %s", user_id, e)
+            timer.mark("claims")
         
-        print(f"✅ User logged in: {user_id} ({stored_user_type})")
+        response.headers["Server-Timing"] = timer.header()
+        logger.info("User logged in: %s (%s) [%s]", user_id, stored_user_type, response.headers["Server-Timing"])
         
         return {
             "message": "Login successful",
@@ -148,7 +196,7 @@ async def login(request: LoginRequest):
             "name": user_data.get('name', '')
         }
     except Exception as e:
-        print(f"❌ Login error: {str(e)}")
+        logger.warning("Login error: %s", e)
         raise HTTPException(status_code=401, detail=f"Login failed: {str(e)}")
 
 @router.post("/logout")
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 # Temporary mock for Python 3.14 compatibility
 from services.image_verification_mock import verify_cleaning_image
 from services.cloudinary_service import upload_image_to_cloudinary, delete_image_from_cloudinary
 from services.firebase_service import get_document, update_document, add_document
+from services.token_verifier import require_user
+from services.json_response import FastJSONResponse
 from datetime import datetime
 import logging
 
@@ -29,8 +31,10 @@ async def verify_cleaning(request: CleaningRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/mark-cleaned")
-async def mark_cleaned(request: CleaningRequest):
+async def mark_cleaned(request: CleaningRequest, user=Depends(require_user)):
     """Mark report as cleaned"""
+    if user is not None and user['uid'] != request.userId:
+        raise HTTPException(status_code=403, detail="Token does not match userId")
     try:
         # Verify cleaning first
         verification = await verify_cleaning_image(request.beforeImageBase64, request.afterImageBase64)
@@ -42,7 +46,7 @@ async def mark_cleaned(request: CleaningRequest):
         if not report:
             return {"success": False, "message": "Report not found"}
         
-        logger.info(f"📋 Report data: imagePublicId={report.get('imagePublicId')}, imageUrl={report.get('imageUrl')}")
+        logger.debug("Report data: imagePublicId=%s, imageUrl=%s", report.get('imagePublicId'), report.get('imageUrl'))
         
         # Delete before image from Cloudinary if it exists
         image_public_id = report.get('imagePublicId')
@@ -64,17 +68,15 @@ async def mark_cleaned(request: CleaningRequest):
                             public_id_with_ext = path_parts[1]
                             # Remove file extension
                             image_public_id = public_id_with_ext.rsplit('.', 1)[0]
-                            logger.info(f"📝 Extracted public_id from URL: {image_public_id}")
+                            logger.debug("Extracted public_id from URL: %s", image_public_id)
             except Exception as e:
-                logger.error(f"❌ Could not extract public_id from URL: {str(e)}")
+                logger.warning("Could not extract public_id from URL: %s", e)
         
         if image_public_id:
             try:
-                logger.info(f"🗑️  Deleting before image from Cloudinary: {image_public_id}")
                 await delete_image_from_cloudinary(image_public_id)
-                logger.info(f"✅ Before image deleted successfully")
             except Exception as e:
-                logger.error(f"❌ Could not delete before image: {str(e)}")
+                logger.warning("Could not delete before image: %s", e)
         
         # Calculate points based on waste type
         points_map = {
@@ -121,22 +123,17 @@ async def mark_cleaned(request: CleaningRequest):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/available")
+@router.get("/available", response_class=FastJSONResponse)
 async def get_available_cleanings(wasteType: str = None, userType: str = None, userLat: float | None = None, userLon: float | None = None):
     """Get available cleanings to participate in"""
     try:
-        from services.firebase_service import get_firestore_client
-        from google.cloud.firestore import FieldFilter
+        from services.firebase_service import query_documents
         
-        db = get_firestore_client()
-        
-        # Query active reports (status = "active") using filter keyword argument
-        query = db.collection("reports").where(filter=FieldFilter("status", "==", "active"))
-        reports = query.stream()
+        # Query active reports (status = "active"); cached and invalidated on report writes
+        reports = query_documents("reports", "status", "==", "active", with_ids=True)
         
         cleanings = []
-        for report in reports:
-            report_data = report.to_dict()
+        for report_data in reports:
             
             # Filter by waste type if specified
             if wasteType and report_data.get("wasteType") != wasteType:
@@ -171,7 +168,7 @@ async def get_available_cleanings(wasteType: str = None, userType: str = None, u
                 except Exception:
                     distance_km = 0
             cleaning = {
-                "id": report.id,
+                "id": report_data["id"],
                 "imageUrl": report_data.get("imageUrl", ""),
                 "wasteType": report_data.get("wasteType", "unknown"),
                 "latitude": report_lat,
@@ -181,9 +178,9 @@ async def get_available_cleanings(wasteType: str = None, userType: str = None, u
             }
             cleanings.append(cleaning)
         
-        return {"success": True, "cleanings": cleanings}
+        return FastJSONResponse({"success": True, "cleanings": cleanings})
     except Exception as e:
-        print(f"Error fetching cleanings: {str(e)}")
+        logger.error("Error fetching cleanings: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
 
 def get_points_for_waste_type(waste_type: str) -> int:
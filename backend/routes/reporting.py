@@ -1,22 +1,33 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File, Header, Response
 from pydantic import BaseModel
 from typing import Literal, Optional
 # Temporary mock for Python 3.14 compatibility
 from services.image_verification_mock import verify_garbage_image
-from services.location_service import check_duplicate_location
-from services.cloudinary_service import upload_image_to_cloudinary
-from services.firebase_service import add_document, query_documents, get_document
+from services.location_service import check_duplicate_location, geocell_lock
+from services.idempotency import run_idempotent
+from services.cloudinary_service import (
+    upload_image_to_cloudinary, delete_image_from_cloudinary, signed_upload_params,
+    fetch_thumbnail_base64, delivery_url, issued_upload_id,
+)
+from services.firebase_service import add_document, query_documents, get_document, update_document
+from services.ingestion_queue import get_ingestion_queue, QueueFullError
+from config import get_settings
 from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/reporting", tags=["reporting"])
 
+SUBMISSIONS = "report_submissions"  # asynchronous submissions and their processing status
+
 class ReportRequest(BaseModel):
     latitude: float
     longitude: float
     wasteType: Literal["plastic", "organic", "mixed", "toxic", "sewage"]
     imageBase64: Optional[str] = None  # accepts base64 or legacy data URL
     imageUrl: Optional[str] = None     # use when image already uploaded (e.g., Cloudinary URL)
-    imagePublicId: Optional[str] = None
+    imagePublicId: Optional[str] = None  # alone: image uploaded directly with /upload-signature params
     userId: Optional[str] = None
     userName: Optional[str] = None
     userType: Optional[str] = "individual"  # individual, ngo, or anonymous
@@ -37,15 +48,11 @@ async def upload_image(request: UploadImageRequest):
         if not request.image_base64:
             raise ValueError("No image data provided")
         
-        print(f"📤 Uploading image to Cloudinary... (size: {len(request.image_base64) / 1024:.2f} KB)")
-        
         result = await upload_image_to_cloudinary(request.image_base64, folder="luit/reports")
         
         if not result['success']:
             raise ValueError(result['message'])
         
-        print(f"✅ Upload complete: {result['url']}")
-        
         return {
             "success": True,
             "url": result['url'],
@@ -53,30 +60,37 @@ async def upload_image(request: UploadImageRequest):
             "message": "Image uploaded successfully"
         }
     except Exception as e:
-        print(f"❌ Upload error: {str(e)}")
+        logger.warning("Upload error: %s", e)
         raise HTTPException(status_code=400, detail=f"Upload failed: {str(e)}")
 
+@router.post("/upload-signature")
+async def get_upload_signature():
+    """Signed parameters for uploading an image straight to Cloudinary.
+    POST the file with these fields to uploadUrl, then send the returned public_id
+    as imagePublicId to /reporting/report."""
+    try:
+        return {"success": True, **signed_upload_params()}
+    except Exception as e:
+        logger.error("Could not sign upload parameters: %s", e)
+        raise HTTPException(status_code=500, detail="Could not sign upload parameters")
+
 @router.post("/delete-image")
 async def delete_image(request: DeleteImageRequest):
     """Delete image from Cloudinary if needed"""
     try:
         from services.cloudinary_service import delete_image_from_cloudinary
         
-        print(f"🗑️  Deleting image: {request.public_id}")
-        
         result = await delete_image_from_cloudinary(request.public_id)
         
         if not result['success']:
             raise ValueError(result['message'])
         
-        print(f"✅ Image deleted: {request.public_id}")
-        
         return {
             "success": True,
             "message": "Image deleted successfully"
         }
     except Exception as e:
-        print(f"⚠️  Delete error: {str(e)}")
+        logger.warning("Delete error: %s", e)
         raise HTTPException(status_code=400, detail=f"Delete failed: {str(e)}")
 
 @router.post("/verify-image")
@@ -86,15 +100,11 @@ async def verify_image(request: VerifyImageRequest):
         if not request.image_base64:
             raise ValueError("No image data provided")
         
-        print(f"📷 Verifying image... (size: {len(request.image_base64) / 1024:.2f} KB)")
-        
         result = await verify_garbage_image(request.image_base64)
         
-        print(f"✅ Verification complete: is_garbage={result['is_garbage']}")
-        
         return result
     except Exception as e:
-        print(f"❌ Verification error: {str(e)}")
+        logger.warning("Verification error: %s", e)
         raise HTTPException(status_code=400, detail=f"Image verification failed: {str(e)}")
 
 @router.post("/check-location")
@@ -107,9 +117,47 @@ async def check_location(latitude: float, longitude: float):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/report")
-async def create_report(request: ReportRequest):
-    """Create new garbage report"""
+async def create_report(request: ReportRequest, response: Response,
+                        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    """Create new garbage report.
+    Retries carrying the same Idempotency-Key get the first successful result back."""
     try:
+        result, replayed = await run_idempotent(
+            "report", idempotency_key, request.model_dump(), lambda: _create_report(request),
+            is_success=lambda result: result.get("success") is True,
+        )
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _create_report(request: ReportRequest) -> dict:
+    if not (request.imageUrl or request.imageBase64 or request.imagePublicId):
+        raise ValueError("No image provided for report")
+
+    # Uploaded straight to Cloudinary: only ids issued by /upload-signature and not yet used by a
+    # report are ours to verify or delete
+    direct_upload = not (request.imageUrl or request.imageBase64)
+    if direct_upload:
+        if not issued_upload_id(request.imagePublicId):
+            raise ValueError("Image was not uploaded with an issued upload signature")
+        if query_documents("reports", "imagePublicId", "==", request.imagePublicId, use_cache=False):
+            raise ValueError("Image already belongs to a report")
+
+    # One submission at a time per spot: concurrent reports for the same location do the
+    # duplicate check, verification, upload and insert once; the others then see the duplicate.
+    async with geocell_lock(request.latitude, request.longitude):
+        # Check for duplicate location first, before any verification/upload work
+        location_check = await check_duplicate_location(request.latitude, request.longitude)
+        if location_check['is_duplicate']:
+            if direct_upload:
+                # The client already stored the image; no report will reference it
+                await delete_image_from_cloudinary(request.imagePublicId)
+            return {"success": False, "message": "This location already reported"}
+
         # Resolve image source
         image_url = None
         image_public_id = None
@@ -118,31 +166,31 @@ async def create_report(request: ReportRequest):
         if request.imageUrl:
             image_url = request.imageUrl
             image_public_id = request.imagePublicId
-        elif request.imageBase64:
-            # If a URL was sent in the imageBase64 field, accept it without re-uploading
-            if request.imageBase64.startswith("http"):
-                image_url = request.imageBase64
-                image_public_id = request.imagePublicId
-            else:
-                # Verify garbage only when raw image data is provided
-                garbage_check = await verify_garbage_image(request.imageBase64)
-                if not garbage_check['is_garbage']:
-                    return {"success": False, "message": garbage_check['message']}
-                
-                upload_result = await upload_image_to_cloudinary(request.imageBase64, folder="luit/reports")
-                if not upload_result['success']:
-                    return {"success": False, "message": upload_result['message']}
-                
-                image_url = upload_result['url']
-                image_public_id = upload_result['public_id']
+        # If a URL was sent in the imageBase64 field, accept it without re-uploading
+        elif request.imageBase64 and request.imageBase64.startswith("http"):
+            image_url = request.imageBase64
+            image_public_id = request.imagePublicId
+        elif direct_upload:
+            # Verify a small derived thumbnail, not the original
+            image_public_id = request.imagePublicId
+            garbage_check = await verify_garbage_image(await fetch_thumbnail_base64(image_public_id))
+            if not garbage_check['is_garbage']:
+                await delete_image_from_cloudinary(image_public_id)
+                return {"success": False, "message": garbage_check['message']}
+            image_url = delivery_url(image_public_id)
         else:
-            raise ValueError("No image provided for report")
+            # Verify garbage only when raw image data is provided
+            garbage_check = await verify_garbage_image(request.imageBase64)
+            if not garbage_check['is_garbage']:
+                return {"success": False, "message": garbage_check['message']}
+            
+            upload_result = await upload_image_to_cloudinary(request.imageBase64, folder="luit/reports")
+            if not upload_result['success']:
+                return {"success": False, "message": upload_result['message']}
+            
+            image_url = upload_result['url']
+            image_public_id = upload_result['public_id']
 
-        # Check for duplicate location
-        location_check = await check_duplicate_location(request.latitude, request.longitude)
-        if location_check['is_duplicate']:
-            return {"success": False, "message": "This location already reported"}
-        
         # Save to Firestore
         report_data = {
             "latitude": request.latitude,
@@ -158,19 +206,122 @@ async def create_report(request: ReportRequest):
             "verified": True
         }
         
-        # Add to Firestore
+        # Add to Firestore (invalidates the cached active-reports query the next check reads)
         report_id = add_document("reports", report_data)
-        
-        return {
-            "success": True,
-            "message": "Report submitted successfully",
-            "reportId": report_id,
-            "points": 10,
-            "imageUrl": image_url
-        }
+    
+    return {
+        "success": True,
+        "message": "Report submitted successfully",
+        "reportId": report_id,
+        "points": 10,
+        "imageUrl": image_url
+    }
+
+@router.post("/report/async", status_code=202)
+async def submit_report(request: ReportRequest, response: Response,
+                        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    """Accept a report for background processing and return immediately.
+    Poll GET /reporting/submissions/{submissionId} for the outcome."""
+    try:
+        result, replayed = await run_idempotent(
+            "report-async", idempotency_key, request.model_dump(), lambda: _enqueue_report(request),
+            is_success=lambda result: "submissionId" in result,
+        )
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+async def _enqueue_report(request: ReportRequest) -> dict:
+    if not (request.imageUrl or request.imageBase64 or request.imagePublicId):
+        raise ValueError("No image provided for report")
+    queue = get_ingestion_queue()
+    if queue.full():
+        raise HTTPException(status_code=503, detail="Too many reports being processed, please retry shortly",
+                            headers={"Retry-After": "5"})
+
+    # The pending record holds everything except raw image data, which stays with the job
+    submission = {
+        "latitude": request.latitude,
+        "longitude": request.longitude,
+        "wasteType": request.wasteType,
+        "userId": request.userId,
+        "userName": request.userName or "Anonymous",
+        "userType": request.userType or "individual",
+        "status": "pending",  # pending, accepted, rejected or failed
+        "message": "Report received, processing",
+        "reportId": None,
+        "createdAt": datetime.now().isoformat(),
+    }
+    submission_id = add_document(SUBMISSIONS, submission)
+    try:
+        queue.submit(submission_id, lambda: _process_submission(submission_id, request))
+    except QueueFullError as e:
+        update_document(SUBMISSIONS, submission_id, {"status": "failed", "message": str(e)})
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+    return {
+        "success": True,
+        "submissionId": submission_id,
+        "status": "pending",
+        "statusUrl": f"/reporting/submissions/{submission_id}",
+    }
+
+async def _process_submission(submission_id: str, request: ReportRequest) -> str:
+    """Background job: run the full report pipeline and record the outcome on the submission"""
+    try:
+        result = await _create_report(request)
+    except Exception as e:
+        update_document(SUBMISSIONS, submission_id, {
+            "status": "failed", "message": str(e), "completedAt": datetime.now().isoformat()})
+        return "failed"
+    if result["success"]:
+        update_document(SUBMISSIONS, submission_id, {
+            "status": "accepted",
+            "message": result["message"],
+            "reportId": result["reportId"],
+            "imageUrl": result["imageUrl"],
+            "points": result["points"],
+            "completedAt": datetime.now().isoformat(),
+        })
+        return "accepted"
+    update_document(SUBMISSIONS, submission_id, {
+        "status": "rejected", "message": result["message"], "completedAt": datetime.now().isoformat()})
+    return "rejected"
+
+@router.get("/submissions/{submissionId}")
+async def get_submission_status(submissionId: str):
+    """Status of an asynchronous report submission"""
+    # Uncached: the record is updated by whichever worker process ran the job
+    submission = get_document(SUBMISSIONS, submissionId, use_cache=False)
+    if not submission:
+        raise HTTPException(status_code=404, detail="Submission not found")
+
+    status = submission.get("status")
+    message = submission.get("message")
+    if status == "pending":
+        # Jobs aren't durable; one pending this long was lost with its worker
+        try:
+            age = (datetime.now() - datetime.fromisoformat(submission["createdAt"])).total_seconds()
+        except (KeyError, TypeError, ValueError):
+            age = 0
+        if age > get_settings().ingest_stale_seconds:
+            status, message = "failed", "Processing was interrupted, please submit the report again"
+            update_document(SUBMISSIONS, submissionId, {"status": status, "message": message})
+
+    return {
+        "success": True,
+        "submissionId": submissionId,
+        "status": status,
+        "message": message,
+        "reportId": submission.get("reportId"),
+        "imageUrl": submission.get("imageUrl"),
+        "points": submission.get("points"),
+    }
+
 @router.get("/reports")
 async def get_reports(wasteType: str = None, limit: int = 20):
     """Get all reports, optionally filtered by waste type"""
@@ -0,0 +1,363 @@
+"""
+Read-through cache for hot Firestore documents.
+
+Two backends are available:
+- MemoryCache: in-process LRU with per-entry TTL (default)
+- RedisCache: any Redis-compatible client (redis-py, fakeredis, or a local
+  stand-in exposing get/set/delete/scan_iter)
+
+The active backend is selected with CACHE_BACKEND ("memory", "redis" or "none").
+"""
+from collections import OrderedDict
+from config import get_settings
+import copy
+import logging
+import os
+import pickle
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class CacheStats:
+    """Hit/miss/eviction counters used to size the cache"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def record(self, field: str, amount: int = 1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache with TTL"""
+
+    backend = "memory"
+    shared = False  # private to this worker; other workers learn of writes via the invalidation bus
+
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.stats = CacheStats()
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.record("misses")
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.stats.record("misses")
+                self.stats.record("evictions")
+                return default
+            self._data.move_to_end(key)
+        self.stats.record("hits")
+        # Callers mutate returned dicts (e.g. adding 'id'), never hand out the stored object
+        return copy.copy(value)
+
+    def set(self, key: str, value, ttl: float = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, copy.copy(value))
+            self._data.move_to_end(key)
+            evicted = 0
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self.stats.record("evictions", evicted)
+
+    def delete(self, key: str):
+        with self._lock:
+            removed = self._data.pop(key, None) is not None
+        if removed:
+            self.stats.record("invalidations")
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            keys = [k for k in self._data if k.startswith(prefix)]
+            for k in keys:
+                del self._data[k]
+        if keys:
+            self.stats.record("invalidations", len(keys))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def info(self) -> dict:
+        with self._lock:
+            size = len(self._data)
+        return {
+            "backend": self.backend,
+            "size": size,
+            "maxEntries": self.max_entries,
+            "defaultTtl": self.default_ttl,
+            **self.stats.as_dict(),
+        }
+
+
+class RedisCache:
+    """Cache backed by a Redis-compatible client. Values are pickled."""
+
+    backend = "redis"
+    shared = True
+
+    def __init__(self, client, default_ttl: float = 60.0, namespace: str = "luit:cache:"):
+        self.client = client
+        self.default_ttl = default_ttl
+        self.namespace = namespace
+        self.stats = CacheStats()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs):
+        import redis  # optional dependency, only needed for CACHE_BACKEND=redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key: str, default=None):
+        raw = self.client.get(self.namespace + key)
+        if raw is None:
+            self.stats.record("misses")
+            return default
+        self.stats.record("hits")
+        return pickle.loads(raw)
+
+    def set(self, key: str, value, ttl: float = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self.client.set(self.namespace + key, pickle.dumps(value), ex=max(1, int(ttl)))
+
+    def delete(self, key: str):
+        if self.client.delete(self.namespace + key):
+            self.stats.record("invalidations")
+
+    def delete_prefix(self, prefix: str):
+        keys = list(self.client.scan_iter(match=f"{self.namespace}{prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+            self.stats.record("invalidations", len(keys))
+
+    def clear(self):
+        self.delete_prefix("")
+
+    def info(self) -> dict:
+        return {"backend": self.backend, "defaultTtl": self.default_ttl, **self.stats.as_dict()}
+
+
+class NullCache:
+    """Backend used when caching is disabled"""
+
+    backend = "none"
+    shared = True
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    def get(self, key: str, default=None):
+        self.stats.record("misses")
+        return default
+
+    def set(self, key: str, value, ttl: float = None):
+        pass
+
+    def delete(self, key: str):
+        pass
+
+    def delete_prefix(self, prefix: str):
+        pass
+
+    def clear(self):
+        pass
+
+    def info(self) -> dict:
+        return {"backend": self.backend, **self.stats.as_dict()}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _build_cache():
+    settings = get_settings()
+    backend = settings.cache_backend.lower()
+    if backend == "redis":
+        try:
+            return RedisCache.from_url(settings.redis_url, default_ttl=settings.cache_ttl_seconds)
+        except Exception as e:
+            logger.warning("Redis cache unavailable (%s), falling back to in-process cache", e)
+    elif backend == "none":
+        return NullCache()
+    return MemoryCache(max_entries=settings.cache_max_entries, default_ttl=settings.cache_ttl_seconds)
+
+
+def get_cache():
+    """Return the process-wide cache backend"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = _build_cache()
+    return _cache
+
+
+def set_cache(cache):
+    """Swap the active backend (e.g. a RedisCache wrapping a local stand-in client)"""
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+def shared_redis_client():
+    """Redis client all workers share (the cache's, else the invalidation bus's),
+    or None when this worker keeps its state to itself"""
+    from services.invalidation_bus import get_bus, RedisBus
+    cache = get_cache()
+    if cache.backend == "redis":
+        return cache.client
+    bus = get_bus()
+    return bus.client if isinstance(bus, RedisBus) else None
+
+
+def cached(key: str, loader, ttl: float = None):
+    """Read-through helper: return cached value for key or load and store it.
+    None results are not cached so missing documents are re-checked."""
+    cache = get_cache()
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+    value = loader()
+    if value is not None:
+        cache.set(key, value, ttl)
+    return value
+
+
+def document_key(collection: str, doc_id: str) -> str:
+    return f"doc:{collection}/{doc_id}"
+
+
+def query_prefix(collection: str) -> str:
+    return f"query:{collection}:"
+
+
+# Per-collection data versions, bumped on every write. Response caching derives
+# ETags from these so clients can revalidate without the result being recomputed.
+# The boot token keeps ETags from a previous process from matching after restart.
+# With the Redis bus, gunicorn.conf.py sets LUIT_BOOT_TOKEN once in the master so all
+# workers agree; it is only kept once the shared versions are loaded (start_invalidation_bus).
+_PROCESS_TOKEN = format(time.time_ns() & 0xFFFFFFFFFF, "x")
+_BOOT_TOKEN = os.getenv("LUIT_BOOT_TOKEN") or _PROCESS_TOKEN
+_versions = {}
+_versions_lock = threading.Lock()
+
+
+def _set_version(collection: str, version: int):
+    with _versions_lock:
+        if version > _versions.get(collection, 0):
+            _versions[collection] = version
+
+
+def bump_data_version(collection: str) -> int:
+    from services.invalidation_bus import get_bus
+    with _versions_lock:
+        current = _versions.get(collection, 0)
+    version = get_bus().next_version(collection, current)
+    _set_version(collection, version)
+    return version
+
+
+def data_version(*collections: str) -> str:
+    """Opaque version string that changes whenever any of the collections is written"""
+    with _versions_lock:
+        parts = [str(_versions.get(c, 0)) for c in collections]
+    return f"{_BOOT_TOKEN}." + ".".join(parts)
+
+
+def _invalidate(collection: str, keys=(), prefixes=()):
+    """Apply an invalidation here and publish it to the other workers"""
+    from services.invalidation_bus import get_bus
+    cache = get_cache()
+    for key in keys:
+        cache.delete(key)
+    for prefix in prefixes:
+        cache.delete_prefix(prefix)
+    version = bump_data_version(collection)
+    get_bus().publish({"collection": collection, "version": version,
+                       "keys": list(keys), "prefixes": list(prefixes)})
+
+
+def apply_invalidation(message: dict):
+    """Bus handler: apply another worker's invalidation to this worker's state"""
+    cache = get_cache()
+    if not cache.shared:
+        for key in message.get("keys", ()):
+            cache.delete(key)
+        for prefix in message.get("prefixes", ()):
+            cache.delete_prefix(prefix)
+    _set_version(message["collection"], int(message["version"]))
+
+
+def start_invalidation_bus():
+    """Subscribe this worker to invalidations and load the shared data versions"""
+    global _BOOT_TOKEN
+    from services.invalidation_bus import get_bus
+    bus = get_bus()
+    bus.subscribe(apply_invalidation)
+    shared = bus.name == "redis"
+    try:
+        for collection, version in bus.load_versions().items():
+            _set_version(collection, version)
+    except Exception as e:
+        logger.warning("Could not load shared data versions: %s", e)
+        shared = False
+    if not shared:
+        # Versions restart from 0 here, so a token shared with earlier workers would
+        # let their ETags match different data
+        _BOOT_TOKEN = _PROCESS_TOKEN
+    bus.start()
+    logger.info("Invalidation bus: %s", bus.name)
+
+
+def stop_invalidation_bus():
+    from services.invalidation_bus import get_bus
+    get_bus().stop()
+
+
+def invalidate_queries(collection: str):
+    """Drop cached query results for a collection (e.g. after an insert)"""
+    _invalidate(collection, prefixes=(query_prefix(collection),))
+
+
+def invalidate_document(collection: str, doc_id: str):
+    """Drop a cached document and any cached query over its collection"""
+    _invalidate(collection, keys=(document_key(collection, doc_id),), prefixes=(query_prefix(collection),))
+
+
+def invalidate_collection(collection: str):
+    """Drop every cached document and query for a collection (bulk writes)"""
+    _invalidate(collection, prefixes=(f"doc:{collection}/", query_prefix(collection)))
+
+
+def cache_stats() -> dict:
+    return get_cache().info()
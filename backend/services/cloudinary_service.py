@@ -1,64 +1,82 @@
-import cloudinary
-import cloudinary.uploader
 from config import get_settings
 import base64
+import hashlib
+import hmac
+import secrets
 import io
-from PIL import Image
 import tempfile
 import os
+import logging
+import threading
+import time
+from services.metrics import cloudinary_duration
 
-settings = get_settings()
+logger = logging.getLogger(__name__)
 
-print(f"\n🔧 CLOUDINARY CONFIG:")
-print(f"   Cloud Name: {settings.cloudinary_cloud_name}")
-print(f"   API Key: {'SET' if settings.cloudinary_api_key else 'MISSING'}")
-print(f"   API Secret: {'SET' if settings.cloudinary_api_secret else 'MISSING'}\n")
+# The Cloudinary SDK is configured on first use (or by the startup warm-up) rather than at import
+_configured = False
+_configure_lock = threading.Lock()
 
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=settings.cloudinary_cloud_name,
-    api_key=settings.cloudinary_api_key,
-    api_secret=settings.cloudinary_api_secret
-)
+def ensure_cloudinary():
+    """Configure the Cloudinary SDK once and return the module"""
+    global _configured
+    import cloudinary
+    if not _configured:
+        with _configure_lock:
+            if not _configured:
+                settings = get_settings()
+                logger.info(
+                    "Cloudinary config: cloud=%s api_key=%s api_secret=%s",
+                    settings.cloudinary_cloud_name,
+                    'SET' if settings.cloudinary_api_key else 'MISSING',
+                    'SET' if settings.cloudinary_api_secret else 'MISSING',
+                )
+                cloudinary.config(
+                    cloud_name=settings.cloudinary_cloud_name,
+                    api_key=settings.cloudinary_api_key,
+                    api_secret=settings.cloudinary_api_secret
+                )
+                _configured = True
+    return cloudinary
 
 async def upload_image_to_cloudinary(image_base64: str, folder: str = "luit") -> dict:
     """
     Upload base64 image to Cloudinary
     """
     try:
-        print(f"\n📤 UPLOAD STARTED")
-        print(f"   Input size: {len(image_base64) / 1024:.2f} KB")
+        ensure_cloudinary()
+        import cloudinary.uploader
+        from PIL import Image
+        logger.debug("Upload started (%.2f KB base64)", len(image_base64) / 1024)
         
         # Remove data URI prefix if present
         if ',' in image_base64:
             image_base64 = image_base64.split(',')[1]
-            print(f"   Removed data URI prefix")
         
         # Decode base64 to bytes
-        print(f"   Decoding base64...")
         image_bytes = base64.b64decode(image_base64)
-        print(f"   ✓ Decoded: {len(image_bytes)} bytes")
         
         # Validate image
-        print(f"   Validating image...")
         img = Image.open(io.BytesIO(image_bytes))
-        print(f"   ✓ Format: {img.format}, Size: {img.size}")
+        logger.debug("Decoded %d bytes, format=%s size=%s", len(image_bytes), img.format, img.size)
         
         # Save to temp file
-        print(f"   Creating temp file...")
         with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp:
             tmp.write(image_bytes)
             tmp_path = tmp.name
         
-        print(f"   ✓ Temp file: {tmp_path}")
-        
         # Upload to Cloudinary
-        print(f"   Uploading to Cloudinary...")
-        result = cloudinary.uploader.upload(
-            tmp_path,
-            folder=folder,
-            resource_type="image"
-        )
+        started = time.perf_counter()
+        try:
+            result = cloudinary.uploader.upload(
+                tmp_path,
+                folder=folder,
+                resource_type="image"
+            )
+        except Exception:
+            cloudinary_duration.observe(time.perf_counter() - started, "upload", "error")
+            raise
+        cloudinary_duration.observe(time.perf_counter() - started, "upload", "ok")
         
         # Delete temp file
         try:
@@ -66,9 +84,7 @@ async def upload_image_to_cloudinary(image_base64: str, folder: str = "luit") ->
         except:
             pass
         
-        print(f"   ✓ Response: {result['public_id']}")
-        print(f"   ✓ URL: {result['secure_url']}")
-        print(f"✅ UPLOAD SUCCESS\n")
+        logger.info("Uploaded %s", result['public_id'])
         
         return {
             'success': True,
@@ -78,10 +94,7 @@ async def upload_image_to_cloudinary(image_base64: str, folder: str = "luit") ->
         }
     
     except Exception as e:
-        print(f"❌ UPLOAD FAILED: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        print()
+        logger.error("Upload failed: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
         return {
             'success': False,
             'url': None,
@@ -92,9 +105,16 @@ async def upload_image_to_cloudinary(image_base64: str, folder: str = "luit") ->
 async def delete_image_from_cloudinary(public_id: str) -> dict:
     """Delete image from Cloudinary"""
     try:
-        print(f"\n🗑️  DELETING: {public_id}")
-        result = cloudinary.uploader.destroy(public_id)
-        print(f"✅ DELETED\n")
+        ensure_cloudinary()
+        import cloudinary.uploader
+        started = time.perf_counter()
+        try:
+            result = cloudinary.uploader.destroy(public_id)
+        except Exception:
+            cloudinary_duration.observe(time.perf_counter() - started, "delete", "error")
+            raise
+        cloudinary_duration.observe(time.perf_counter() - started, "delete", "ok")
+        logger.info("Deleted %s", public_id)
         
         return {
             'success': True,
@@ -102,7 +122,7 @@ async def delete_image_from_cloudinary(public_id: str) -> dict:
         }
     
     except Exception as e:
-        print(f"❌ DELETE FAILED: {str(e)}\n")
+        logger.error("Delete of %s failed: %s", public_id, e)
         return {
             'success': False,
             'message': f'Delete failed: {str(e)}'
@@ -111,7 +131,72 @@ async def delete_image_from_cloudinary(public_id: str) -> dict:
 async def get_image_url(public_id: str) -> str:
     """Generate secure URL for Cloudinary image"""
     try:
-        url = cloudinary.CloudinaryResource(public_id).build_url(secure=True)
+        url = ensure_cloudinary().CloudinaryResource(public_id).build_url(secure=True)
         return url
     except Exception as e:
         return None
+
+# Direct uploads: the client sends the file straight to Cloudinary with parameters
+# signed here, so image bytes never pass through the API server.
+REPORT_UPLOAD_FOLDER = "luit/reports"
+UPLOAD_ALLOWED_FORMATS = "jpg,jpeg,png,webp,heic"
+UPLOAD_TRANSFORMATION = "c_limit,w_1600,h_1600"  # incoming transformation: cap stored size
+THUMBNAIL_TRANSFORMATION = "c_fill,w_256,h_256,q_auto,f_jpg"
+SIGNATURE_LIFETIME_SECONDS = 3600  # Cloudinary rejects signed uploads whose timestamp is older
+
+def _upload_name_mac(folder: str, nonce: str) -> str:
+    secret = get_settings().cloudinary_api_secret or ""
+    return hmac.new(secret.encode(), f"{folder}/{nonce}".encode(), hashlib.sha256).hexdigest()[:16]
+
+def issued_upload_id(public_id: str, folder: str = REPORT_UPLOAD_FOLDER) -> bool:
+    """Whether public_id is one signed_upload_params handed out for folder"""
+    prefix = folder + "/"
+    if not public_id or not public_id.startswith(prefix):
+        return False
+    nonce, _, mac = public_id[len(prefix):].partition("_")
+    return bool(nonce) and hmac.compare_digest(mac, _upload_name_mac(folder, nonce))
+
+def signed_upload_params(folder: str = REPORT_UPLOAD_FOLDER) -> dict:
+    """Short-lived signed parameters for a client-side upload to Cloudinary.
+    The public_id is fixed here and tagged, so only ids issued by this server are accepted back."""
+    from cloudinary.utils import api_sign_request
+    settings = get_settings()
+    timestamp = int(time.time())
+    nonce = secrets.token_hex(8)
+    params = {
+        "timestamp": timestamp,
+        "folder": folder,
+        "public_id": f"{nonce}_{_upload_name_mac(folder, nonce)}",
+        "allowed_formats": UPLOAD_ALLOWED_FORMATS,
+        "transformation": UPLOAD_TRANSFORMATION,
+    }
+    return {
+        "uploadUrl": f"{settings.cloudinary_api_base_url.rstrip('/')}/{settings.cloudinary_cloud_name}/image/upload",
+        "apiKey": settings.cloudinary_api_key,
+        "signature": api_sign_request(params, settings.cloudinary_api_secret),
+        "expiresAt": timestamp + SIGNATURE_LIFETIME_SECONDS,
+        **params,
+    }
+
+def delivery_url(public_id: str, transformation: str = None) -> str:
+    """Delivery URL for an uploaded image, optionally with a derived transformation"""
+    settings = get_settings()
+    parts = [settings.cloudinary_delivery_base_url.rstrip("/"), settings.cloudinary_cloud_name, "image", "upload"]
+    if transformation:
+        parts.append(transformation)
+    parts.append(public_id)
+    return "/".join(parts)
+
+async def fetch_thumbnail_base64(public_id: str) -> str:
+    """Fetch a small derived JPEG of an uploaded image (a few KB) for server-side verification"""
+    from services.http_client import request
+    started = time.perf_counter()
+    try:
+        response = await request("GET", delivery_url(public_id, THUMBNAIL_TRANSFORMATION))
+        response.raise_for_status()
+    except Exception:
+        cloudinary_duration.observe(time.perf_counter() - started, "thumbnail", "error")
+        raise
+    cloudinary_duration.observe(time.perf_counter() - started, "thumbnail", "ok")
+    return base64.b64encode(response.content).decode()
+
@@ -1,32 +1,38 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
 from config import get_settings
-import json
-import os
+from services.cache_service import cached, document_key, query_prefix, invalidate_document, invalidate_queries
+import contextvars
+import logging
+import threading
+import types
+
+logger = logging.getLogger(__name__)
+
+# firebase_admin / google.cloud are imported on first use: they dominate import time
+# and aren't needed to serve /health or cached responses.
+_init_lock = threading.Lock()
+_initialized = False
 
 # Initialize Firebase
 def init_firebase():
+    import firebase_admin
+    from firebase_admin import credentials
     try:
         # Check if the app is already initialized
         firebase_admin.get_app()
-        print(f"ℹ️  Firebase already initialized")
+        logger.debug("Firebase already initialized")
         return True
     except ValueError:
         # If not initialized, proceed
         try:
             settings = get_settings()
             
-            # Log what we received
-            print(f"📋 Firebase Project ID: {settings.firebase_project_id}")
-            print(f"📋 Firebase Client Email: {settings.firebase_client_email}")
+            logger.info("Firebase project=%s client_email=%s", settings.firebase_project_id, settings.firebase_client_email)
             
             # Check if project_id is set
             if not settings.firebase_project_id:
-                print("❌ ERROR: FIREBASE_PROJECT_ID is not set!")
                 raise ValueError("FIREBASE_PROJECT_ID environment variable not found")
                 
             if not settings.firebase_private_key:
-                print("❌ ERROR: FIREBASE_PRIVATE_KEY is not set!")
                 raise ValueError("FIREBASE_PRIVATE_KEY environment variable not found")
                 
             cred_dict = {
@@ -45,60 +51,229 @@ def init_firebase():
             firebase_admin.initialize_app(cred, {
                 'projectId': settings.firebase_project_id
             })
-            print(f"✅ Firebase initialized with project: {settings.firebase_project_id}")
+            logger.info("Firebase initialized with project: %s", settings.firebase_project_id)
             return True
         except Exception as e:
-            print(f"❌ Firebase initialization failed: {str(e)}")
+            logger.error("Firebase initialization failed: %s", e)
             raise
 
-try:
-    init_firebase()
-except Exception as e:
-    print(f"⚠️  Firebase initialization error at startup: {str(e)}")
-    print("Firebase operations will fail until credentials are properly configured")
+class FirestoreBudgetExceeded(Exception):
+    """Raised mid-request when FIRESTORE_BUDGET_MODE=reject and the read budget is spent"""
+
+class FirestoreUsage:
+    """Document reads/writes made while serving one request"""
+    __slots__ = ("reads", "writes", "budget", "exceeded")
+
+    def __init__(self, budget: int = 0):
+        self.reads = 0
+        self.writes = 0
+        self.budget = budget
+        self.exceeded = False
+
+_request_usage = contextvars.ContextVar("firestore_usage", default=None)
+_budget_rules = None
+
+def _parse_budgets(spec: str) -> list:
+    """'/analytics/=2000,/admin/=5000,default=500' -> [(prefix, reads)] longest prefix first"""
+    rules = []
+    for part in (spec or "").split(","):
+        if "=" in part:
+            prefix, value = part.rsplit("=", 1)
+            rules.append(("" if prefix.strip() == "default" else prefix.strip(), int(value)))
+    return sorted(rules, key=lambda rule: len(rule[0]), reverse=True)
+
+def read_budget_for(path: str) -> int:
+    """Per-route read budget from FIRESTORE_READ_BUDGETS (0 = unlimited)"""
+    global _budget_rules
+    if _budget_rules is None:
+        _budget_rules = _parse_budgets(get_settings().firestore_read_budgets)
+    for prefix, budget in _budget_rules:
+        if path.startswith(prefix):
+            return budget
+    return 0
+
+def begin_request_usage(path: str = "") -> FirestoreUsage:
+    """Start counting Firestore operations for the current request context"""
+    usage = FirestoreUsage(read_budget_for(path))
+    _request_usage.set(usage)
+    return usage
+
+def _count_reads(count: int):
+    usage = _request_usage.get()
+    if usage is None:
+        return
+    usage.reads += count
+    if usage.budget and usage.reads > usage.budget and not usage.exceeded:
+        usage.exceeded = True
+        if get_settings().firestore_budget_mode == "reject":
+            raise FirestoreBudgetExceeded(f"Firestore read budget of {usage.budget} exceeded")
+
+def _count_writes(count: int):
+    usage = _request_usage.get()
+    if usage is not None:
+        usage.writes += count
+
+# Firestore types whose method results are wrapped so every billed operation is counted,
+# including code that uses the client directly rather than the helpers below
+_WRAPPED_TYPES = {
+    "Client", "CollectionReference", "Query", "CollectionGroup",
+    "DocumentReference", "WriteBatch", "BulkWriteBatch",
+}
+_WRITE_METHODS = {"set", "update", "delete", "create", "add"}
+
+def _unwrap(value):
+    """The SDK object behind a proxy, also inside arguments such as get_all([refs]) or
+    start_after={...}; the SDK type-checks them and rejects proxies"""
+    if isinstance(value, _CountingProxy):
+        return object.__getattribute__(value, "_target")
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return type(value)(_unwrap(v) for v in value)
+    if isinstance(value, dict):
+        return {k: _unwrap(v) for k, v in value.items()}
+    if isinstance(value, types.GeneratorType):
+        return (_unwrap(v) for v in value)
+    return value
+
+class _CountingProxy:
+    """Transparent wrapper over Firestore client objects that counts document reads/writes"""
+    __slots__ = ("_target",)
+
+    def __init__(self, target):
+        object.__setattr__(self, "_target", target)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        kind = type(self._target).__name__
+
+        def call(*args, **kwargs):
+            args = [_unwrap(a) for a in args]
+            kwargs = {k: _unwrap(v) for k, v in kwargs.items()}
+            if name == "stream":
+                return _counted_stream(attr(*args, **kwargs))
+            result = attr(*args, **kwargs)
+            if name == "get":
+                # DocumentReference.get -> snapshot; Query/Collection.get -> list of snapshots
+                _count_reads(max(1, len(result)) if isinstance(result, list) else 1)
+            elif name == "get_all":
+                result = _counted_stream(result)
+            elif name == "commit":
+                _count_writes(len(result or []))
+            elif name in _WRITE_METHODS and kind not in ("WriteBatch", "BulkWriteBatch"):
+                _count_writes(1)
+            if type(result).__name__ in _WRAPPED_TYPES:
+                return _CountingProxy(result)
+            return result
+
+        return call
+
+def _counted_stream(docs):
+    count = 0
+    try:
+        for doc in docs:
+            count += 1
+            _count_reads(1)
+            yield doc
+    finally:
+        if count == 0:
+            _count_reads(1)  # an empty query is still billed one read
+
+_client = None
+
+def ensure_firebase():
+    """Initialize the Firebase Admin SDK once (first use or the startup warm-up)"""
+    global _initialized
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                init_firebase()
+                _initialized = True
 
 def get_firestore_client():
-    """Get Firestore client for database operations"""
-    return firestore.client()
+    """Get Firestore client for database operations (reads/writes are counted per request)"""
+    global _client
+    if _client is None:
+        ensure_firebase()
+        from firebase_admin import firestore
+        _client = _CountingProxy(firestore.client())
+    return _client
+
+def get_auth():
+    """firebase_admin.auth, with the Admin SDK initialized"""
+    ensure_firebase()
+    from firebase_admin import auth
+    return auth
+
+def field_filter(field: str, operator: str, value):
+    """google.cloud.firestore.FieldFilter, imported lazily"""
+    from google.cloud.firestore import FieldFilter
+    return FieldFilter(field, operator, value)
 
 def add_document(collection: str, data: dict) -> str:
     """Add document to Firestore, returns document ID"""
     db = get_firestore_client()
     doc_ref = db.collection(collection).add(data)
-    return doc_ref[1].id if doc_ref else None
+    doc_id = doc_ref[1].id if doc_ref else None
+    invalidate_queries(collection)
+    return doc_id
 
-def get_document(collection: str, doc_id: str) -> dict:
-    """Get document from Firestore"""
+def set_document(collection: str, doc_id: str, data: dict, merge: bool = False):
+    """Create or overwrite document in Firestore"""
     db = get_firestore_client()
-    doc = db.collection(collection).document(doc_id).get()
-    return doc.to_dict() if doc.exists else None
+    db.collection(collection).document(doc_id).set(data, merge=merge)
+    invalidate_document(collection, doc_id)
+
+def get_document(collection: str, doc_id: str, use_cache: bool = True) -> dict:
+    """Get document from Firestore (read-through cached)"""
+    def load():
+        db = get_firestore_client()
+        doc = db.collection(collection).document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    if not use_cache:
+        return load()
+    return cached(document_key(collection, doc_id), load)
 
 def update_document(collection: str, doc_id: str, data: dict):
     """Update document in Firestore"""
     db = get_firestore_client()
     db.collection(collection).document(doc_id).update(data)
+    invalidate_document(collection, doc_id)
 
 def delete_document(collection: str, doc_id: str):
     """Delete document from Firestore"""
     db = get_firestore_client()
     db.collection(collection).document(doc_id).delete()
+    invalidate_document(collection, doc_id)
 
-def query_documents(collection: str, field: str, operator: str, value: any) -> list:
-    """Query documents from Firestore"""
-    db = get_firestore_client()
-    query = db.collection(collection)
-    
-    if operator == "==":
-        query = query.where(field, "==", value)
-    elif operator == "<":
-        query = query.where(field, "<", value)
-    elif operator == ">":
-        query = query.where(field, ">", value)
-    elif operator == "<=":
-        query = query.where(field, "<=", value)
-    elif operator == ">=":
-        query = query.where(field, ">=", value)
-    
-    docs = query.stream()
-    return [doc.to_dict() for doc in docs]
+def query_documents(collection: str, field: str, operator: str, value: any,
+                    use_cache: bool = True, with_ids: bool = False) -> list:
+    """Query documents from Firestore (read-through cached per collection).
+    with_ids adds the document ID to each result under 'id'."""
+    def load():
+        db = get_firestore_client()
+        query = db.collection(collection)
+
+        if operator == "==":
+            query = query.where(field, "==", value)
+        elif operator == "<":
+            query = query.where(field, "<", value)
+        elif operator == ">":
+            query = query.where(field, ">", value)
+        elif operator == "<=":
+            query = query.where(field, "<=", value)
+        elif operator == ">=":
+            query = query.where(field, ">=", value)
+
+        docs = query.stream()
+        if with_ids:
+            results = [{**doc.to_dict(), 'id': doc.id} for doc in docs]
+        else:
+            results = [doc.to_dict() for doc in docs]
+        return results
 
+    if not use_cache:
+        return load()
+    key = f"{query_prefix(collection)}{field}{operator}{value!r}:{int(with_ids)}"
+    return [dict(d) for d in cached(key, load)]
@@ -0,0 +1,145 @@
+"""
+Dependency health for /readyz.
+
+A background task checks Firestore and Cloudinary connectivity every
+HEALTH_CHECK_INTERVAL_SECONDS and stores the outcome; /readyz only reads that
+state, so probes and keep-alive pings never touch the network themselves.
+
+With several workers on the Redis invalidation bus, one worker holds a short
+Redis lease and runs the checks; it writes the results to Redis and the other
+workers copy them, so each interval costs one Firestore read and one Cloudinary
+ping however many workers there are.
+"""
+from config import get_settings
+import asyncio
+import json
+import logging
+import math
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+_state = {}  # check name -> {"ok", "latency_ms", "checked_at", "error"}
+
+LEADER_KEY = "luit:health:leader"
+STATE_KEY = "luit:health:state"
+
+
+def _check_firestore():
+    from services.firebase_service import get_firestore_client
+    # A single document lookup: one billed read per interval
+    get_firestore_client().collection("_health").document("ping").get()
+
+
+def _check_cloudinary():
+    from services.cloudinary_service import ensure_cloudinary
+    ensure_cloudinary()
+    import cloudinary.api
+    cloudinary.api.ping()
+
+
+CHECKS = {
+    "firestore": _check_firestore,
+    "cloudinary": _check_cloudinary,
+}
+
+
+async def run_check(name: str, check, timeout: float) -> dict:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(asyncio.to_thread(check), timeout)
+        result = {"ok": True, "error": None}
+    except Exception as e:
+        result = {"ok": False, "error": str(e) or type(e).__name__}
+    result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    result["checked_at"] = time.time()
+
+    previous = _state.get(name)
+    if previous is None or previous["ok"] != result["ok"]:
+        if result["ok"]:
+            logger.info("Dependency %s is reachable (%.0f ms)", name, result["latency_ms"])
+        else:
+            logger.warning("Dependency %s is unreachable: %s", name, result["error"])
+    _state[name] = result
+    return result
+
+
+async def refresh(timeout: float = None):
+    """Run all checks concurrently and store their results"""
+    timeout = timeout or get_settings().health_check_timeout_seconds
+    await asyncio.gather(*(run_check(name, check, timeout) for name, check in CHECKS.items()))
+
+
+def _shared_client():
+    """Redis client shared by all workers, or None when this worker is on its own"""
+    from services.invalidation_bus import get_bus, RedisBus
+    bus = get_bus()
+    return bus.client if isinstance(bus, RedisBus) else None
+
+
+def leads(client, owner: str, interval: float) -> bool:
+    """Take or renew the checker lease. The lease outlives one interval so a
+    crashed leader is replaced before its last results go stale."""
+    if client is None:
+        return True
+    ttl = max(1, math.ceil(interval * 1.5))
+    try:
+        if client.set(LEADER_KEY, owner, nx=True, ex=ttl):
+            return True
+        current = client.get(LEADER_KEY)
+        if current is not None and (current.decode() if isinstance(current, bytes) else current) == owner:
+            client.expire(LEADER_KEY, ttl)
+            return True
+        return False
+    except Exception as e:
+        logger.warning("Health check lease unavailable (%s), checking from this worker", e)
+        return True
+
+
+def publish_state(client):
+    if client is not None:
+        client.set(STATE_KEY, json.dumps(_state))
+
+
+def load_state(client):
+    raw = client.get(STATE_KEY)
+    if raw is not None:
+        _state.update(json.loads(raw))
+
+
+async def monitor_dependencies(interval: float = None):
+    """Background task refreshing dependency state until cancelled"""
+    interval = interval or get_settings().health_check_interval_seconds
+    client = await asyncio.to_thread(_shared_client)
+    owner = uuid.uuid4().hex
+    while True:
+        try:
+            if await asyncio.to_thread(leads, client, owner, interval):
+                await refresh()
+                await asyncio.to_thread(publish_state, client)
+            else:
+                await asyncio.to_thread(load_state, client)
+        except Exception as e:
+            logger.error("Dependency health refresh failed: %s", e)
+        await asyncio.sleep(interval)
+
+
+def readiness() -> tuple:
+    """(ready, report) from the last background check. Not ready until every check has
+    run once, or when the last results are older than three intervals (refresher stuck)."""
+    interval = get_settings().health_check_interval_seconds
+    now = time.time()
+    checks = {}
+    ready = True
+    for name in CHECKS:
+        result = _state.get(name)
+        if result is None:
+            checks[name] = {"ok": False, "error": "not checked yet"}
+            ready = False
+            continue
+        age = now - result["checked_at"]
+        stale = age > interval * 3
+        checks[name] = dict(result, age_seconds=round(age, 1), stale=stale)
+        ready = ready and result["ok"] and not stale
+    return ready, {"status": "ready" if ready else "not_ready", "checks": checks}
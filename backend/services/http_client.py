@@ -0,0 +1,66 @@
+"""
+Shared async HTTP client for outbound calls (Firebase Identity Toolkit etc.).
+
+One httpx.AsyncClient is created at app startup and reused, so requests share
+keep-alive connections instead of doing a TCP+TLS handshake per call. A
+semaphore bounds concurrent outbound requests.
+"""
+from config import get_settings
+import asyncio
+import httpx
+import logging
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_semaphore = None
+
+
+async def start_http_client():
+    """Create the shared client. Called from the app startup hook."""
+    global _client, _semaphore
+    if _client is not None:
+        return _client
+    settings = get_settings()
+    _client = httpx.AsyncClient(
+        timeout=httpx.Timeout(settings.http_timeout_seconds, connect=settings.http_connect_timeout_seconds),
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive,
+            keepalive_expiry=60.0,
+        ),
+    )
+    _semaphore = asyncio.Semaphore(settings.http_max_concurrency)
+    logger.info("HTTP client started (max %s connections)", settings.http_max_connections)
+    return _client
+
+
+async def close_http_client():
+    """Close pooled connections. Called from the app shutdown hook."""
+    global _client, _semaphore
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _semaphore = None
+
+
+async def get_http_client() -> httpx.AsyncClient:
+    # Lazily start when used outside the app lifecycle (scripts, first request racing startup)
+    if _client is None:
+        await start_http_client()
+    return _client
+
+
+async def request(method: str, url: str, **kwargs) -> httpx.Response:
+    """Send a request through the shared pool, bounded by the concurrency limit"""
+    client = await get_http_client()
+    async with _semaphore:
+        return await client.request(method, url, **kwargs)
+
+
+async def identity_toolkit_post(endpoint: str, payload: dict) -> httpx.Response:
+    """POST to a Firebase Identity Toolkit endpoint, e.g. 'accounts:signInWithPassword'.
+    The base URL is configurable so a local stand-in server can be used."""
+    settings = get_settings()
+    url = f"{settings.firebase_auth_base_url.rstrip('/')}/{endpoint}"
+    return await request("POST", url, params={"key": settings.firebase_web_api_key}, json=payload)
@@ -0,0 +1,141 @@
+"""
+Idempotency-Key support for retried writes.
+
+Clients on flaky connections resend the same request. When it carries an
+Idempotency-Key header, the first successful result is stored for
+IDEMPOTENCY_TTL_SECONDS and returned to every retry without redoing the work.
+A retry that arrives while the first attempt is still running waits for it.
+Reusing a key for a different request body is rejected with 409.
+
+Whenever Redis is configured (shared cache or invalidation bus), results and
+in-flight attempts live there, so a retry landing on another worker is still
+recognised; otherwise both are kept in this process.
+"""
+from config import get_settings
+from fastapi import HTTPException
+from services.cache_service import MemoryCache, RedisCache, get_cache, shared_redis_client
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+# An attempt's Redis claim expires after this, so a crashed worker doesn't block retries for good
+INFLIGHT_TTL_SECONDS = 120
+POLL_SECONDS = 0.1  # how often a retry checks on an attempt running in another worker
+
+_local_store = None
+
+
+def _store():
+    global _local_store
+    cache = get_cache()
+    if cache.backend == "redis":
+        return cache
+    client = shared_redis_client()
+    if client is not None:
+        return RedisCache(client, default_ttl=get_settings().idempotency_ttl_seconds, namespace="luit:")
+    if _local_store is None:
+        _local_store = MemoryCache(max_entries=10000, default_ttl=get_settings().idempotency_ttl_seconds)
+    return _local_store
+
+
+class LocalClaims:
+    """In-flight attempts of this process: a Future per key, resolved when the attempt ends"""
+
+    def __init__(self):
+        self._pending = {}
+
+    def claim(self, key: str):
+        if key in self._pending:
+            return None
+        self._pending[key] = asyncio.get_running_loop().create_future()
+        return self._pending[key]
+
+    async def wait(self, key: str):
+        pending = self._pending.get(key)
+        if pending is not None:
+            await asyncio.wait({pending})
+
+    def release(self, key: str, token):
+        self._pending.pop(key, None)
+        token.set_result(None)
+
+
+class RedisClaims:
+    """In-flight attempts of all workers: SET NX keys holding the claiming attempt's token"""
+
+    def __init__(self, client, prefix: str = "luit:inflight:"):
+        self.client = client
+        self.prefix = prefix
+
+    def claim(self, key: str):
+        token = uuid.uuid4().hex
+        if self.client.set(self.prefix + key, token, nx=True, ex=INFLIGHT_TTL_SECONDS):
+            return token
+        return None
+
+    async def wait(self, key: str):
+        await asyncio.sleep(POLL_SECONDS)
+
+    def release(self, key: str, token):
+        current = self.client.get(self.prefix + key)
+        # A claim that outlived its TTL may already belong to another attempt
+        if current is not None and (current.decode() if isinstance(current, bytes) else current) == token:
+            self.client.delete(self.prefix + key)
+
+
+_local_claims = LocalClaims()
+
+
+def _claims():
+    client = shared_redis_client()
+    return RedisClaims(client) if client is not None else _local_claims
+
+
+def fingerprint(payload) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+async def run_idempotent(scope: str, key: str, payload, operation, is_success=lambda result: True) -> tuple:
+    """Run operation() once per (scope, key). Returns (result, replayed).
+    Only results accepted by is_success are stored; failures can be retried with the same key."""
+    if not key:
+        return await operation(), False
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Idempotency-Key is too long")
+
+    store_key = f"idem:{scope}:{key}"
+    request_fingerprint = fingerprint(payload)
+    store = _store()
+    claims = _claims()
+
+    while True:
+        # Claim before reading: an attempt stores its result before releasing its claim,
+        # so a claim followed by a miss means nobody has finished this request yet
+        token = claims.claim(store_key)
+        stored = store.get(store_key)
+        if stored is not None:
+            if token is not None:
+                claims.release(store_key, token)
+            if stored["fingerprint"] != request_fingerprint:
+                raise HTTPException(status_code=409, detail="Idempotency-Key was already used for a different request")
+            logger.info("Replaying %s result for Idempotency-Key %s", scope, key)
+            return stored["result"], True
+        if token is not None:
+            break
+        # Same key in flight: wait for that attempt, then re-read its stored result.
+        # If it failed and stored nothing, the next claim succeeds and this retry does the work.
+        await claims.wait(store_key)
+
+    try:
+        result = await operation()
+        if is_success(result):
+            store.set(store_key, {"fingerprint": request_fingerprint, "result": result},
+                      ttl=get_settings().idempotency_ttl_seconds)
+        return result, False
+    finally:
+        claims.release(store_key, token)
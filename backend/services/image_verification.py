@@ -1,15 +1,16 @@
 # Image verification with basic CV (no heavy ML models)
-import cv2
-import numpy as np
-from PIL import Image
+# cv2/numpy/PIL are imported inside the functions so they only load when this verifier is used
 import io
 import base64
 import logging
+from services.metrics import timed, image_verification_duration
 
 logger = logging.getLogger(__name__)
 
 def decode_base64_image(image_base64: str):
     """Safely decode base64 image string with proper padding"""
+    import numpy as np
+    from PIL import Image
     try:
         # Handle data URI strings (e.g., "data:image/jpeg;base64,...")
         if ',' in image_base64:
@@ -25,11 +26,13 @@ def decode_base64_image(image_base64: str):
         image = Image.open(io.BytesIO(image_data))
         return np.array(image)
     except Exception as e:
-        logger.error(f"❌ Base64 decode error: {str(e)}")
+        logger.error("Base64 decode error: %s", e)
         raise ValueError(f"Failed to decode image: {str(e)}")
 
 def basic_garbage_detection(image_array):
     """Fallback garbage detection using basic CV techniques"""
+    import cv2
+    import numpy as np
     try:
         # Convert to grayscale
         gray = cv2.cvtColor(image_array, cv2.COLOR_RGB2GRAY)
@@ -45,7 +48,7 @@ def basic_garbage_detection(image_array):
         # 3. Texture complexity
         laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
         
-        logger.info(f"🔍 Image metrics - Edge density: {edge_density:.4f}, Color variance: {color_variance:.2f}, Laplacian: {laplacian_var:.2f}")
+        logger.debug("Image metrics - edge density: %.4f, color variance: %.2f, laplacian: %.2f", edge_density, color_variance, laplacian_var)
         
         # More strict heuristic: require multiple indicators
         # Most regular photos will have some complexity, so we need higher thresholds
@@ -61,13 +64,14 @@ def basic_garbage_detection(image_array):
         is_garbage = score >= 2
         confidence = min(0.85, score / 3.0 + 0.3)
         
-        logger.info(f"{'✅' if is_garbage else '❌'} Garbage detection: score={score}/3, is_garbage={is_garbage}, confidence={confidence:.2f}")
+        logger.debug("Garbage detection: score=%d/3, is_garbage=%s, confidence=%.2f", score, is_garbage, confidence)
         
         return is_garbage, confidence
     except Exception as e:
-        logger.error(f"❌ Detection error: {str(e)}")
+        logger.error("Detection error: %s", e)
         return False, 0.0  # Changed from True to False - reject by default on error
 
+@timed(image_verification_duration, "garbage")
 async def verify_garbage_image(image_base64: str) -> dict:
     """
     Verify if image contains garbage/waste using basic CV detection
@@ -90,7 +94,7 @@ async def verify_garbage_image(image_base64: str) -> dict:
         }
     
     except Exception as e:
-        logger.error(f"❌ Error verifying garbage image: {str(e)}")
+        logger.error("Error verifying garbage image: %s", e)
         return {
             'is_garbage': bool(False),
             'confidence': float(0),
@@ -98,22 +102,26 @@ async def verify_garbage_image(image_base64: str) -> dict:
             'message': f'Error processing image: {str(e)}'
         }
 
+@timed(image_verification_duration, "cleaning")
 async def verify_cleaning_image(before_image_base64: str, after_image_base64: str) -> dict:
     """
     Compare before and after images to verify cleaning
     """
+    import cv2
+    import numpy as np
+    from PIL import Image
     try:
-        logger.info("🔍 Verifying cleaning with image comparison...")
+        logger.debug("Verifying cleaning with image comparison")
         
         # Decode both images with proper padding
         before_array = decode_base64_image(before_image_base64)
         after_array = decode_base64_image(after_image_base64)
         
-        logger.info(f"📸 Before image shape: {before_array.shape}, After image shape: {after_array.shape}")
+        logger.debug("Before image shape: %s, after image shape: %s", before_array.shape, after_array.shape)
         
         # Resize after_array to match before_array dimensions if needed
         if before_array.shape != after_array.shape:
-            logger.info(f"📏 Resizing after image from {after_array.shape} to {before_array.shape}")
+            logger.debug("Resizing after image from %s to %s", after_array.shape, before_array.shape)
             after_image_pil = Image.fromarray(after_array)
             after_image_pil = after_image_pil.resize((before_array.shape[1], before_array.shape[0]))
             after_array = np.array(after_image_pil)
@@ -128,7 +136,7 @@ async def verify_cleaning_image(before_image_base64: str, after_image_base64: st
         similarity = 100 - (np.sum(diff) / (diff.shape[0] * diff.shape[1] * 255) * 100)
         difference_percent = 100 - similarity
         
-        logger.info(f"📊 Similarity: {similarity:.1f}%, Difference: {difference_percent:.1f}%")
+        logger.debug("Similarity: %.1f%%, difference: %.1f%%", similarity, difference_percent)
         
         # Consider cleaned if difference is >30% (significant change detected)
         is_cleaned = difference_percent > 30
@@ -140,17 +148,17 @@ async def verify_cleaning_image(before_image_base64: str, after_image_base64: st
         before_edge_density = np.sum(before_edges > 0) / before_edges.size
         after_edge_density = np.sum(after_edges > 0) / after_edges.size
         
-        logger.info(f"🧹 Before edge density: {before_edge_density:.3f}, After edge density: {after_edge_density:.3f}")
+        logger.debug("Before edge density: %.3f, after edge density: %.3f", before_edge_density, after_edge_density)
         
         # After image should have fewer edges (less clutter)
         clutter_reduced = after_edge_density < before_edge_density * 0.7
         
         if clutter_reduced:
-            logger.info("✅ Clutter reduced - area appears cleaned")
+            logger.debug("Clutter reduced - area appears cleaned")
             is_cleaned = True
         
         message = 'Area successfully cleaned!' if is_cleaned else 'Please ensure the area is properly cleaned.'
-        logger.info(f"Result: is_cleaned={is_cleaned}, message={message}")
+        logger.info("Cleaning verification: is_cleaned=%s, message=%s", is_cleaned, message)
         
         return {
             'is_cleaned': is_cleaned,
@@ -160,7 +168,7 @@ async def verify_cleaning_image(before_image_base64: str, after_image_base64: st
         }
     
     except Exception as e:
-        logger.error(f"❌ Error verifying cleaning: {str(e)}")
+        logger.error("Error verifying cleaning: %s", e)
         return {
             'is_cleaned': False,
             'similarity': 0,
@@ -1,12 +1,14 @@
 # Temporary mock for image verification to work around Python 3.14 opencv compatibility issues
 # This allows testing of registration endpoint without image processing dependencies
 import logging
+from services.metrics import timed, image_verification_duration
 
 logger = logging.getLogger(__name__)
 
+@timed(image_verification_duration, "garbage")
 async def verify_garbage_image(image_base64: str) -> dict:
     """Mock garbage verification - always returns True for testing"""
-    logger.info("🔧 Using mock image verification (Python 3.14 compatibility mode)")
+    logger.debug("Using mock image verification (Python 3.14 compatibility mode)")
     return {
         'is_garbage': True,
         'confidence': 0.85,
@@ -14,9 +16,10 @@ async def verify_garbage_image(image_base64: str) -> dict:
         'message': 'Mock verification - garbage detected (testing mode)'
     }
 
+@timed(image_verification_duration, "cleaning")
 async def verify_cleaning_image(before_image_base64: str, after_image_base64: str) -> dict:
     """Mock cleaning verification - always returns True for testing"""
-    logger.info("🔧 Using mock cleaning verification (Python 3.14 compatibility mode)")
+    logger.debug("Using mock cleaning verification (Python 3.14 compatibility mode)")
     return {
         'is_cleaned': True,
         'similarity': 50.0,
@@ -0,0 +1,102 @@
+"""
+In-process background job queue for report ingestion.
+
+Endpoints persist a pending record and enqueue a job; a fixed pool of asyncio
+worker tasks runs the slow part (verification, upload, duplicate check,
+Firestore write) and records the outcome on that record. Jobs are not durable:
+if the process stops before a job runs, its record stays pending and is
+reported as failed once it is older than INGEST_STALE_SECONDS.
+"""
+from config import get_settings
+from services import metrics
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the queue is at capacity; callers should ask the client to retry later"""
+
+
+class IngestionQueue:
+    """Bounded asyncio queue drained by a pool of worker tasks.
+    A job is a zero-argument coroutine function returning an outcome label."""
+
+    def __init__(self, workers: int = 2, maxsize: int = 100, job_timeout: float = 120.0):
+        self.workers = workers
+        self.maxsize = maxsize
+        self.job_timeout = job_timeout
+        self._queue = None
+        self._tasks = []
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def full(self) -> bool:
+        return self._queue is None or self._queue.full()
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        logger.info("Ingestion queue started (%d workers, capacity %d)", self.workers, self.maxsize)
+
+    async def stop(self, grace: float = 10.0):
+        """Let queued jobs finish for up to grace seconds, then cancel the workers"""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), grace)
+        except asyncio.TimeoutError:
+            logger.warning("Stopping ingestion queue with %d job(s) unprocessed", self.depth)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job_id: str, job):
+        if self._queue is None:
+            raise QueueFullError("Ingestion queue is not running")
+        try:
+            self._queue.put_nowait((job_id, job, time.perf_counter()))
+        except asyncio.QueueFull:
+            raise QueueFullError("Ingestion queue is full")
+        metrics.ingestion_queue_depth.set(self.depth)
+
+    async def _worker(self, n: int):
+        while True:
+            job_id, job, enqueued_at = await self._queue.get()
+            metrics.ingestion_queue_depth.set(self.depth)
+            started = time.perf_counter()
+            metrics.ingestion_queue_wait.observe(started - enqueued_at)
+            outcome = "error"
+            try:
+                outcome = await asyncio.wait_for(job(), self.job_timeout) or "done"
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                logger.error("Ingestion job %s timed out after %ss", job_id, self.job_timeout)
+            except Exception as e:
+                logger.error("Ingestion job %s failed: %s", job_id, e, exc_info=True)
+            finally:
+                metrics.ingestion_job_duration.observe(time.perf_counter() - started, outcome)
+                metrics.ingestion_jobs_total.inc(outcome)
+                self._queue.task_done()
+
+
+_queue = None
+
+
+def get_ingestion_queue() -> IngestionQueue:
+    global _queue
+    if _queue is None:
+        settings = get_settings()
+        _queue = IngestionQueue(
+            workers=settings.ingest_workers,
+            maxsize=settings.ingest_queue_size,
+            job_timeout=settings.ingest_job_timeout_seconds,
+        )
+    return _queue
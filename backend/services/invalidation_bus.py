@@ -0,0 +1,170 @@
+"""
+Cache invalidation across worker processes.
+
+Each worker keeps its own in-process caches (documents, query results,
+response bodies keyed by data version). When a worker writes, it applies the
+invalidation locally and publishes it; other workers apply it when the
+message arrives.
+
+Two buses are available, selected with INVALIDATION_BUS:
+- LocalBus ("local", default): single worker, or several simulated workers
+  sharing a hub in one process. Messages are delivered synchronously.
+- RedisBus ("redis"): Redis pub/sub on REDIS_URL. Data versions are allocated
+  with HINCRBY so every worker computes the same ETag for the same data.
+"""
+from config import get_settings
+import json
+import logging
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "luit:invalidate"
+VERSIONS_KEY = "luit:versions"
+
+
+class LocalBus:
+    """In-process bus. Buses sharing a hub list deliver to each other, which lets
+    tests and benchmarks stand in for several workers inside one process."""
+
+    name = "local"
+
+    def __init__(self, hub: list = None):
+        self.origin = uuid.uuid4().hex
+        self._handlers = []
+        self.hub = hub if hub is not None else []
+        self.hub.append(self)
+
+    def subscribe(self, handler):
+        self._handlers.append(handler)
+
+    def deliver(self, message: dict):
+        for handler in self._handlers:
+            try:
+                handler(message)
+            except Exception as e:
+                logger.warning("Invalidation handler failed: %s", e)
+
+    def publish(self, message: dict):
+        # The writer already applied the invalidation; only the other workers need it
+        message = dict(message, origin=self.origin)
+        for bus in self.hub:
+            if bus is not self:
+                bus.deliver(message)
+
+    def next_version(self, collection: str, current: int) -> int:
+        return current + 1
+
+    def load_versions(self) -> dict:
+        return {}
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class RedisBus(LocalBus):
+    """Redis pub/sub bus. A daemon thread delivers messages from other workers."""
+
+    name = "redis"
+
+    def __init__(self, client, channel: str = CHANNEL, versions_key: str = VERSIONS_KEY):
+        super().__init__(hub=[])
+        self.client = client
+        self.channel = channel
+        self.versions_key = versions_key
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs):
+        import redis  # optional dependency, only needed for INVALIDATION_BUS=redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def publish(self, message: dict):
+        message = dict(message, origin=self.origin)
+        try:
+            self.client.publish(self.channel, json.dumps(message))
+        except Exception as e:
+            # Other workers fall back to TTL expiry for this write
+            logger.warning("Could not publish invalidation for %s: %s", message.get("collection"), e)
+
+    def next_version(self, collection: str, current: int) -> int:
+        try:
+            return int(self.client.hincrby(self.versions_key, collection, 1))
+        except Exception as e:
+            logger.warning("Could not allocate shared data version for %s: %s", collection, e)
+            return current + 1
+
+    def load_versions(self) -> dict:
+        raw = self.client.hgetall(self.versions_key)
+        return {_text(k): int(v) for k, v in raw.items()}
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="invalidation-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _listen(self):
+        while not self._stop.is_set():
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                while not self._stop.is_set():
+                    raw = pubsub.get_message(timeout=1.0)
+                    if raw is None or raw.get("type") != "message":
+                        continue
+                    message = json.loads(_text(raw["data"]))
+                    if message.get("origin") == self.origin:
+                        continue
+                    self.deliver(message)
+                pubsub.close()
+            except Exception as e:
+                logger.warning("Invalidation bus disconnected (%s), reconnecting", e)
+                self._stop.wait(1.0)
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def _build_bus():
+    settings = get_settings()
+    if settings.invalidation_bus.lower() == "redis":
+        try:
+            return RedisBus.from_url(settings.redis_url)
+        except Exception as e:
+            logger.warning("Redis invalidation bus unavailable (%s), caches are per worker", e)
+    return LocalBus()
+
+
+def get_bus():
+    """Return the process-wide invalidation bus"""
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                _bus = _build_bus()
+    return _bus
+
+
+def set_bus(bus):
+    """Swap the active bus (e.g. a RedisBus wrapping a local stand-in client)"""
+    global _bus
+    with _bus_lock:
+        _bus = bus
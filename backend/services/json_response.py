@@ -0,0 +1,40 @@
+"""
+Fast JSON responses for large list endpoints.
+
+FastJSONResponse renders with orjson, falling back to the standard library
+when orjson isn't installed. Endpoints that return it directly also skip
+FastAPI's jsonable_encoder pass, which dominates serialization time for
+arrays of thousands of Firestore documents.
+"""
+from datetime import date, datetime
+from fastapi.responses import JSONResponse
+import json
+
+try:
+    import orjson
+except ImportError:  # optional: plain json is used instead
+    orjson = None
+
+
+def _default(value):
+    # Firestore timestamps are datetime subclasses, which orjson doesn't serialize natively
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    return str(value)
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; return it directly to bypass jsonable_encoder"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -1,8 +1,13 @@
-from math import radians, cos, sin, asin, sqrt
+from contextlib import asynccontextmanager
+from math import radians, cos, sin, asin, sqrt, floor
+import asyncio
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
+METERS_PER_DEGREE_LAT = 111320.0
+
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Calculate the great circle distance between two points 
@@ -24,21 +29,15 @@ async def check_duplicate_location(latitude: float, longitude: float, radius_met
     Returns: {is_duplicate: bool, nearby_reports: list, distance_to_closest: float}
     """
     try:
-        from services.firebase_service import get_firestore_client
-        from google.cloud.firestore import FieldFilter
-        
-        db = get_firestore_client()
+        from services.firebase_service import query_documents
         
-        # Get all ACTIVE reports (not cleaned)
-        active_reports = db.collection("reports").where(
-            filter=FieldFilter("status", "==", "active")
-        ).stream()
+        # Get all ACTIVE reports (not cleaned) - cached, invalidated on report writes
+        active_reports = query_documents("reports", "status", "==", "active", with_ids=True)
         
         nearby_reports = []
         min_distance = float('inf')
         
-        for report in active_reports:
-            data = report.to_dict()
+        for data in active_reports:
             report_lat = data.get("latitude")
             report_lon = data.get("longitude")
             image_url = data.get("imageUrl")
@@ -47,11 +46,11 @@ async def check_duplicate_location(latitude: float, longitude: float, radius_met
             if report_lat and report_lon and image_url:
                 distance = haversine_distance(latitude, longitude, report_lat, report_lon)
                 
-                logger.info(f"📍 Checking distance to report {report.id}: {distance:.1f}m")
+                logger.debug("Distance to report %s: %.1fm", data['id'], distance)
                 
                 if distance <= radius_meters:
                     nearby_reports.append({
-                        "id": report.id,
+                        "id": data["id"],
                         "distance": round(distance, 2),
                         "wasteType": data.get("wasteType"),
                         "latitude": report_lat,
@@ -62,10 +61,10 @@ async def check_duplicate_location(latitude: float, longitude: float, radius_met
         is_duplicate = len(nearby_reports) > 0
         
         if is_duplicate:
-            logger.warning(f"⚠️  Duplicate location detected! {len(nearby_reports)} active report(s) within {radius_meters}m")
-            logger.warning(f"📏 Closest report: {min_distance:.1f}m away")
+            logger.info("Duplicate location: %d active report(s) within %sm, closest %.1fm",
+                        len(nearby_reports), radius_meters, min_distance)
         else:
-            logger.info(f"✅ No active reports within {radius_meters}m")
+            logger.debug("No active reports within %sm", radius_meters)
         
         return {
             'is_duplicate': is_duplicate,
@@ -74,10 +73,84 @@ async def check_duplicate_location(latitude: float, longitude: float, radius_met
             'radius_checked': radius_meters
         }
     except Exception as e:
-        logger.error(f"❌ Error checking duplicate location: {str(e)}")
+        logger.error("Error checking duplicate location: %s", e)
         return {
             'is_duplicate': False,
             'nearby_reports': [],
             'distance_to_closest': None,
             'radius_checked': radius_meters
         }
+
+
+def geocells_for_radius(latitude: float, longitude: float, radius_meters: float = 100) -> list:
+    """Grid cells (about radius_meters on a side) overlapping the bounding box of the
+    radius around a point. Two points closer than radius_meters always share a cell,
+    because each point's own cell lies inside the other's box."""
+    cell_deg = radius_meters / METERS_PER_DEGREE_LAT
+    dlat = radius_meters / METERS_PER_DEGREE_LAT
+    dlon = radius_meters / (METERS_PER_DEGREE_LAT * max(cos(radians(latitude)), 1e-6))
+    lat_range = range(floor((latitude - dlat) / cell_deg), floor((latitude + dlat) / cell_deg) + 1)
+    lon_range = range(floor((longitude - dlon) / cell_deg), floor((longitude + dlon) / cell_deg) + 1)
+    return sorted((i, j) for i in lat_range for j in lon_range)
+
+
+_cell_locks = {}  # cell -> [asyncio.Lock, holders/waiters]
+
+# Redis cell leases outlast the longest locked section (verification and upload); a worker
+# that dies holding one blocks its cells for at most this long
+GEOCELL_LEASE_SECONDS = 120
+GEOCELL_POLL_SECONDS = 0.05
+
+
+@asynccontextmanager
+async def geocell_lock(latitude: float, longitude: float, radius_meters: float = 100):
+    """Serialize duplicate-check-then-insert for submissions near the same spot.
+    Cells are acquired in sorted order so overlapping requests can't deadlock.
+    Locks hold across all workers when Redis is configured, otherwise within this process."""
+    from services.cache_service import shared_redis_client
+    cells = geocells_for_radius(latitude, longitude, radius_meters)
+    client = shared_redis_client()
+    async with (_redis_cells(client, cells) if client is not None else _local_cells(cells)):
+        yield cells
+
+
+@asynccontextmanager
+async def _local_cells(cells: list):
+    entries = []
+    for cell in cells:
+        entry = _cell_locks.setdefault(cell, [asyncio.Lock(), 0])
+        entry[1] += 1
+        entries.append((cell, entry))
+    acquired = []
+    try:
+        for _, entry in entries:
+            await entry[0].acquire()
+            acquired.append(entry[0])
+        yield
+    finally:
+        for lock in reversed(acquired):
+            lock.release()
+        for cell, entry in entries:
+            entry[1] -= 1
+            if entry[1] == 0:
+                _cell_locks.pop(cell, None)
+
+
+@asynccontextmanager
+async def _redis_cells(client, cells: list):
+    token = uuid.uuid4().hex
+    acquired = []
+    try:
+        for i, j in cells:
+            key = f"luit:geocell:{i}:{j}"
+            while not client.set(key, token, nx=True, ex=GEOCELL_LEASE_SECONDS):
+                await asyncio.sleep(GEOCELL_POLL_SECONDS)
+            acquired.append(key)
+        yield
+    finally:
+        for key in reversed(acquired):
+            current = client.get(key)
+            # A lease that outlived its TTL may already belong to another request
+            if current is not None and (current.decode() if isinstance(current, bytes) else current) == token:
+                client.delete(key)
+
@@ -0,0 +1,217 @@
+"""
+Minimal Prometheus-style metrics (counters, gauges, histograms) rendered in
+the text exposition format at /metrics.
+
+Kept dependency-free and cheap enough to leave on in production: an update is
+a dict lookup on the label tuple plus a bisect, under a per-metric lock.
+"""
+from bisect import bisect_left
+import asyncio
+import functools
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    def time(self, *labels):
+        """Context manager observing the elapsed seconds of the block"""
+        return _Timer(self, labels)
+
+    def _samples(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            cumulative += state[len(self.buckets)]
+            le = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {state[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+def timed(histogram, *labels):
+    """Decorator observing the duration of an async function"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with histogram.time(*labels):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Application metrics
+http_requests_total = Counter(
+    "luit_http_requests_total", "HTTP requests by route, method and status", ("route", "method", "status"))
+http_request_duration = Histogram(
+    "luit_http_request_duration_seconds", "HTTP request latency by route", ("route", "method", "status"))
+firestore_reads_total = Counter(
+    "luit_firestore_reads_total", "Firestore document reads by endpoint", ("route",))
+firestore_writes_total = Counter(
+    "luit_firestore_writes_total", "Firestore document writes by endpoint", ("route",))
+firestore_reads_per_request = Histogram(
+    "luit_firestore_reads_per_request", "Firestore document reads per request", ("route",),
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000))
+firestore_budget_exceeded_total = Counter(
+    "luit_firestore_budget_exceeded_total", "Requests that exceeded their Firestore read budget", ("route",))
+cloudinary_duration = Histogram(
+    "luit_cloudinary_duration_seconds", "Cloudinary API call latency", ("operation", "outcome"))
+image_verification_duration = Histogram(
+    "luit_image_verification_duration_seconds", "Image verification duration", ("kind",))
+ingestion_queue_depth = Gauge(
+    "luit_ingestion_queue_depth", "Report submissions waiting for a background worker")
+ingestion_queue_wait = Histogram(
+    "luit_ingestion_queue_wait_seconds", "Time a submission waited in the queue before processing")
+ingestion_job_duration = Histogram(
+    "luit_ingestion_job_duration_seconds", "Background processing time per submission", ("outcome",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+ingestion_jobs_total = Counter(
+    "luit_ingestion_jobs_total", "Processed submissions by outcome", ("outcome",))
+event_loop_lag = Gauge(
+    "luit_event_loop_lag_seconds", "Most recent event loop scheduling delay")
+event_loop_lag_histogram = Histogram(
+    "luit_event_loop_lag_distribution_seconds", "Event loop scheduling delay",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+
+def route_label(scope) -> str:
+    """Route template (e.g. /reporting/reports/{reportId}) so IDs don't explode cardinality"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("route_path") or "unmatched"
+
+
+def record_request(scope, method: str, status: int, duration: float):
+    route = route_label(scope)
+    status = str(status)
+    http_requests_total.inc(route, method, status)
+    http_request_duration.observe(duration, route, method, status)
+
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """Background task: measures how late a sleep wakes up, i.e. time the loop spent blocked"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - started - interval)
+        event_loop_lag.set(lag)
+        event_loop_lag_histogram.observe(lag)
@@ -0,0 +1,215 @@
+"""
+Response caching with ETag / conditional GET for polled read-only routes.
+
+ETags are derived from the data version of the collections a route reads
+(see cache_service.data_version), so a poll whose If-None-Match still matches
+is answered with 304 without running the endpoint at all. Cached bodies are
+served for max_age seconds, and for a further stale_while_revalidate seconds
+while a single background task recomputes them.
+
+Endpoints that answer with fallback data (e.g. zeros after a Firestore error)
+call mark_uncacheable(): that response is sent without an ETag and never
+stored, so the next poll computes it again.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from services.cache_service import MemoryCache, data_version
+import asyncio
+import contextvars
+import hashlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Set for each computation of a cached route; a list so endpoints running in a
+# threadpool (with a copied context) still reach the same object
+_uncacheable = contextvars.ContextVar("response_uncacheable", default=None)
+
+
+def mark_uncacheable():
+    """Keep the response being computed out of the response cache"""
+    flag = _uncacheable.get()
+    if flag is not None:
+        flag.append(True)
+
+
+@dataclass(frozen=True)
+class CacheRule:
+    path: str                       # exact path, or prefix when it ends with "/"
+    collections: tuple              # Firestore collections the response depends on
+    max_age: int = 30
+    stale_while_revalidate: int = 60
+
+    def matches(self, path: str) -> bool:
+        if self.path.endswith("/"):
+            return path.startswith(self.path)
+        return path == self.path
+
+    @property
+    def cache_control(self) -> str:
+        return f"public, max-age={self.max_age}, stale-while-revalidate={self.stale_while_revalidate}"
+
+
+@dataclass
+class _CachedResponse:
+    etag: str
+    status: int
+    headers: list
+    body: bytes
+    created_at: float
+    cacheable: bool = True
+
+
+async def _empty_receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+class ResponseCacheMiddleware:
+    """ASGI middleware caching successful GET responses for the configured rules"""
+
+    def __init__(self, app, rules: list, max_entries: int = 256):
+        self.app = app
+        self.rules = rules
+        self.store = MemoryCache(max_entries=max_entries)
+        self._inflight = {}     # key -> Future for coalescing concurrent misses
+        self._refreshing = set()
+        self._tasks = set()     # strong refs so refresh tasks aren't garbage collected
+
+    def _match(self, path: str):
+        for rule in self.rules:
+            if rule.matches(path):
+                return rule
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+        rule = self._match(scope["path"])
+        if rule is None:
+            return await self.app(scope, receive, send)
+        # Cached responses never reach the router; label metrics with the (ID-free) path
+        scope["route_path"] = scope["path"]
+
+        query = scope.get("query_string", b"").decode("latin-1")
+        key = scope["path"] + "?" + "&".join(sorted(query.split("&")))
+        etag = self._etag(key, rule)
+
+        if_none_match = _header(scope, b"if-none-match")
+        if if_none_match and (etag in if_none_match or if_none_match.strip() == "*"):
+            return await self._send_not_modified(send, etag, rule)
+
+        entry = self.store.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            age = now - entry.created_at
+            if entry.etag == etag and age <= rule.max_age:
+                return await self._send_cached(send, entry, rule, "HIT")
+            if age <= rule.max_age + rule.stale_while_revalidate:
+                self._schedule_refresh(scope, key, etag, rule)
+                return await self._send_cached(send, entry, rule, "STALE")
+
+        entry = await self._compute_coalesced(scope, key, etag, rule)
+        await self._send_cached(send, entry, rule, "MISS")
+
+    def _etag(self, key: str, rule: CacheRule) -> str:
+        # The UTC date is mixed in so date-bucketed results roll over at midnight
+        material = f"{key}|{data_version(*rule.collections)}|{datetime.now(timezone.utc).date()}"
+        return 'W/"' + hashlib.sha1(material.encode()).hexdigest()[:20] + '"'
+
+    async def _compute(self, scope, key: str, etag: str, rule: CacheRule) -> _CachedResponse:
+        status = 500
+        headers = []
+        chunks = []
+
+        async def capture(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        inner_scope = dict(scope)
+        inner_scope["headers"] = [(k, v) for k, v in scope["headers"] if k != b"if-none-match"]
+        flag = []
+        token = _uncacheable.set(flag)
+        try:
+            await self.app(inner_scope, _empty_receive, capture)
+        finally:
+            _uncacheable.reset(token)
+        entry = _CachedResponse(etag, status, headers, b"".join(chunks), time.monotonic(),
+                                cacheable=status == 200 and not flag)
+        if entry.cacheable:
+            self.store.set(key, entry, ttl=rule.max_age + rule.stale_while_revalidate)
+        else:
+            logger.info("Not caching %s (status %d%s)", key, status, ", fallback body" if flag else "")
+        return entry
+
+    async def _compute_coalesced(self, scope, key: str, etag: str, rule: CacheRule) -> _CachedResponse:
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            entry = await self._compute(scope, key, etag, rule)
+            future.set_result(entry)
+            return entry
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            if not future.done():
+                future.cancel()
+            # Retrieve the exception so asyncio doesn't log it as unhandled when nobody waited
+            elif not future.cancelled():
+                future.exception()
+
+    def _schedule_refresh(self, scope, key: str, etag: str, rule: CacheRule):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                await self._compute(scope, key, etag, rule)
+            except Exception as e:
+                logger.warning("Background refresh of %s failed: %s", key, e)
+            finally:
+                self._refreshing.discard(key)
+
+        # Fresh context: the refresh must not count against the triggering request's Firestore usage
+        task = asyncio.get_running_loop().create_task(refresh(), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send_not_modified(self, send, etag: str, rule: CacheRule):
+        await send({
+            "type": "http.response.start",
+            "status": 304,
+            "headers": [
+                (b"etag", etag.encode()),
+                (b"cache-control", rule.cache_control.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _send_cached(self, send, entry: _CachedResponse, rule: CacheRule, state: str):
+        headers = [(k, v) for k, v in entry.headers if k not in (b"etag", b"cache-control")]
+        if entry.cacheable:
+            headers.append((b"etag", entry.etag.encode()))
+            headers.append((b"cache-control", rule.cache_control.encode()))
+            headers.append((b"x-cache", state.encode()))
+        elif entry.status == 200:
+            headers.append((b"cache-control", b"no-store"))
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": entry.body})
+
+
+def _header(scope, name: bytes):
+    for k, v in scope["headers"]:
+        if k == name:
+            return v.decode("latin-1")
+    return None
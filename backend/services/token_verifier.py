@@ -0,0 +1,206 @@
+"""
+Local verification of Firebase ID tokens.
+
+Tokens are RS256 JWTs signed with Google's securetoken keys. The public
+certificates are fetched once and cached for as long as Google's Cache-Control
+max-age allows, so verification needs no network call per request. Recently
+verified tokens are kept in a small LRU so repeat requests skip the RSA work.
+"""
+from collections import OrderedDict
+from config import get_settings
+from fastapi import Depends, HTTPException, Request
+import asyncio
+import base64
+import json
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+CLOCK_SKEW_SECONDS = 60
+
+
+class InvalidTokenError(ValueError):
+    """Raised when an ID token fails decoding, claim or signature checks"""
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+
+class PublicKeyCache:
+    """Google signing certificates keyed by kid, refreshed per Cache-Control max-age"""
+
+    def __init__(self, certs_url: str = GOOGLE_CERTS_URL, min_refresh_interval: float = 30.0):
+        self.certs_url = certs_url
+        self.min_refresh_interval = min_refresh_interval
+        self._keys = {}
+        self._expires_at = 0.0
+        self._last_fetch = 0.0
+        self._lock = asyncio.Lock()
+
+    def load_certificates(self, certs: dict, max_age: float):
+        """Install {kid: PEM certificate} mappings (used by refresh and by tests with local keys)"""
+        from cryptography import x509
+        keys = {}
+        for kid, pem in certs.items():
+            keys[kid] = x509.load_pem_x509_certificate(pem.encode()).public_key()
+        self._keys = keys
+        self._expires_at = time.monotonic() + max_age
+
+    async def refresh(self):
+        from services.http_client import request
+        response = await request("GET", self.certs_url)
+        response.raise_for_status()
+        match = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+        max_age = float(match.group(1)) if match else 3600.0
+        self.load_certificates(response.json(), max_age)
+        self._last_fetch = time.monotonic()
+        logger.info("Loaded %d Google signing keys (max-age %ss)", len(self._keys), int(max_age))
+
+    async def get_key(self, kid: str):
+        now = time.monotonic()
+        key = self._keys.get(kid)
+        if key is not None and now < self._expires_at:
+            return key
+        async with self._lock:
+            # Re-check after waiting: another request may have refreshed already.
+            # Unknown kids only force a refresh once per min_refresh_interval.
+            key = self._keys.get(kid)
+            stale = time.monotonic() >= self._expires_at
+            if stale or (key is None and time.monotonic() - self._last_fetch > self.min_refresh_interval):
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    # Keep verifying with the previous keys rather than failing every request
+                    logger.warning("Could not refresh Google signing keys: %s", e)
+                    self._last_fetch = time.monotonic()
+                key = self._keys.get(kid)
+        if key is None:
+            raise InvalidTokenError(f"Unknown signing key: {kid}")
+        return key
+
+
+class TokenVerifier:
+    """Verifies Firebase ID tokens for one project"""
+
+    def __init__(self, project_id: str, key_cache: PublicKeyCache = None, cache_size: int = 4096):
+        self.project_id = project_id
+        self.issuer = f"https://securetoken.google.com/{project_id}"
+        self.keys = key_cache or PublicKeyCache()
+        self.cache_size = cache_size
+        self._verified = OrderedDict()  # token -> claims
+        self._verified_lock = threading.Lock()
+
+    def _cached(self, token: str):
+        with self._verified_lock:
+            claims = self._verified.get(token)
+            if claims is None:
+                return None
+            if claims["exp"] + CLOCK_SKEW_SECONDS < time.time():
+                del self._verified[token]
+                return None
+            self._verified.move_to_end(token)
+            return claims
+
+    def _remember(self, token: str, claims: dict):
+        with self._verified_lock:
+            self._verified[token] = claims
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+
+    def _check_claims(self, claims: dict):
+        now = time.time()
+        if claims.get("aud") != self.project_id:
+            raise InvalidTokenError("Token has incorrect audience")
+        if claims.get("iss") != self.issuer:
+            raise InvalidTokenError("Token has incorrect issuer")
+        if not isinstance(claims.get("sub"), str) or not claims["sub"] or len(claims["sub"]) > 128:
+            raise InvalidTokenError("Token has invalid subject")
+        if claims.get("exp", 0) + CLOCK_SKEW_SECONDS < now:
+            raise InvalidTokenError("Token has expired")
+        iat = claims.get("iat")
+        if not isinstance(iat, (int, float)) or iat - CLOCK_SKEW_SECONDS > now:
+            raise InvalidTokenError("Token has invalid issued-at time")
+        if claims.get("auth_time", 0) - CLOCK_SKEW_SECONDS > now:
+            raise InvalidTokenError("Token auth_time is in the future")
+
+    async def verify(self, token: str) -> dict:
+        """Return the token's claims or raise InvalidTokenError"""
+        claims = self._cached(token)
+        if claims is not None:
+            return claims
+
+        try:
+            header_b64, payload_b64, signature_b64 = token.split(".")
+            header = json.loads(_b64decode(header_b64))
+            claims = json.loads(_b64decode(payload_b64))
+            signature = _b64decode(signature_b64)
+        except Exception:
+            raise InvalidTokenError("Malformed token")
+
+        if header.get("alg") != "RS256":
+            raise InvalidTokenError("Unexpected signing algorithm")
+        self._check_claims(claims)
+
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+
+        key = await self.keys.get_key(header.get("kid", ""))
+        try:
+            key.verify(signature, f"{header_b64}.{payload_b64}".encode(), padding.PKCS1v15(), hashes.SHA256())
+        except InvalidSignature:
+            raise InvalidTokenError("Invalid token signature")
+
+        claims["uid"] = claims["sub"]
+        self._remember(token, claims)
+        return claims
+
+
+_verifier = None
+
+
+def get_verifier() -> TokenVerifier:
+    global _verifier
+    if _verifier is None:
+        settings = get_settings()
+        _verifier = TokenVerifier(settings.firebase_project_id, PublicKeyCache(settings.firebase_certs_url))
+    return _verifier
+
+
+def set_verifier(verifier: TokenVerifier):
+    """Swap the verifier (e.g. one trusting locally generated test keys)"""
+    global _verifier
+    _verifier = verifier
+
+
+async def get_current_user(request: Request):
+    """Dependency: verified claims for the Bearer token, or None when no token was sent.
+    Invalid tokens are rejected only when ENFORCE_AUTH is on, so existing clients keep working."""
+    header = request.headers.get("authorization", "")
+    if not header.lower().startswith("bearer "):
+        return None
+    try:
+        return await get_verifier().verify(header[7:].strip())
+    except InvalidTokenError as e:
+        if get_settings().enforce_auth:
+            raise HTTPException(status_code=401, detail=f"Invalid token: {e}")
+        return None
+
+
+async def require_user(user=Depends(get_current_user)):
+    """Dependency for routes that need a signed-in user when ENFORCE_AUTH is on"""
+    if user is None and get_settings().enforce_auth:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    return user
+
+
+async def require_admin(user=Depends(get_current_user)):
+    """Dependency for admin routes: needs the 'admin' custom claim when ENFORCE_AUTH is on"""
+    if get_settings().enforce_auth and not (user and user.get("admin") is True):
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+    return user
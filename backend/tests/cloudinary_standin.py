@@ -0,0 +1,102 @@
+"""Local stand-in for Cloudinary's upload API (CLOUDINARY_API_BASE_URL, SDK upload_prefix)
+and delivery host (CLOUDINARY_DELIVERY_BASE_URL)"""
+from email import message_from_bytes
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+import hashlib
+import json
+import threading
+import time
+import uuid
+
+UNSIGNED_FIELDS = {"file", "api_key", "signature", "resource_type", "cloud_name"}
+
+
+def parse_form(content_type: str, body: bytes) -> dict:
+    if content_type.startswith("application/x-www-form-urlencoded"):
+        return dict(parse_qsl(body.decode()))
+    message = message_from_bytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body, policy=HTTP)
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        payload = part.get_payload(decode=True)
+        fields[name] = payload if part.get_filename() else payload.decode()
+    return fields
+
+
+class CloudinaryStandIn:
+    """Signed image upload and destroy, plus delivery of stored images under any transformation.
+    Checks signatures and timestamps like Cloudinary; records (method, path) per request."""
+
+    def __init__(self, cloud_name: str, api_key: str, api_secret: str, max_age: int = 3600):
+        self.cloud_name = cloud_name
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.max_age = max_age
+        self.assets = {}  # public_id -> bytes
+        self.requests = []
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                standin.requests.append(("POST", self.path))
+                fields = parse_form(self.headers["Content-Type"], body)
+                status, payload = standin.handle_api(self.path, fields)
+                self.reply(status, "application/json", json.dumps(payload).encode())
+
+            def do_GET(self):
+                standin.requests.append(("GET", self.path))
+                prefix = f"/{standin.cloud_name}/image/upload/"
+                public_id = self.path[len(prefix):].split("/", 1)[-1] if self.path.startswith(prefix) else None
+                if public_id in standin.assets:
+                    self.reply(200, "image/jpeg", standin.assets[public_id])
+                else:
+                    self.reply(404, "text/plain", b"not found")
+
+            def reply(self, status, content_type, data):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.origin = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def signature(self, fields: dict) -> str:
+        signed = "&".join(sorted(f"{k}={v}" for k, v in fields.items() if k not in UNSIGNED_FIELDS and v))
+        return hashlib.sha1((signed + self.api_secret).encode()).hexdigest()
+
+    def handle_api(self, path: str, fields: dict):
+        if fields.get("api_key") != self.api_key or fields.get("signature") != self.signature(fields):
+            return 401, {"error": {"message": "Invalid Signature"}}
+        if int(fields.get("timestamp", 0)) < time.time() - self.max_age:
+            return 400, {"error": {"message": "Stale request"}}
+        action = path.rsplit("/", 1)[-1]
+        if path != f"/v1_1/{self.cloud_name}/image/{action}":
+            return 404, {"error": {"message": "Not found"}}
+        if action == "upload":
+            name = fields.get("public_id") or uuid.uuid4().hex[:12]
+            public_id = "/".join(filter(None, [fields.get("folder"), name]))
+            self.assets[public_id] = fields["file"]
+            return 200, {"public_id": public_id, "secure_url": f"{self.origin}/{self.cloud_name}/image/upload/{public_id}"}
+        if action == "destroy":
+            found = self.assets.pop(fields.get("public_id"), None) is not None
+            return 200, {"result": "ok" if found else "not found"}
+        return 404, {"error": {"message": "Not found"}}
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Backend modules import each other top-level (from config import ...), as when run from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def memory_cache():
+    """Fresh process-wide MemoryCache and single-worker LocalBus for the test"""
+    from services import cache_service, invalidation_bus
+    cache = cache_service.MemoryCache(max_entries=100, default_ttl=60)
+    cache_service.set_cache(cache)
+    invalidation_bus.set_bus(invalidation_bus.LocalBus())
+    yield cache
+    cache_service.set_cache(None)
+    invalidation_bus.set_bus(None)
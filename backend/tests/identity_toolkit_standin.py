@@ -0,0 +1,66 @@
+"""Local stand-in for the Firebase Identity Toolkit REST API (FIREBASE_AUTH_BASE_URL)"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import base64
+import json
+import threading
+
+
+def fake_id_token(claims: dict) -> str:
+    encode = lambda part: base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b"=").decode()
+    return f"{encode({'alg': 'none'})}.{encode(claims)}.signature"
+
+
+class IdentityToolkitStandIn:
+    """accounts:signUp / accounts:signInWithPassword over HTTP/1.1 keep-alive.
+    Records (path, query, body, client port) per request; the port shows connection reuse."""
+
+    def __init__(self, users: dict = None):
+        self.users = users or {}  # email -> (password, localId, claims)
+        self.requests = []
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                path, _, query = self.path.partition("?")
+                standin.requests.append((path, query, body, self.client_address[1]))
+                status, payload = standin.handle(path.rsplit("/", 1)[-1], body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def handle(self, endpoint: str, body: dict):
+        user = self.users.get(body.get("email"))
+        if endpoint == "accounts:signInWithPassword":
+            if user is None:
+                return 400, {"error": {"code": 400, "message": "EMAIL_NOT_FOUND"}}
+            password, local_id, claims = user
+            if body.get("password") != password:
+                return 400, {"error": {"code": 400, "message": "INVALID_PASSWORD"}}
+            return 200, {"localId": local_id, "email": body["email"],
+                         "idToken": fake_id_token(dict(claims, sub=local_id))}
+        if endpoint == "accounts:signUp":
+            if user is not None:
+                return 400, {"error": {"code": 400, "message": "EMAIL_EXISTS"}}
+            return 200, {"localId": "new-user", "idToken": fake_id_token({"sub": "new-user"})}
+        return 404, {"error": {"code": 404, "message": "NOT_FOUND"}}
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
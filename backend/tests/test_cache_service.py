@@ -0,0 +1,210 @@
+from pathlib import Path
+from types import SimpleNamespace
+import itertools
+import os
+import runpy
+
+import fakeredis
+import pytest
+
+from services import cache_service
+from services.cache_service import MemoryCache, RedisCache, document_key, query_prefix
+from services.invalidation_bus import VERSIONS_KEY, LocalBus, RedisBus, set_bus
+
+BACKEND = Path(__file__).resolve().parent.parent
+_collections = itertools.count()
+
+
+def fresh_collection() -> str:
+    # Data versions are process-wide; a new name per test keeps them independent
+    return f"test_collection_{next(_collections)}"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a is now the most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.info()["evictions"] == 1
+
+
+def test_memory_cache_expires_entries_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_service.time, "monotonic", clock)
+    cache = MemoryCache(default_ttl=10)
+    cache.set("default", "x")
+    cache.set("short", "y", ttl=1)
+    clock.now += 5
+    assert cache.get("short") is None
+    assert cache.get("default") == "x"
+    clock.now += 6
+    assert cache.get("default", "missing") == "missing"
+    assert cache.info()["size"] == 0
+
+
+def test_memory_cache_copies_on_write_and_read():
+    cache = MemoryCache()
+    doc = {"status": "open"}
+    cache.set("doc", doc)
+    doc["status"] = "changed before read"
+    first = cache.get("doc")
+    first["id"] = "added by caller"
+    assert cache.get("doc") == {"status": "open"}
+
+
+def test_memory_cache_delete_prefix_and_stats():
+    cache = MemoryCache()
+    for key in ("doc:reports/1", "doc:reports/2", "doc:users/1"):
+        cache.set(key, key)
+    cache.delete_prefix("doc:reports/")
+    assert cache.get("doc:reports/1") is None
+    assert cache.get("doc:users/1") == "doc:users/1"
+    stats = cache.info()
+    assert stats["invalidations"] == 2
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_redis_cache_with_fake_client():
+    cache = RedisCache(fakeredis.FakeRedis(), default_ttl=30)
+    cache.set("doc:reports/1", {"a": 1})
+    cache.set("query:reports:open", [1, 2])
+    cache.set("doc:users/1", {"b": 2})
+    assert cache.get("doc:reports/1") == {"a": 1}
+    cache.delete_prefix("doc:reports/")
+    assert cache.get("doc:reports/1") is None
+    assert cache.get("query:reports:open") == [1, 2]
+    assert cache.client.ttl("luit:cache:doc:users/1") == 30
+
+
+def test_cached_loads_once_and_skips_none(memory_cache):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {"id": "r1"}
+
+    assert cache_service.cached("k", loader) == {"id": "r1"}
+    assert cache_service.cached("k", loader) == {"id": "r1"}
+    assert len(calls) == 1
+    cache_service.cached("missing", lambda: calls.append(1))
+    cache_service.cached("missing", lambda: calls.append(1))
+    assert len(calls) == 3  # None results are looked up again
+
+
+def test_invalidate_document_bumps_version_and_publishes(memory_cache):
+    hub = []
+    bus = LocalBus(hub)
+    other_worker = LocalBus(hub)
+    received = []
+    other_worker.subscribe(received.append)
+    set_bus(bus)
+
+    collection = fresh_collection()
+    memory_cache.set(document_key(collection, "1"), {"a": 1})
+    memory_cache.set(query_prefix(collection) + "open", [1])
+    before = cache_service.data_version(collection)
+    cache_service.invalidate_document(collection, "1")
+
+    assert memory_cache.get(document_key(collection, "1")) is None
+    assert memory_cache.get(query_prefix(collection) + "open") is None
+    assert cache_service.data_version(collection) != before
+    assert len(received) == 1
+    assert received[0]["collection"] == collection
+    assert received[0]["version"] == 1
+    assert received[0]["keys"] == [document_key(collection, "1")]
+
+
+def test_invalidation_from_another_worker_is_applied(memory_cache):
+    collection = fresh_collection()
+    memory_cache.set(document_key(collection, "7"), {"a": 1})
+    memory_cache.set(document_key(collection, "8"), {"b": 2})
+    before = cache_service.data_version(collection)
+
+    cache_service.apply_invalidation({"collection": collection, "version": 5,
+                                      "keys": [document_key(collection, "7")], "prefixes": []})
+    assert memory_cache.get(document_key(collection, "7")) is None
+    assert memory_cache.get(document_key(collection, "8")) == {"b": 2}
+    assert cache_service.data_version(collection) == before[:-1] + "5"
+
+    # An older version arriving late never moves the version back
+    cache_service.apply_invalidation({"collection": collection, "version": 3, "keys": [], "prefixes": []})
+    assert cache_service.data_version(collection).endswith(".5")
+
+
+def test_invalidate_collection_only_drops_that_collection(memory_cache):
+    collection, other = fresh_collection(), fresh_collection()
+    memory_cache.set(document_key(collection, "1"), 1)
+    memory_cache.set(query_prefix(collection) + "all", [1])
+    memory_cache.set(document_key(other, "1"), 2)
+    memory_cache.set(query_prefix(other) + "all", [2])
+    cache_service.invalidate_collection(collection)
+    assert memory_cache.get(document_key(collection, "1")) is None
+    assert memory_cache.get(query_prefix(collection) + "all") is None
+    assert memory_cache.get(document_key(other, "1")) == 2
+    assert memory_cache.get(query_prefix(other) + "all") == [2]
+
+
+def test_redis_bus_allocates_shared_versions():
+    server = fakeredis.FakeServer()
+    worker_a = RedisBus(fakeredis.FakeRedis(server=server))
+    worker_b = RedisBus(fakeredis.FakeRedis(server=server))
+    collection = fresh_collection()
+    assert worker_a.next_version(collection, 0) == 1
+    # Worker b never saw the first write locally but still gets the next shared version
+    assert worker_b.next_version(collection, 0) == 2
+    assert worker_a.load_versions() == {collection: 2}
+
+
+@pytest.mark.parametrize("shared", [True, False])
+def test_shared_cache_is_not_invalidated_twice(memory_cache, shared):
+    collection = fresh_collection()
+    memory_cache.shared = shared  # a shared (Redis) cache was already invalidated by the writer
+    memory_cache.set(document_key(collection, "1"), 1)
+    cache_service.apply_invalidation({"collection": collection, "version": 1,
+                                      "keys": [document_key(collection, "1")], "prefixes": []})
+    assert (memory_cache.get(document_key(collection, "1")) == 1) is shared
+
+
+def test_boot_token_is_shared_only_with_redis_versions(monkeypatch, memory_cache):
+    monkeypatch.setattr(cache_service, "_BOOT_TOKEN", "shared")
+    cache_service.start_invalidation_bus()
+    # Local versions restart from 0, so a token from the master must not be reused
+    assert cache_service.data_version("x").split(".")[0] == cache_service._PROCESS_TOKEN
+
+    collection = fresh_collection()
+    client = fakeredis.FakeRedis()
+    client.hset(VERSIONS_KEY, collection, 4)
+    bus = RedisBus(client)
+    monkeypatch.setattr(bus, "start", lambda: None)
+    set_bus(bus)
+    monkeypatch.setattr(cache_service, "_BOOT_TOKEN", "shared")
+    cache_service.start_invalidation_bus()
+    assert cache_service.data_version(collection) == "shared.4"
+
+
+@pytest.mark.parametrize("bus, shares_token", [("local", False), ("redis", True)])
+def test_gunicorn_shares_boot_token_only_on_redis_bus(monkeypatch, bus, shares_token):
+    monkeypatch.setenv("INVALIDATION_BUS", bus)
+    monkeypatch.setenv("WEB_CONCURRENCY", "2")
+    monkeypatch.delenv("LUIT_BOOT_TOKEN", raising=False)
+    config = runpy.run_path(str(BACKEND / "gunicorn.conf.py"))
+    assert ("LUIT_BOOT_TOKEN" in os.environ) is shares_token
+    assert config["workers"] == 2
+    server = SimpleNamespace(log=SimpleNamespace(info=lambda *args: None))
+    if shares_token:
+        config["on_starting"](server)
+    else:
+        with pytest.raises(SystemExit, match="INVALIDATION_BUS=redis"):
+            config["on_starting"](server)
@@ -0,0 +1,178 @@
+import asyncio
+import io
+
+import httpx
+import pytest
+
+from cloudinary_standin import CloudinaryStandIn
+from config import get_settings
+from routes import reporting
+from services import cloudinary_service, http_client
+
+
+def jpeg_bytes() -> bytes:
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), (120, 90, 40)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def cloudinary(monkeypatch):
+    import cloudinary as sdk
+    with CloudinaryStandIn("demo", "key-123", "secret-456") as standin:
+        monkeypatch.setenv("CLOUDINARY_CLOUD_NAME", "demo")
+        monkeypatch.setenv("CLOUDINARY_API_KEY", "key-123")
+        monkeypatch.setenv("CLOUDINARY_API_SECRET", "secret-456")
+        monkeypatch.setenv("CLOUDINARY_API_BASE_URL", standin.origin + "/v1_1")
+        monkeypatch.setenv("CLOUDINARY_DELIVERY_BASE_URL", standin.origin)
+        get_settings.cache_clear()
+        monkeypatch.setattr(cloudinary_service, "_configured", False)
+        cloudinary_service.ensure_cloudinary()
+        sdk.config(upload_prefix=standin.origin)
+        yield standin
+        sdk.config(upload_prefix=None)
+    get_settings.cache_clear()
+
+
+def client_upload(params: dict, **overrides) -> httpx.Response:
+    """What the browser does with /upload-signature: post the file and the signed fields"""
+    fields = {k: v for k, v in params.items() if k not in ("uploadUrl", "apiKey", "expiresAt")}
+    fields.update(api_key=params["apiKey"], **overrides)
+    return httpx.post(params["uploadUrl"], data=fields, files={"file": ("photo.jpg", jpeg_bytes(), "image/jpeg")})
+
+
+def test_signed_params_upload_into_reports_folder(cloudinary):
+    params = cloudinary_service.signed_upload_params()
+    assert params["expiresAt"] == params["timestamp"] + cloudinary_service.SIGNATURE_LIFETIME_SECONDS
+
+    response = client_upload(params)
+    assert response.status_code == 200
+    public_id = response.json()["public_id"]
+    assert public_id == f"{cloudinary_service.REPORT_UPLOAD_FOLDER}/{params['public_id']}"
+    assert cloudinary_service.issued_upload_id(public_id)
+    assert public_id in cloudinary.assets
+
+
+@pytest.mark.parametrize("overrides", [
+    {"folder": "luit/profiles"},          # signature covers the folder
+    {"public_id": "existing_report"},     # the issued public_id
+    {"transformation": "w_8000,h_8000"},  # and the size cap
+    {"signature": "0" * 40},
+])
+def test_tampered_upload_is_rejected(cloudinary, overrides):
+    response = client_upload(cloudinary_service.signed_upload_params(), **overrides)
+    assert response.status_code == 401
+    assert not cloudinary.assets
+
+
+def test_expired_signature_is_rejected(cloudinary, monkeypatch):
+    now = cloudinary_service.time.time()
+    monkeypatch.setattr(cloudinary_service.time, "time", lambda: now - cloudinary.max_age - 60)
+    params = cloudinary_service.signed_upload_params()
+    monkeypatch.undo()
+    assert client_upload(params).status_code == 400
+
+
+@pytest.fixture
+def reports(cloudinary, monkeypatch):
+    """Report creation with Firestore replaced: records inserts, duplicate state settable"""
+    state = {"duplicate": False, "added": []}
+
+    def query_documents(collection, field, operator, value, use_cache=True, with_ids=False):
+        return [data for name, data in state["added"] if name == collection and data.get(field) == value]
+
+    async def check_duplicate_location(latitude, longitude):
+        return {"is_duplicate": state["duplicate"], "nearby_reports": []}
+
+    def add_document(collection, data):
+        state["added"].append((collection, data))
+        return f"report-{len(state['added'])}"
+
+    monkeypatch.setattr(reporting, "check_duplicate_location", check_duplicate_location)
+    monkeypatch.setattr(reporting, "add_document", add_document)
+    monkeypatch.setattr(reporting, "query_documents", query_documents)
+    return state
+
+
+def create_report(public_id: str) -> dict:
+    request = reporting.ReportRequest(latitude=26.14, longitude=91.73, wasteType="plastic",
+                                      imagePublicId=public_id, userId="uid-asha")
+
+    async def run():
+        try:
+            return await reporting._create_report(request)
+        finally:
+            await http_client.close_http_client()
+
+    return asyncio.run(run())
+
+
+def uploaded_public_id() -> str:
+    return client_upload(cloudinary_service.signed_upload_params()).json()["public_id"]
+
+
+def test_direct_upload_report_verifies_thumbnail(cloudinary, reports):
+    public_id = uploaded_public_id()
+    result = create_report(public_id)
+
+    assert result["success"] is True
+    assert result["imageUrl"] == cloudinary_service.delivery_url(public_id)
+    (collection, data), = reports["added"]
+    assert data["imagePublicId"] == public_id
+    thumbnail = f"/demo/image/upload/{cloudinary_service.THUMBNAIL_TRANSFORMATION}/{public_id}"
+    assert ("GET", thumbnail) in cloudinary.requests
+    assert public_id in cloudinary.assets
+
+
+def test_duplicate_location_deletes_direct_upload(cloudinary, reports):
+    reports["duplicate"] = True
+    public_id = uploaded_public_id()
+    result = create_report(public_id)
+
+    assert result == {"success": False, "message": "This location already reported"}
+    assert public_id not in cloudinary.assets
+    assert not reports["added"]
+
+
+def assert_kept_and_not_deleted(cloudinary, public_id):
+    assert public_id in cloudinary.assets
+    assert not any(path.endswith("/destroy") for _, path in cloudinary.requests)
+
+
+@pytest.mark.parametrize("public_id", [
+    "luit/profiles/avatar",                  # outside the reports folder
+    "luit/reports/3f9a1c2b7d4e",             # in the folder, but not an id this server issued
+    "luit/reports/3f9a1c2b7d4e_0123456789abcdef",
+])
+@pytest.mark.parametrize("duplicate", [False, True])
+def test_public_id_not_issued_is_rejected_and_kept(cloudinary, reports, duplicate, public_id):
+    reports["duplicate"] = duplicate
+    cloudinary.assets[public_id] = jpeg_bytes()
+
+    with pytest.raises(ValueError, match="issued upload signature"):
+        create_report(public_id)
+    assert_kept_and_not_deleted(cloudinary, public_id)
+
+
+@pytest.mark.parametrize("duplicate", [False, True])
+def test_public_id_of_an_existing_report_is_rejected_and_kept(cloudinary, reports, duplicate):
+    public_id = uploaded_public_id()
+    assert create_report(public_id)["success"] is True
+
+    # Someone replays the id from the first report's image URL
+    reports["duplicate"] = duplicate
+    with pytest.raises(ValueError, match="already belongs to a report"):
+        create_report(public_id)
+    assert_kept_and_not_deleted(cloudinary, public_id)
+    assert len(reports["added"]) == 1
+
+
+def test_issued_ids_are_unique_and_checked_against_the_folder(cloudinary):
+    first = cloudinary_service.signed_upload_params()
+    second = cloudinary_service.signed_upload_params()
+    assert first["public_id"] != second["public_id"]
+    issued = f"{cloudinary_service.REPORT_UPLOAD_FOLDER}/{first['public_id']}"
+    assert cloudinary_service.issued_upload_id(issued)
+    assert not cloudinary_service.issued_upload_id(issued, folder="luit/profiles")
+    assert not cloudinary_service.issued_upload_id(f"luit/profiles/{first['public_id']}", folder="luit/profiles")
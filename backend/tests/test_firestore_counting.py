@@ -0,0 +1,105 @@
+import pytest
+
+from services import firebase_service
+from services.firebase_service import FirestoreBudgetExceeded, _CountingProxy, begin_request_usage
+
+
+class DocumentReference:
+    def __init__(self, path):
+        self.path = path
+
+
+class Snapshot:
+    def __init__(self, ref):
+        self.reference = ref
+
+
+class Query:
+    def __init__(self, client):
+        self.client = client
+
+    def start_after(self, document_fields):
+        self.client.received.append(("start_after", document_fields))
+        return self
+
+    def stream(self):
+        return iter([Snapshot(None), Snapshot(None)])
+
+
+class Client:
+    """Stands in for google.cloud.firestore.Client: rejects anything that isn't its own type"""
+
+    def __init__(self):
+        self.received = []
+
+    def document(self, path):
+        return DocumentReference(path)
+
+    def collection(self, name):
+        return Query(self)
+
+    def get_all(self, references, field_paths=None):
+        references = list(references)
+        assert all(type(ref) is DocumentReference for ref in references)
+        self.received.append(("get_all", references))
+        return iter([Snapshot(ref) for ref in references])
+
+    def batch_write(self, updates, *, ref=None):
+        assert type(ref) is DocumentReference
+        assert all(type(r) is DocumentReference for r in updates)
+        self.received.append(("batch_write", ref))
+        return []
+
+
+@pytest.fixture
+def client():
+    return Client()
+
+
+@pytest.fixture
+def db(client):
+    return _CountingProxy(client)
+
+
+@pytest.fixture
+def usage():
+    """Counted usage for the test as if it were one request; reset afterwards"""
+    token = firebase_service._request_usage.set(None)
+    yield begin_request_usage()
+    firebase_service._request_usage.reset(token)
+
+
+def test_proxies_in_lists_reach_the_sdk_unwrapped(db, usage):
+    refs = [db.document("reports/1"), db.document("reports/2")]
+    assert all(isinstance(ref, _CountingProxy) for ref in refs)
+    snapshots = list(db.get_all(refs))
+    assert [s.reference.path for s in snapshots] == ["reports/1", "reports/2"]
+    assert usage.reads == 2
+
+
+def test_generator_of_proxies_is_unwrapped(db):
+    snapshots = list(db.get_all(db.document(f"reports/{i}") for i in range(3)))
+    assert len(snapshots) == 3
+
+
+def test_keyword_and_nested_proxies_are_unwrapped(db, client):
+    ref = db.document("reports/1")
+    db.batch_write((ref,), ref=ref)
+    query = db.collection("reports").start_after({"ref": ref, "createdAt": 5})
+    query.stream()
+    (_, batch_ref), (_, cursor) = client.received
+    assert type(batch_ref) is DocumentReference
+    assert type(cursor["ref"]) is DocumentReference and cursor["createdAt"] == 5
+
+
+def test_stream_counts_reads_and_budget_rejects(db, usage, monkeypatch):
+    monkeypatch.setenv("FIRESTORE_BUDGET_MODE", "reject")
+    firebase_service.get_settings.cache_clear()
+    try:
+        usage.budget = 3
+        assert len(list(db.collection("reports").stream())) == 2
+        with pytest.raises(FirestoreBudgetExceeded):
+            list(db.collection("reports").stream())
+        assert usage.exceeded
+    finally:
+        firebase_service.get_settings.cache_clear()
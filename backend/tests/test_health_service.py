@@ -0,0 +1,61 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from services import health_service
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    health_service._state.clear()
+    yield
+    health_service._state.clear()
+
+
+@pytest.fixture
+def checks(monkeypatch):
+    calls = []
+    monkeypatch.setattr(health_service, "CHECKS", {"firestore": lambda: calls.append("firestore")})
+    return calls
+
+
+def test_single_worker_always_checks():
+    assert health_service.leads(None, "a", 60)
+
+
+def test_one_worker_holds_the_lease():
+    client = fakeredis.FakeRedis()
+    assert health_service.leads(client, "a", 60)
+    assert not health_service.leads(client, "b", 60)
+    # The holder renews its own lease
+    assert health_service.leads(client, "a", 60)
+    assert client.ttl(health_service.LEADER_KEY) == 90
+
+
+def test_lease_passes_on_when_the_leader_stops():
+    client = fakeredis.FakeRedis()
+    assert health_service.leads(client, "a", 60)
+    client.delete(health_service.LEADER_KEY)  # expired
+    assert health_service.leads(client, "b", 60)
+    assert not health_service.leads(client, "a", 60)
+
+
+def test_followers_copy_the_leaders_results(checks):
+    client = fakeredis.FakeRedis()
+    asyncio.run(health_service.refresh(timeout=1))
+    health_service.publish_state(client)
+    published = dict(health_service._state)
+
+    health_service._state.clear()
+    health_service.load_state(client)
+    assert health_service._state == published
+    assert health_service.readiness()[0]
+    assert checks == ["firestore"]
+
+
+def test_follower_without_results_is_not_ready(checks):
+    health_service.load_state(fakeredis.FakeRedis())
+    ready, report = health_service.readiness()
+    assert not ready
+    assert report["checks"]["firestore"]["error"] == "not checked yet"
@@ -0,0 +1,140 @@
+import asyncio
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+
+from services import idempotency
+from services.idempotency import run_idempotent
+from services.invalidation_bus import RedisBus, set_bus
+
+
+@pytest.fixture(params=["local", "redis"])
+def shared(request, memory_cache, monkeypatch):
+    """Idempotency state in this process, or in Redis (a fake one) through the invalidation bus"""
+    monkeypatch.setattr(idempotency, "_local_store", None)
+    monkeypatch.setattr(idempotency, "_local_claims", idempotency.LocalClaims())
+    if request.param == "local":
+        return None
+    client = fakeredis.FakeRedis()
+    set_bus(RedisBus(client))
+    return client
+
+
+def counting(result):
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        return result
+    return operation, calls
+
+
+def test_retry_replays_the_first_result(shared):
+    operation, calls = counting({"success": True, "reportId": "r1"})
+
+    async def scenario():
+        first = await run_idempotent("report", "key-1", {"a": 1}, operation)
+        retry = await run_idempotent("report", "key-1", {"a": 1}, operation)
+        other_key = await run_idempotent("report", "key-2", {"a": 1}, operation)
+        return first, retry, other_key
+
+    first, retry, other_key = asyncio.run(scenario())
+    assert first == ({"success": True, "reportId": "r1"}, False)
+    assert retry == ({"success": True, "reportId": "r1"}, True)
+    assert other_key[1] is False
+    assert len(calls) == 2
+
+
+def test_key_reused_for_another_payload_is_rejected(shared):
+    operation, calls = counting({"success": True})
+
+    async def scenario():
+        await run_idempotent("report", "key-1", {"a": 1}, operation)
+        await run_idempotent("report", "key-1", {"a": 2}, operation)
+
+    with pytest.raises(HTTPException) as conflict:
+        asyncio.run(scenario())
+    assert conflict.value.status_code == 409
+    assert len(calls) == 1
+
+
+def test_concurrent_retry_waits_for_the_attempt_in_flight(shared):
+    calls = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow_operation():
+            calls.append(1)
+            await release.wait()
+            return {"success": True}
+
+        first = asyncio.create_task(run_idempotent("report", "key-1", {"a": 1}, slow_operation))
+        await asyncio.sleep(0.05)
+        retry = asyncio.create_task(run_idempotent("report", "key-1", {"a": 1}, slow_operation))
+        await asyncio.sleep(0.2)
+        assert not retry.done()
+        release.set()
+        return await first, await retry
+
+    first, retry = asyncio.run(scenario())
+    assert first == ({"success": True}, False)
+    assert retry == ({"success": True}, True)
+    assert len(calls) == 1
+
+
+def test_failures_are_not_stored(shared):
+    outcomes = [RuntimeError("upload failed"), {"success": False}, {"success": True}]
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        outcome = outcomes[len(calls) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await run_idempotent("report", "key-1", {"a": 1}, operation)
+        attempts = []
+        for _ in range(3):
+            attempts.append(await run_idempotent("report", "key-1", {"a": 1}, operation,
+                                                 is_success=lambda result: result["success"]))
+        return attempts
+
+    assert asyncio.run(scenario()) == [({"success": False}, False), ({"success": True}, False),
+                                       ({"success": True}, True)]
+    assert len(calls) == 3
+
+
+def test_retry_on_another_worker_waits_for_its_attempt(monkeypatch, memory_cache):
+    # Two workers share Redis; the first attempt is running in the other one
+    monkeypatch.setattr(idempotency, "POLL_SECONDS", 0.01)
+    client = fakeredis.FakeRedis()
+    set_bus(RedisBus(client))
+    store_key = "idem:report:key-1"
+    other_worker = idempotency.RedisClaims(client)
+    token = other_worker.claim(store_key)
+    operation, calls = counting({"success": True, "from": "this worker"})
+
+    async def scenario():
+        retry = asyncio.create_task(run_idempotent("report", "key-1", {"a": 1}, operation))
+        await asyncio.sleep(0.1)
+        assert not retry.done()
+        idempotency._store().set(store_key, {"fingerprint": idempotency.fingerprint({"a": 1}),
+                                             "result": {"success": True, "from": "other worker"}})
+        other_worker.release(store_key, token)
+        return await retry
+
+    assert asyncio.run(scenario()) == ({"success": True, "from": "other worker"}, True)
+    assert calls == []
+    assert not client.keys("luit:inflight:*")
+
+
+def test_without_a_key_the_operation_always_runs(shared):
+    operation, calls = counting({"success": True})
+    asyncio.run(run_idempotent("report", None, {"a": 1}, operation))
+    asyncio.run(run_idempotent("report", None, {"a": 1}, operation))
+    assert len(calls) == 2
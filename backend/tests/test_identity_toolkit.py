@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from config import get_settings
+from identity_toolkit_standin import IdentityToolkitStandIn
+from routes import auth
+from services import http_client
+
+
+@pytest.fixture
+def identity_toolkit(monkeypatch):
+    users = {"asha@example.com": ("correct-horse", "uid-asha", {"userType": "individual"})}
+    with IdentityToolkitStandIn(users) as standin:
+        monkeypatch.setenv("FIREBASE_AUTH_BASE_URL", standin.url)
+        monkeypatch.setenv("FIREBASE_WEB_API_KEY", "test-key")
+        get_settings.cache_clear()
+        yield standin
+    get_settings.cache_clear()
+
+
+def test_calls_share_one_pooled_connection(identity_toolkit):
+    async def sign_in_twice():
+        try:
+            first = await http_client.identity_toolkit_post(
+                "accounts:signInWithPassword", {"email": "asha@example.com", "password": "correct-horse"})
+            client = await http_client.get_http_client()
+            second = await http_client.identity_toolkit_post(
+                "accounts:signInWithPassword", {"email": "asha@example.com", "password": "wrong"})
+            assert await http_client.get_http_client() is client
+            return first, second
+        finally:
+            await http_client.close_http_client()
+
+    first, second = asyncio.run(sign_in_twice())
+    assert first.status_code == 200 and first.json()["localId"] == "uid-asha"
+    assert second.status_code == 400
+    (path, query, body, port_1), (_, _, _, port_2) = identity_toolkit.requests
+    assert path == "/v1/accounts:signInWithPassword"
+    assert query == "key=test-key"
+    assert port_1 == port_2  # keep-alive: the second call reused the first connection
+
+
+@pytest.fixture
+def auth_client(identity_toolkit, monkeypatch):
+    profiles = {"uid-asha": {"userType": "individual", "name": "Asha"}}
+    monkeypatch.setattr(auth, "get_document", lambda collection, doc_id: profiles.get(doc_id))
+    app = FastAPI(on_startup=[http_client.start_http_client], on_shutdown=[http_client.close_http_client])
+    app.include_router(auth.router)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_login_success_through_standin(auth_client):
+    response = auth_client.post("/auth/login", json={
+        "userType": "individual", "identifier": "asha@example.com", "password": "correct-horse"})
+    assert response.status_code == 200
+    assert response.json()["userId"] == "uid-asha"
+    assert response.json()["name"] == "Asha"
+    assert "signin;dur=" in response.headers["server-timing"]
+
+
+@pytest.mark.parametrize("identifier, password, message", [
+    ("asha@example.com", "wrong", "INVALID_PASSWORD"),
+    ("nobody@example.com", "x", "EMAIL_NOT_FOUND"),
+])
+def test_login_maps_identity_toolkit_errors_to_401(auth_client, identifier, password, message):
+    response = auth_client.post("/auth/login", json={
+        "userType": "individual", "identifier": identifier, "password": password})
+    assert response.status_code == 401
+    assert message in response.json()["detail"]
+
+
+
+def test_claim_alignment_keeps_other_custom_claims(identity_toolkit, auth_client, monkeypatch):
+    # The token still says "ngo" while the profile says "individual"; admin must survive the fix-up
+    identity_toolkit.users["asha@example.com"] = ("correct-horse", "uid-asha", {"userType": "ngo", "admin": True})
+    updates = []
+    monkeypatch.setattr(auth, "get_auth", lambda: SimpleNamespace(
+        set_custom_user_claims=lambda uid, claims: updates.append((uid, claims))))
+    response = auth_client.post("/auth/login", json={
+        "userType": "individual", "identifier": "asha@example.com", "password": "correct-horse"})
+    assert response.status_code == 200
+    assert updates == [("uid-asha", {"userType": "individual", "admin": True})]
@@ -0,0 +1,232 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes import reporting
+from services.ingestion_queue import IngestionQueue, QueueFullError
+
+REPORT = {"latitude": 26.14, "longitude": 91.73, "wasteType": "plastic",
+          "imageUrl": "https://img.example/photo.jpg", "userId": "uid-asha"}
+
+
+def test_jobs_run_and_a_failing_job_does_not_stop_the_worker():
+    ran = []
+
+    async def failing():
+        ran.append("failing")
+        raise RuntimeError("verification crashed")
+
+    async def working():
+        ran.append("working")
+        return "accepted"
+
+    async def scenario():
+        queue = IngestionQueue(workers=1, maxsize=10)
+        queue.start()
+        queue.submit("job-1", failing)
+        queue.submit("job-2", working)
+        await queue.stop(grace=1)
+
+    asyncio.run(scenario())
+    assert ran == ["failing", "working"]
+
+
+def test_submit_is_refused_when_full_or_not_running():
+    async def scenario():
+        queue = IngestionQueue(workers=1, maxsize=1)
+        with pytest.raises(QueueFullError, match="not running"):
+            queue.submit("job-1", asyncio.sleep)
+        queue.start()
+        queue.submit("job-1", lambda: asyncio.sleep(0))
+        assert queue.full()
+        with pytest.raises(QueueFullError, match="full"):
+            queue.submit("job-2", lambda: asyncio.sleep(0))
+        await queue.stop(grace=1)
+
+    asyncio.run(scenario())
+
+
+def test_stop_drains_queued_jobs():
+    done = []
+
+    def job(n):
+        async def run():
+            await asyncio.sleep(0.02)
+            done.append(n)
+        return run
+
+    async def scenario():
+        queue = IngestionQueue(workers=2, maxsize=10)
+        queue.start()
+        for n in range(6):
+            queue.submit(f"job-{n}", job(n))
+        await queue.stop(grace=5)
+        return queue.depth
+
+    assert asyncio.run(scenario()) == 0
+    assert sorted(done) == list(range(6))
+
+
+def test_stop_gives_up_on_stuck_jobs_after_the_grace_period():
+    async def stuck():
+        await asyncio.sleep(60)
+
+    async def scenario():
+        queue = IngestionQueue(workers=1, maxsize=10)
+        queue.start()
+        queue.submit("job-1", stuck)
+        queue.submit("job-2", stuck)
+        started = time.perf_counter()
+        await queue.stop(grace=0.1)
+        return time.perf_counter() - started, queue.depth
+
+    elapsed, depth = asyncio.run(scenario())
+    assert elapsed < 5
+    assert depth == 1  # the second job never started
+
+
+@pytest.fixture
+def submissions(memory_cache, monkeypatch):
+    """Firestore replaced by a dict for the submission records and reports"""
+    collections = {}
+
+    def add_document(collection, data):
+        records = collections.setdefault(collection, {})
+        doc_id = f"{collection}-{len(records) + 1}"
+        records[doc_id] = dict(data)
+        return doc_id
+
+    def update_document(collection, doc_id, data):
+        collections[collection][doc_id].update(data)
+
+    def get_document(collection, doc_id, use_cache=True):
+        return collections.get(collection, {}).get(doc_id)
+
+    monkeypatch.setattr(reporting, "add_document", add_document)
+    monkeypatch.setattr(reporting, "update_document", update_document)
+    monkeypatch.setattr(reporting, "get_document", get_document)
+    return collections
+
+
+def make_client(monkeypatch, create_report, queue=None) -> TestClient:
+    """The reporting routes with their ingestion queue running for the app's lifetime"""
+    queue = queue or IngestionQueue(workers=1, maxsize=10, job_timeout=5)
+    monkeypatch.setattr(reporting, "get_ingestion_queue", lambda: queue)
+    monkeypatch.setattr(reporting, "_create_report", create_report)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        queue.start()
+        yield
+        await queue.stop(grace=5)
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(reporting.router)
+    return TestClient(app)
+
+
+def wait_for_outcome(client: TestClient, submission_id: str) -> dict:
+    deadline = time.monotonic() + 5
+    while True:
+        status = client.get(f"/reporting/submissions/{submission_id}").json()
+        if status["status"] != "pending" or time.monotonic() > deadline:
+            return status
+        time.sleep(0.02)
+
+
+def test_async_report_is_processed_and_its_status_recorded(submissions, monkeypatch):
+    created = []
+
+    async def create_report(request):
+        created.append(request)
+        return {"success": True, "message": "Report submitted successfully", "reportId": "report-7",
+                "points": 10, "imageUrl": request.imageUrl}
+
+    with make_client(monkeypatch, create_report) as client:
+        response = client.post("/reporting/report/async", json=REPORT)
+        assert response.status_code == 202
+        submission_id = response.json()["submissionId"]
+        assert response.json()["statusUrl"] == f"/reporting/submissions/{submission_id}"
+        status = wait_for_outcome(client, submission_id)
+
+    assert status["status"] == "accepted"
+    assert (status["reportId"], status["points"], status["imageUrl"]) == ("report-7", 10, REPORT["imageUrl"])
+    assert [r.userId for r in created] == ["uid-asha"]
+    assert submissions["report_submissions"][submission_id]["completedAt"]
+
+
+def test_rejected_and_failed_jobs_are_recorded(submissions, monkeypatch):
+    outcomes = [{"success": False, "message": "This location already reported"},
+                RuntimeError("Image was not uploaded with an issued upload signature")]
+
+    async def create_report(request):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    with make_client(monkeypatch, create_report) as client:
+        rejected = client.post("/reporting/report/async", json=REPORT).json()["submissionId"]
+        failed = client.post("/reporting/report/async", json=REPORT).json()["submissionId"]
+        rejected, failed = wait_for_outcome(client, rejected), wait_for_outcome(client, failed)
+
+    assert (rejected["status"], rejected["message"]) == ("rejected", "This location already reported")
+    assert failed["status"] == "failed"
+    assert "issued upload signature" in failed["message"]
+    assert failed["reportId"] is None
+
+
+def test_full_queue_answers_503_and_marks_nothing_pending(submissions, monkeypatch):
+    async def create_report(request):
+        raise AssertionError("no job should run")
+
+    stopped = IngestionQueue()  # never started, so it takes no jobs
+    monkeypatch.setattr(reporting, "get_ingestion_queue", lambda: stopped)
+    monkeypatch.setattr(reporting, "_create_report", create_report)
+    app = FastAPI()
+    app.include_router(reporting.router)
+    response = TestClient(app).post("/reporting/report/async", json=REPORT)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+    assert not submissions.get("report_submissions")
+
+
+def test_stale_pending_submission_is_reported_failed(submissions, monkeypatch):
+    async def create_report(request):
+        raise AssertionError("no job should run")
+
+    records = submissions.setdefault("report_submissions", {})
+    records["lost"] = {"status": "pending", "message": "Report received, processing",
+                       "createdAt": (datetime.now() - timedelta(hours=1)).isoformat()}
+    records["recent"] = {"status": "pending", "message": "Report received, processing",
+                         "createdAt": datetime.now().isoformat()}
+
+    with make_client(monkeypatch, create_report) as client:
+        lost = client.get("/reporting/submissions/lost").json()
+        recent = client.get("/reporting/submissions/recent").json()
+        missing = client.get("/reporting/submissions/nope")
+
+    assert lost["status"] == "failed"
+    assert "submit the report again" in lost["message"]
+    assert records["lost"]["status"] == "failed"  # recorded, so later polls agree
+    assert recent["status"] == "pending"
+    assert missing.status_code == 404
+
+
+def test_shutdown_finishes_accepted_submissions(submissions, monkeypatch):
+    async def create_report(request):
+        await asyncio.sleep(0.05)
+        return {"success": True, "message": "Report submitted successfully", "reportId": "report-1",
+                "points": 10, "imageUrl": request.imageUrl}
+
+    with make_client(monkeypatch, create_report) as client:
+        ids = [client.post("/reporting/report/async", json=REPORT).json()["submissionId"] for _ in range(3)]
+    # Leaving the client runs the app's shutdown, which drains the queue
+
+    assert [submissions["report_submissions"][i]["status"] for i in ids] == ["accepted"] * 3
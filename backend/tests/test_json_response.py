@@ -0,0 +1,111 @@
+import gzip
+import json
+from datetime import date, datetime, timezone
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from routes import admin
+from services import json_response
+from services.json_response import FastJSONResponse
+from services.token_verifier import require_admin
+
+
+class Timestamp(datetime):
+    """Stand-in for Firestore's DatetimeWithNanoseconds"""
+
+
+REPORTED_AT = Timestamp(2025, 3, 1, 9, 30, tzinfo=timezone.utc)
+
+
+def report(i: int) -> dict:
+    return {"id": f"report{i:06d}", "wasteType": "plastic", "latitude": 26.14, "longitude": 91.73,
+            "imageUrl": f"https://res.cloudinary.com/demo/image/upload/luit/reports/{i:06d}.jpg",
+            "reportedAt": REPORTED_AT, "status": "active"}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    """FastJSONResponse with orjson, and with the plain json fallback used when it isn't installed"""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(json_response, "orjson", None)
+    return request.param
+
+
+def test_renders_what_the_default_response_renders(encoder):
+    content = [report(i) for i in range(3)] + [{"name": "Asha Devi", "note": "नदी किनारे", "score": None}]
+    assert json.loads(FastJSONResponse(content).body) == json.loads(JSONResponse(jsonable_encoder(content)).body)
+
+
+def test_renders_firestore_values(encoder):
+    body = json.loads(FastJSONResponse({
+        "reportedAt": REPORTED_AT, "day": date(2025, 3, 1), "tags": ("river", "bank"),
+        "raw": b"bytes", 7: "non-string key",
+    }).body)
+    assert body == {"reportedAt": "2025-03-01T09:30:00+00:00", "day": "2025-03-01", "tags": ["river", "bank"],
+                    "raw": "bytes", "7": "non-string key"}
+
+
+@pytest.fixture
+def admin_client(monkeypatch):
+    """The full app (middleware included) with admin auth waived and Firestore holding many reports"""
+    import main
+
+    class Doc:
+        def __init__(self, data):
+            self.id, self._data = data["id"], data
+
+        def to_dict(self):
+            return dict(self._data)
+
+    class Db:
+        def __init__(self):
+            self.count = 0
+
+        def collection(self, name):
+            return self
+
+        def stream(self):
+            return iter([Doc(report(i)) for i in range(self.count)])
+
+    db = Db()
+    monkeypatch.setattr(admin, "get_firestore_client", lambda: db)
+    monkeypatch.setitem(main.app.dependency_overrides, require_admin, lambda: None)
+    return TestClient(main.app), db
+
+
+def test_large_list_is_compressed(admin_client):
+    client, db = admin_client
+    db.count = 2000
+    response = client.get("/admin/reports", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] in ("gzip", "br")
+    assert int(response.headers["content-length"]) < len(FastJSONResponse(response.json()).body) / 5
+    assert len(response.json()) == 2000
+    assert response.json()[0]["reportedAt"] == "2025-03-01T09:30:00+00:00"
+
+
+def test_small_or_unrequested_bodies_are_sent_as_is(admin_client):
+    client, db = admin_client
+    db.count = 1
+    small = client.get("/admin/reports", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    db.count = 2000
+    plain = client.get("/admin/reports", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert len(plain.json()) == 2000
+
+
+def test_gzip_body_decodes_to_the_same_payload(admin_client):
+    client, db = admin_client
+    db.count = 500
+    # Read the raw stream so the client doesn't decode it for us
+    with client.stream("GET", "/admin/reports", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(raw)) == json.loads(FastJSONResponse([report(i) for i in range(500)]).body)
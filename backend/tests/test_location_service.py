@@ -0,0 +1,101 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from services import location_service
+from services.invalidation_bus import RedisBus, set_bus
+from services.location_service import geocell_lock, geocells_for_radius
+
+SPOT = (26.1445, 91.7362)
+NEARBY = (26.1448, 91.7364)   # about 40 m away
+ELSEWHERE = (26.2000, 91.8000)
+
+
+@pytest.fixture(params=["local", "redis"])
+def shared(request, memory_cache, monkeypatch):
+    """Cell locks in this process, or leases in Redis (a fake one) through the invalidation bus"""
+    monkeypatch.setattr(location_service, "GEOCELL_POLL_SECONDS", 0.01)
+    if request.param == "local":
+        return None
+    client = fakeredis.FakeRedis()
+    set_bus(RedisBus(client))
+    return client
+
+
+def test_nearby_points_share_a_cell():
+    assert set(geocells_for_radius(*SPOT)) & set(geocells_for_radius(*NEARBY))
+    assert not set(geocells_for_radius(*SPOT)) & set(geocells_for_radius(*ELSEWHERE))
+
+
+def test_same_cell_is_serialised(shared):
+    events = []
+
+    async def submit(name, point):
+        async with geocell_lock(*point):
+            events.append(f"{name} in")
+            await asyncio.sleep(0.05)
+            events.append(f"{name} out")
+
+    async def scenario():
+        await asyncio.gather(submit("a", SPOT), submit("b", NEARBY), submit("c", SPOT))
+
+    asyncio.run(scenario())
+    # Every holder leaves before the next one enters
+    assert all(events[i].endswith("in") and events[i + 1] == events[i].replace("in", "out")
+               for i in range(0, len(events), 2))
+    assert not location_service._cell_locks
+    if shared is not None:
+        assert not shared.keys("luit:geocell:*")
+
+
+def test_other_cells_are_not_blocked(shared):
+    async def scenario():
+        release = asyncio.Event()
+
+        async def hold():
+            async with geocell_lock(*SPOT):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0.05)
+        async with geocell_lock(*ELSEWHERE):
+            elsewhere_done = True
+        nearby = geocell_lock(*NEARBY)
+        blocked = asyncio.create_task(nearby.__aenter__())
+        await asyncio.sleep(0.1)
+        nearby_waiting = not blocked.done()
+        release.set()
+        await holder
+        await blocked
+        await nearby.__aexit__(None, None, None)
+        return elsewhere_done, nearby_waiting
+
+    assert asyncio.run(scenario()) == (True, True)
+
+
+def test_lease_held_by_another_worker_blocks_the_cell(memory_cache, monkeypatch):
+    monkeypatch.setattr(location_service, "GEOCELL_POLL_SECONDS", 0.01)
+    client = fakeredis.FakeRedis()
+    set_bus(RedisBus(client))
+    i, j = geocells_for_radius(*SPOT)[0]
+    key = f"luit:geocell:{i}:{j}"
+    client.set(key, "other-worker", ex=60)
+
+    async def scenario():
+        lock = geocell_lock(*SPOT)
+        waiting = asyncio.create_task(lock.__aenter__())
+        await asyncio.sleep(0.1)
+        blocked = not waiting.done()
+        client.delete(key)  # the other worker finished
+        await asyncio.wait_for(waiting, 1)
+        # The lease now belongs to this request, with an expiry in case it never releases
+        lease = client.get(key), client.ttl(key)
+        await lock.__aexit__(None, None, None)
+        return blocked, lease
+
+    blocked, (holder, ttl) = asyncio.run(scenario())
+    assert blocked
+    assert holder not in (None, b"other-worker")
+    assert 0 < ttl <= location_service.GEOCELL_LEASE_SECONDS
+    assert client.get(key) is None
@@ -0,0 +1,70 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services import cache_service
+from services.response_cache import CacheRule, ResponseCacheMiddleware, mark_uncacheable
+
+
+def make_app(outcomes: list):
+    """App whose /stats returns data or, when the next outcome is 'fail', the route's fallback"""
+    app = FastAPI()
+    calls = []
+
+    @app.get("/stats")
+    async def stats():
+        calls.append(1)
+        if outcomes.pop(0) == "fail":
+            mark_uncacheable()
+            return {"total": 0}
+        return {"total": 42}
+
+    @app.get("/sync-stats")
+    def sync_stats():  # runs in the threadpool with a copied context
+        calls.append(1)
+        mark_uncacheable()
+        return {"total": 0}
+
+    app.add_middleware(ResponseCacheMiddleware, rules=[
+        CacheRule("/stats", ("response_cache_test",)),
+        CacheRule("/sync-stats", ("response_cache_test",)),
+    ])
+    return TestClient(app), calls
+
+
+def test_successful_response_is_cached_and_revalidated(memory_cache):
+    client, calls = make_app(["ok"])
+    first = client.get("/stats")
+    assert first.json() == {"total": 42}
+    assert first.headers["x-cache"] == "MISS"
+    second = client.get("/stats")
+    assert second.headers["x-cache"] == "HIT"
+    assert client.get("/stats", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+    assert len(calls) == 1
+
+
+def test_fallback_body_is_not_cached_or_given_an_etag(memory_cache):
+    client, calls = make_app(["fail", "ok"])
+    fallback = client.get("/stats")
+    assert fallback.status_code == 200
+    assert fallback.json() == {"total": 0}
+    assert "etag" not in fallback.headers
+    assert fallback.headers["cache-control"] == "no-store"
+    # The next poll computes the real data instead of replaying the fallback
+    assert client.get("/stats").json() == {"total": 42}
+    assert len(calls) == 2
+
+
+def test_fallback_from_sync_endpoint_is_not_cached(memory_cache):
+    client, calls = make_app([])
+    client.get("/sync-stats")
+    client.get("/sync-stats")
+    assert len(calls) == 2
+
+
+def test_write_stops_304_and_serves_stale_while_refreshing(memory_cache):
+    client, calls = make_app(["ok", "ok"])
+    etag = client.get("/stats").headers["etag"]
+    cache_service.invalidate_queries("response_cache_test")
+    response = client.get("/stats", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["x-cache"] == "STALE"
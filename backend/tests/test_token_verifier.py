@@ -0,0 +1,204 @@
+"""Token verification with a locally generated RSA key and certificate, served from a local
+stand-in for Google's securetoken certificate URL"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import base64
+import datetime
+import json
+import threading
+import time
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.x509.oid import NameOID
+
+from services import http_client
+from services.token_verifier import InvalidTokenError, PublicKeyCache, TokenVerifier
+
+PROJECT = "luit-test"
+
+
+def make_signing_key():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken.test")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1)).not_valid_after(now + datetime.timedelta(days=1))
+            .sign(key, hashes.SHA256()))
+    return key, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def sign(key, kid: str, **overrides) -> str:
+    now = int(time.time())
+    claims = {"aud": PROJECT, "iss": f"https://securetoken.google.com/{PROJECT}", "sub": "uid-1",
+              "iat": now - 10, "exp": now + 3600, "auth_time": now - 10}
+    claims.update(overrides)
+    signing_input = f"{b64(json.dumps({'alg': 'RS256', 'kid': kid}).encode())}.{b64(json.dumps(claims).encode())}"
+    signature = key.sign(signing_input.encode(), padding.PKCS1v15(), hashes.SHA256())
+    return f"{signing_input}.{b64(signature)}"
+
+
+class CertServer:
+    """Serves {kid: PEM} with a Cache-Control max-age, like Google's certificate endpoint"""
+
+    def __init__(self):
+        self.certs = {}
+        self.max_age = 3600
+        self.fetches = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.fetches += 1
+                data = json.dumps(server.certs).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", f"public, max-age={server.max_age}, must-revalidate")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/certs"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture(scope="module")
+def signing_keys():
+    return {"kid-1": make_signing_key(), "kid-2": make_signing_key()}
+
+
+@pytest.fixture
+def certs(signing_keys):
+    server = CertServer()
+    server.certs = {"kid-1": signing_keys["kid-1"][1]}
+    yield server
+    server.close()
+
+
+def run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await http_client.close_http_client()
+    return asyncio.run(main())
+
+
+def make_verifier(certs, **kwargs) -> TokenVerifier:
+    return TokenVerifier(PROJECT, PublicKeyCache(certs.url, **kwargs))
+
+
+def test_valid_token(certs, signing_keys):
+    verifier = make_verifier(certs)
+    claims = run(verifier.verify(sign(signing_keys["kid-1"][0], "kid-1", userType="ngo")))
+    assert claims["uid"] == "uid-1"
+    assert claims["userType"] == "ngo"
+    assert certs.fetches == 1
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"exp": int(time.time()) - 3600}, "expired"),
+    ({"aud": "other-project"}, "audience"),
+    ({"iss": "https://securetoken.google.com/other-project"}, "issuer"),
+    ({"sub": ""}, "subject"),
+    ({"iat": int(time.time()) + 3600}, "issued-at"),
+])
+def test_rejects_bad_claims(certs, signing_keys, overrides, message):
+    verifier = make_verifier(certs)
+    with pytest.raises(InvalidTokenError, match=message):
+        run(verifier.verify(sign(signing_keys["kid-1"][0], "kid-1", **overrides)))
+
+
+def test_rejects_signature_from_another_key(certs, signing_keys):
+    # Signed with kid-2's private key but claiming kid-1
+    with pytest.raises(InvalidTokenError, match="signature"):
+        run(make_verifier(certs).verify(sign(signing_keys["kid-2"][0], "kid-1")))
+
+
+def test_rejects_unsigned_token(certs, signing_keys):
+    token = sign(signing_keys["kid-1"][0], "kid-1")
+    _, payload, signature = token.split(".")
+    unsigned = f"{b64(json.dumps({'alg': 'none', 'kid': 'kid-1'}).encode())}.{payload}.{signature}"
+    with pytest.raises(InvalidTokenError, match="algorithm"):
+        run(make_verifier(certs).verify(unsigned))
+
+
+def test_unknown_kid_refreshes_at_most_once_per_interval(certs, signing_keys):
+    verifier = make_verifier(certs, min_refresh_interval=300)
+    unknown = sign(signing_keys["kid-2"][0], "kid-2")
+
+    async def verify_unknown_kids():
+        await verifier.verify(sign(signing_keys["kid-1"][0], "kid-1"))
+        for _ in range(2):
+            with pytest.raises(InvalidTokenError, match="Unknown signing key"):
+                await verifier.verify(unknown)
+        fetches_within_interval = certs.fetches
+        verifier.keys._last_fetch -= 301
+        with pytest.raises(InvalidTokenError, match="Unknown signing key"):
+            await verifier.verify(unknown)
+        return fetches_within_interval
+
+    assert run(verify_unknown_kids()) == 1  # only the initial load
+    assert certs.fetches == 2  # once the interval has passed, one refetch
+
+
+def test_rotated_key_is_picked_up(certs, signing_keys):
+    verifier = make_verifier(certs, min_refresh_interval=0)
+
+    async def verify_before_and_after_rotation():
+        await verifier.verify(sign(signing_keys["kid-1"][0], "kid-1"))
+        certs.certs = {"kid-2": signing_keys["kid-2"][1]}
+        return await verifier.verify(sign(signing_keys["kid-2"][0], "kid-2", sub="uid-2"))
+
+    assert run(verify_before_and_after_rotation())["uid"] == "uid-2"
+    assert certs.fetches == 2
+
+
+def test_certificates_expire_per_max_age(certs, signing_keys):
+    certs.max_age = 0
+    verifier = make_verifier(certs)
+
+    async def verify_two_tokens():
+        await verifier.verify(sign(signing_keys["kid-1"][0], "kid-1", sub="a"))
+        await verifier.verify(sign(signing_keys["kid-1"][0], "kid-1", sub="b"))
+
+    run(verify_two_tokens())
+    assert certs.fetches == 2  # max-age=0: every new verification needs fresh certificates
+
+
+def test_verified_token_is_cached(certs, signing_keys):
+    certs.max_age = 0
+    verifier = make_verifier(certs)
+    token = sign(signing_keys["kid-1"][0], "kid-1")
+
+    async def verify_twice():
+        first = await verifier.verify(token)
+        second = await verifier.verify(token)
+        return first, second
+
+    first, second = run(verify_twice())
+    assert second is first
+    assert certs.fetches == 1  # the repeat never reached the key cache
+
+
+def test_cached_token_still_expires(certs, signing_keys):
+    verifier = make_verifier(certs)
+    token = sign(signing_keys["kid-1"][0], "kid-1")
+    claims = run(verifier.verify(token))
+    claims["exp"] = int(time.time()) - 3600  # as if the clock moved past exp
+    assert verifier._cached(token) is None
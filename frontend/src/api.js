@@ -86,8 +86,28 @@ export const reportingApi = {
   uploadImage: (imageBase64) => api.post('/reporting/upload-image', { image_base64: imageBase64 }),
   verifyImage: (imageBase64) => api.post('/reporting/verify-image', { image_base64: imageBase64 }),
   deleteImage: (public_id) => api.post('/reporting/delete-image', { public_id }),
+  // Direct upload: send the file to Cloudinary with backend-signed params, then pass
+  // the returned public_id as imagePublicId to createReport
+  getUploadSignature: () => api.post('/reporting/upload-signature'),
+  uploadDirect: async (file, signed) => {
+    const form = new FormData()
+    form.append('file', file)
+    for (const field of ['api_key', 'timestamp', 'signature', 'folder', 'public_id', 'allowed_formats', 'transformation']) {
+      form.append(field, field === 'api_key' ? signed.apiKey : signed[field])
+    }
+    const response = await axios.post(signed.uploadUrl, form, { timeout: 60000 })
+    return response.data
+  },
   checkLocation: (latitude, longitude) => api.post('/reporting/check-location', { latitude, longitude }),
-  createReport: (data) => api.post('/reporting/report', data),
+  // idempotencyKey: same value on retries of one submission so the backend creates a single report
+  createReport: (data, idempotencyKey) => api.post('/reporting/report', data, {
+    headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {}
+  }),
+  // Background processing: returns { submissionId } at once; poll getSubmission for the outcome
+  submitReport: (data, idempotencyKey) => api.post('/reporting/report/async', data, {
+    headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {}
+  }),
+  getSubmission: (submissionId) => api.get(`/reporting/submissions/${submissionId}`),
   getReports: (wasteType, limit) => api.get('/reporting/reports', {
     params: { wasteType, limit }
   }),
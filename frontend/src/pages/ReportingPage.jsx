@@ -303,7 +303,7 @@ export default function ReportingPage() {
 
     setLoading(true)
     try {
-      // Create report with Cloudinary URL
+      // Create report with Cloudinary URL (keyed by the uploaded image so retries don't duplicate it)
       const report = await reportingApi.createReport({
         latitude,
         longitude,
@@ -312,7 +312,7 @@ export default function ReportingPage() {
         userId: user?.id,
         userName: user?.name || 'Anonymous',
         userType: userType || 'individual'
-      })
+      }, `report-${cloudinaryPublicId || cloudinaryUrl}`)
 
       setSuccess('Report submitted successfully! You earned 10 points.')
       setImage(null)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Stand-in for realesrgan-ncnn-vulkan, for exercising enhancer.py without a GPU.
+
+Accepts the same command line (-i, -o, -s, -t, -j, -g, -m, -n, -f) and writes
+every input image to the output directory resized by -s with Lanczos, keeping
+the file name. The proc thread count of -j is honoured, so sharded runs and
+auto-tuning behave like a CPU-bound upscaler.
+
+STUB_UPSCALER_PASSES=N adds N extra filter passes per frame to simulate a
+heavier model.
+
+Usage:
+  python enhancer.py video.mp4 --esrgan-exe ./stub_upscaler.py --upscale-shards auto
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Real-ESRGAN stub (Lanczos resize)")
+    parser.add_argument("-i", dest="input", required=True)
+    parser.add_argument("-o", dest="output", required=True)
+    parser.add_argument("-s", dest="scale", type=int, default=4)
+    parser.add_argument("-t", dest="tile", default="0")
+    parser.add_argument("-j", dest="threads", default="1:2:2")
+    parser.add_argument("-g", dest="gpu", default="auto")
+    parser.add_argument("-m", dest="model", default=None)
+    parser.add_argument("-n", dest="model_name", default=None)
+    parser.add_argument("-f", dest="format", default="png")
+    args = parser.parse_args()
+
+    import cv2
+    cv2.setNumThreads(1)
+    passes = int(os.environ.get("STUB_UPSCALER_PASSES", "0"))
+    proc_threads = max(1, int(args.threads.split(":")[1]))
+    src, dst = Path(args.input), Path(args.output)
+    dst.mkdir(parents=True, exist_ok=True)
+
+    def upscale(path: Path):
+        image = cv2.imread(str(path), cv2.IMREAD_COLOR)
+        if image is None:
+            raise RuntimeError(f"cannot read {path}")
+        image = cv2.resize(image, None, fx=args.scale, fy=args.scale, interpolation=cv2.INTER_LANCZOS4)
+        for _ in range(passes):
+            image = cv2.GaussianBlur(image, (5, 5), 0)
+        cv2.imwrite(str(dst / f"{path.stem}.{args.format}"), image)
+
+    files = sorted(p for p in src.iterdir() if p.suffix.lower() in (".png", ".jpg", ".jpeg", ".webp"))
+    try:
+        with ThreadPoolExecutor(max_workers=proc_threads) as pool:
+            list(pool.map(upscale, files))
+    except Exception as e:
+        print(f"stub upscaler failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
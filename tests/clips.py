@@ -0,0 +1,26 @@
+"""Tiny synthetic clips made with ffmpeg's lavfi sources, and frame counting without ffprobe"""
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+needs_ffmpeg = pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")),
+                                  reason="needs ffmpeg and ffprobe on PATH")
+
+
+def make_clip(path: Path, seconds: float, fps: str = "24", size: str = "64x48", gop: int = 12,
+              source: str = "testsrc2") -> Path:
+    """Tiny synthetic H.264 clip from an ffmpeg lavfi source, a keyframe every gop frames"""
+    subprocess.run(["ffmpeg", "-v", "error", "-y", "-f", "lavfi",
+                    "-i", f"{source}=size={size}:rate={fps}:duration={seconds}",
+                    "-c:v", "libx264", "-preset", "ultrafast", "-g", str(gop), "-pix_fmt", "yuv420p",
+                    str(path)], check=True)
+    return path
+
+
+def decoded_frames(path: Path) -> int:
+    """Frames ffmpeg decodes from path (counted from raw gray output, no ffprobe involved)"""
+    result = subprocess.run(["ffmpeg", "-v", "error", "-i", str(path), "-f", "rawvideo", "-pix_fmt", "gray",
+                             "-s", "8x8", "pipe:1"], capture_output=True, check=True)
+    return len(result.stdout) // 64
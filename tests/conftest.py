@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+# video_enhancer and stub_upscaler.py live at the repository root, like enhancer.py
+sys.path.insert(0, str(ROOT))
+
+STUB_UPSCALER = ROOT / "stub_upscaler.py"
+
+
+@pytest.fixture
+def cpu_enhancer():
+    """VideoEnhancer on the CPU: Farneback interpolation and stub_upscaler.py as Real-ESRGAN"""
+    from video_enhancer import VideoEnhancer
+    return VideoEnhancer(esrgan_exe=str(STUB_UPSCALER), interpolator="farneback", upscaler="realesrgan-ncnn")
+
+
+@pytest.fixture
+def stub_upscaler():
+    """Path of stub_upscaler.py, a CPU stand-in for realesrgan-ncnn-vulkan"""
+    return STUB_UPSCALER
@@ -0,0 +1,95 @@
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from video_enhancer import PipelineError, VideoEnhancer
+from video_enhancer.backends import (FarnebackInterpolator, OpenCVUpscaler, RealEsrganNcnnUpscaler,
+                                     UpscaleShard, build_upscale_shards, split_evenly)
+
+
+def numbered_frames(count: int) -> list:
+    """Small frames whose pixel value is their index, so order survives resizing"""
+    return [np.full((12, 16, 3), 10 * i, dtype=np.uint8) for i in range(count)]
+
+
+def test_split_evenly():
+    assert split_evenly(list(range(10)), 3) == [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]]
+    assert split_evenly([1, 2], 5) == [[1], [2]]
+    assert split_evenly([1, 2, 3], 0) == [[1, 2, 3]]
+
+
+def test_shard_settings_are_assigned_in_turn():
+    shards = build_upscale_shards(3, tiles="128,256", threads="1:2:2", gpus="0,1")
+    assert shards == [UpscaleShard(128, "1:2:2", "0"), UpscaleShard(256, "1:2:2", "1"),
+                      UpscaleShard(128, "1:2:2", "0")]
+    assert shards[1].args() == ["-t", "256", "-j", "1:2:2", "-g", "1"]
+    assert build_upscale_shards(0) == [UpscaleShard()]
+    assert UpscaleShard().args() == []
+
+
+@pytest.mark.parametrize("shards", [1, 3])
+def test_sharded_upscale_keeps_frame_order(tmp_path, stub_upscaler, shards):
+    upscaler = RealEsrganNcnnUpscaler(stub_upscaler, shards=shards)
+    frames = numbered_frames(7)
+    outputs = upscaler.upscale(frames, tmp_path / "work", scale=2)
+    assert [o.shape for o in outputs] == [(24, 32, 3)] * 7
+    assert [int(o[0, 0, 0]) for o in outputs] == [10 * i for i in range(7)]
+
+
+def test_sharded_upscale_dir_merges_all_frames(tmp_path, stub_upscaler):
+    import cv2
+    frames_dir, out_dir = tmp_path / "frames", tmp_path / "upscaled"
+    frames_dir.mkdir()
+    out_dir.mkdir()
+    for i, frame in enumerate(numbered_frames(5), 1):
+        cv2.imwrite(str(frames_dir / f"{i:08d}.png"), frame)
+    upscaler = RealEsrganNcnnUpscaler(stub_upscaler, shards=2)
+    assert upscaler.upscale_dir(frames_dir, out_dir, scale=2) == 5
+    assert sorted(p.name for p in out_dir.iterdir()) == sorted(p.name for p in frames_dir.iterdir())
+    assert not list(tmp_path.glob("upscale_shard_*"))
+
+
+def test_autotune_keeps_a_usable_shard_count(tmp_path, stub_upscaler):
+    upscaler = RealEsrganNcnnUpscaler(stub_upscaler, tiles="0")
+    count = upscaler.autotune(numbered_frames(4), tmp_path / "autotune", scale=2, max_shards=2)
+    assert count in (1, 2)
+    assert len(upscaler.shards) == count
+    assert all(shard.tile == 0 for shard in upscaler.shards)
+    assert not (tmp_path / "autotune").exists()
+
+
+def test_auto_falls_back_to_cpu_backends(tmp_path, stub_upscaler):
+    enhancer = VideoEnhancer(bin_dir=str(tmp_path))  # no NCNN binaries here
+    assert (enhancer.interpolator.name, enhancer.upscaler.name) == ("farneback", "lanczos")
+    assert len(enhancer.backend_notes) == 2
+    assert "RIFE executable not found" in enhancer.backend_notes[0]
+
+    enhancer = VideoEnhancer(bin_dir=str(tmp_path), esrgan_exe=str(stub_upscaler))
+    assert enhancer.upscaler.name == "realesrgan-ncnn"
+
+
+def test_unknown_or_unusable_backends(tmp_path):
+    with pytest.raises(PipelineError, match="Unknown upscaling backend: waifu2x"):
+        VideoEnhancer(upscaler="waifu2x")
+    edsr = OpenCVUpscaler("edsr", str(tmp_path / "missing.pb"))
+    assert edsr.problem() is not None
+
+
+def test_cpu_interpolator_handles_cuts_static_pairs_and_motion(tmp_path):
+    a = np.zeros((32, 32, 3), dtype=np.uint8)
+    b = np.full((32, 32, 3), 200, dtype=np.uint8)
+    positions = [Fraction(0), Fraction(1, 4), Fraction(3, 4), Fraction(1)]
+    interpolator = FarnebackInterpolator()
+
+    cut = interpolator.interpolate([a, b], positions, tmp_path, kinds=["cut"])
+    assert [int(f[0, 0, 0]) for f in cut] == [0, 0, 200, 200]  # nearest source frame
+    static = interpolator.interpolate([a, b], positions, tmp_path, kinds=["static"])
+    assert [int(f[0, 0, 0]) for f in static] == [0, 50, 150, 200]  # plain blend
+    motion = interpolator.interpolate([a, a], positions, tmp_path)
+    assert all(np.array_equal(f, a) for f in motion)  # no flow between identical frames
+
+
+def test_lanczos_upscale():
+    outputs = OpenCVUpscaler("lanczos").upscale(numbered_frames(2), None, scale=4)
+    assert [o.shape for o in outputs] == [(48, 64, 3)] * 2
@@ -0,0 +1,123 @@
+import json
+import shutil
+
+import pytest
+
+from clips import make_clip, needs_ffmpeg
+from video_enhancer import PipelineError, VideoEnhancer
+from video_enhancer.batch import BatchState, batch_key, collect_batch_inputs, file_digest, is_batch_input
+
+SETTINGS = {"encoder": "balanced", "crf": None, "upscaler": "lanczos"}
+
+
+def test_batch_key_follows_content_not_path(tmp_path):
+    a = tmp_path / "a.mp4"
+    a.write_bytes(b"same bytes")
+    copy = tmp_path / "renamed" / "copy.mp4"
+    copy.parent.mkdir()
+    shutil.copy(a, copy)
+    other = tmp_path / "other.mp4"
+    other.write_bytes(b"other bytes")
+
+    assert batch_key(file_digest(a), SETTINGS) == batch_key(file_digest(copy), SETTINGS)
+    assert batch_key(file_digest(a), SETTINGS) != batch_key(file_digest(other), SETTINGS)
+    assert batch_key(file_digest(a), SETTINGS) != batch_key(file_digest(a), dict(SETTINGS, crf=20))
+
+
+def test_batch_settings_cover_output_affecting_options(tmp_path):
+    model_a, model_b = tmp_path / "EDSR_x4.pb", tmp_path / "EDSR_x4_retrained.pb"
+    model_a.write_bytes(b"weights a")
+    model_b.write_bytes(b"weights b")
+
+    def settings(skip_interpolation=False, skip_upscale=False, **enhancer_options):
+        enhancer = VideoEnhancer(**dict({"interpolator": "farneback", "upscaler": "edsr",
+                                         "edsr_model": str(model_a)}, **enhancer_options))
+        return enhancer.batch_settings(skip_interpolation, skip_upscale, target_fps=60)
+
+    base = settings()
+    assert settings() == base
+    assert settings(edsr_model=str(model_b)) != base
+    assert settings(scene_threshold=0.5) != base
+    assert settings(upscaler="lanczos") != base
+    assert settings(upscaler="realesrgan-ncnn", esrgan_exe="a") != settings(upscaler="realesrgan-ncnn",
+                                                                           esrgan_exe="b")
+    assert (settings(upscaler="realesrgan-ncnn", upscale_tile="128")
+            != settings(upscaler="realesrgan-ncnn", upscale_tile="256"))
+
+    model_a.write_bytes(b"weights a, retrained in place")
+    assert settings() != base
+
+    # Settings of stages that are skipped don't change the output
+    assert settings(skip_upscale=True) == settings(skip_upscale=True, upscaler="lanczos")
+    assert settings(skip_interpolation=True) == settings(skip_interpolation=True, static_threshold=0.5)
+
+    enhancer = VideoEnhancer(interpolator="farneback", upscaler="lanczos")
+    streaming = enhancer.batch_settings()
+    assert enhancer.batch_settings(chunk_size=7, upscale_workers=3) == streaming
+    assert enhancer.batch_settings(segment_seconds=10) != streaming
+    assert enhancer.batch_settings(frame_store=True) != streaming
+    assert enhancer.batch_settings(streaming=False, encode_jobs=4) != enhancer.batch_settings(streaming=False)
+
+
+def test_batch_state_skips_only_matching_outputs(tmp_path):
+    output = tmp_path / "a_enhanced.mp4"
+    output.write_bytes(b"enhanced")
+    state = BatchState(tmp_path / "batch_state.json")
+    state.mark_done(output, "key-1", tmp_path / "a.mp4")
+
+    reloaded = BatchState(tmp_path / "batch_state.json")
+    assert reloaded.is_done(output, "key-1")
+    assert not reloaded.is_done(output, "key-2")
+    assert not reloaded.is_done(tmp_path / "b_enhanced.mp4", "key-1")
+    output.write_bytes(b"short")
+    assert not reloaded.is_done(output, "key-1")  # size no longer matches
+    output.unlink()
+    assert not reloaded.is_done(output, "key-1")
+
+
+def test_collect_batch_inputs(tmp_path):
+    clips = tmp_path / "clips"
+    (clips / "nested").mkdir(parents=True)
+    for name in ("b.mp4", "a.MOV", "notes.txt", "nested/c.mkv"):
+        (clips / name).write_bytes(b"x")
+    (tmp_path / "list.txt").write_text("# videos\nclips/b.mp4\n\nclips/nested/c.mkv\n")
+    (tmp_path / "list.json").write_text(json.dumps(["clips/a.MOV"]))
+
+    assert [p.name for p in collect_batch_inputs(str(clips))] == ["a.MOV", "b.mp4"]
+    assert [p.name for p in collect_batch_inputs(str(clips / "**" / "*"))] == ["a.MOV", "b.mp4", "c.mkv"]
+    assert [p.name for p in collect_batch_inputs(str(tmp_path / "list.txt"))] == ["b.mp4", "c.mkv"]
+    assert [p.name for p in collect_batch_inputs(str(tmp_path / "list.json"))] == ["a.MOV"]
+    assert all(is_batch_input(str(spec)) for spec in (clips, tmp_path / "list.txt", clips / "*.mp4"))
+    assert not is_batch_input(str(clips / "b.mp4"))
+
+    (tmp_path / "list.txt").write_text("clips/missing.mp4\n")
+    with pytest.raises(PipelineError, match="missing.mp4"):
+        collect_batch_inputs(str(tmp_path / "list.txt"))
+
+
+@needs_ffmpeg
+def test_rerun_skips_finished_videos(tmp_path, cpu_enhancer):
+    clips = tmp_path / "clips"
+    clips.mkdir()
+    make_clip(clips / "a.mp4", seconds=0.5)
+    make_clip(clips / "b.mp4", seconds=0.5, source="smptebars")
+    output_dir = tmp_path / "enhanced"
+
+    def run_batch(**options) -> dict:
+        cpu_enhancer.run_batch(str(clips), output_dir=str(output_dir), jobs=2, skip_interpolation=True,
+                               work_root=str(tmp_path / "work"), **options)
+        report = json.loads((output_dir / "batch_report.json").read_text())
+        return {v["input"].rsplit("/", 1)[-1]: v["status"] for v in report["videos"]}
+
+    assert run_batch() == {"a.mp4": "done", "b.mp4": "done"}
+    assert run_batch() == {"a.mp4": "skipped", "b.mp4": "skipped"}
+
+    make_clip(clips / "b.mp4", seconds=0.5, source="testsrc")  # new content under the same name
+    assert run_batch() == {"a.mp4": "skipped", "b.mp4": "done"}
+    assert run_batch(crf=30) == {"a.mp4": "done", "b.mp4": "done"}
+    assert run_batch(crf=30, fresh=True) == {"a.mp4": "done", "b.mp4": "done"}
+
+    cpu_enhancer.upscaler.shard_settings["tiles"] = "32"
+    assert run_batch(crf=30) == {"a.mp4": "done", "b.mp4": "done"}
+    assert run_batch(crf=30, segment_seconds=0.25) == {"a.mp4": "done", "b.mp4": "done"}
+    assert run_batch(crf=30, segment_seconds=0.25) == {"a.mp4": "skipped", "b.mp4": "skipped"}
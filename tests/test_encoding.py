@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+
+from clips import decoded_frames, make_clip, needs_ffmpeg
+from video_enhancer.media import ENCODER_PROFILES, available_encoders
+
+
+def test_profile_args_take_a_crf_override():
+    profile = ENCODER_PROFILES["archival"]
+    assert profile.args()[:6] == ["-c:v", "libx265", "-preset", "slow", "-crf", "16"]
+    assert profile.args(crf=24)[5] == "24"
+    assert profile.args()[-4:] == ["-tag:v", "hvc1", "-x265-params", "log-level=error"]
+    assert ENCODER_PROFILES["balanced"].args()[-2:] == ["-pix_fmt", "yuv420p"]
+
+
+def test_available_encoders_parses_the_encoder_list(tmp_path):
+    listing = tmp_path / "ffmpeg-encoders"
+    listing.write_text("#!/bin/sh\ncat <<'EOF'\nEncoders:\n V..... = Video\n ------\n"
+                       " V....D libx264              libx264 H.264\n"
+                       " A....D aac                  AAC (Advanced Audio Coding)\nEOF\n")
+    listing.chmod(0o755)
+    assert available_encoders(str(listing)) == {"libx264", "aac"}
+
+
+@needs_ffmpeg
+def test_parallel_png_encode_keeps_every_frame_in_order(tmp_path, cpu_enhancer):
+    frames_dir = tmp_path / "frames"
+    frames_dir.mkdir()
+    for i in range(1, 31):
+        cv2.imwrite(str(frames_dir / f"{i:06d}.png"), np.full((48, 64, 3), 8 * i, dtype=np.uint8))
+    output = tmp_path / "out.mp4"
+    cpu_enhancer.encode_video(str(frames_dir), str(output), fps=24, encoder="fast", jobs=3)
+    assert decoded_frames(output) == 30
+    assert not list(tmp_path.glob("encode_part_*"))
+
+    gray = cv2.VideoCapture(str(output))
+    levels = []
+    while True:
+        ok, frame = gray.read()
+        if not ok:
+            break
+        levels.append(int(frame.mean()))
+    assert levels == sorted(levels)  # the parts were joined in order
+
+
+@needs_ffmpeg
+def test_encoder_benchmark_skips_missing_encoders(tmp_path, cpu_enhancer):
+    clip = make_clip(tmp_path / "clip.mp4", seconds=0.5)
+    results = cpu_enhancer.benchmark_encoders(str(clip), frames=6, scale=1, work_root=str(tmp_path / "work"))
+    codecs = available_encoders(cpu_enhancer.ffmpeg_exe)
+    assert [r["profile"] for r in results] == [p.name for p in ENCODER_PROFILES.values() if p.codec in codecs]
+    assert all(r["frames"] == 6 and r["size_bytes"] > 0 for r in results)
+    assert not (tmp_path / "work").exists() or not any((tmp_path / "work").iterdir())
@@ -0,0 +1,66 @@
+import io
+import json
+
+import numpy as np
+
+from clips import decoded_frames, make_clip, needs_ffmpeg
+from video_enhancer.frame_store import FrameStore
+
+HEIGHT, WIDTH = 6, 8
+FRAME_BYTES = HEIGHT * WIDTH * 3
+
+
+def frame(value: int):
+    return np.full((HEIGHT, WIDTH, 3), value, np.uint8)
+
+
+def test_store_stays_in_ram_within_budget(tmp_path):
+    store = FrameStore(HEIGHT, WIDTH, capacity=2, budget_bytes=10 * FRAME_BYTES, spill_dir=tmp_path)
+    store.append([frame(i) for i in range(5)])  # grows past the initial capacity
+    assert not store.spilled
+    assert store.ram_bytes >= 5 * FRAME_BYTES
+    assert [int(f[0, 0, 0]) for f in store] == [0, 1, 2, 3, 4]
+    assert not list(tmp_path.iterdir())
+
+
+def test_store_spills_to_a_mapped_file_past_the_budget(tmp_path):
+    store = FrameStore(HEIGHT, WIDTH, capacity=2, budget_bytes=3 * FRAME_BYTES, spill_dir=tmp_path / "spill")
+    store.append([frame(i) for i in range(2)])
+    assert not store.spilled
+
+    store.append([frame(i) for i in range(2, 9)])  # frames already in RAM move to the file
+    assert store.spilled
+    assert store.ram_bytes == 0
+    assert store.path.parent == tmp_path / "spill"
+    assert store.path.stat().st_size >= 9 * FRAME_BYTES
+    assert [int(f[0, 0, 0]) for f in store] == list(range(9))
+    assert int(store[-1][0, 0, 0]) == 8
+    assert "spilled to" in store.describe()
+
+    store.close()
+    assert not store.path.exists()
+
+
+def test_read_from_fills_the_store_and_drops_a_partial_frame(tmp_path):
+    raw = b"".join(frame(i).tobytes() for i in range(7)) + b"\x00" * (FRAME_BYTES // 2)
+    store = FrameStore(HEIGHT, WIDTH, capacity=1, budget_bytes=2 * FRAME_BYTES, spill_dir=tmp_path)
+    assert store.read_from(io.BytesIO(raw)) == 7
+    assert store.spilled
+    assert [int(f[0, 0, 0]) for f in store] == list(range(7))
+    store.close()
+
+
+@needs_ffmpeg
+def test_frame_store_mode_spills_and_encodes(tmp_path, cpu_enhancer):
+    clip = make_clip(tmp_path / "clip.mp4", seconds=1, fps="24000/1001")
+    output = tmp_path / "out.mp4"
+    frames = cpu_enhancer.enhance(str(clip), str(output), frame_store=True, target_fps=60,
+                                  memory_budget_mb=0.05, spill_dir=str(tmp_path / "spill"),
+                                  work_root=str(tmp_path / "work"))
+
+    report = json.loads((tmp_path / "out.metrics.json").read_text())
+    assert report["status"] == "ok"
+    assert {s["name"]: s["spilled"] for s in report["stages"] if "spilled" in s} == {
+        "decode": True, "interpolate": True, "upscale": True}
+    assert decoded_frames(output) == frames == report["output_frames"]
+    assert not list((tmp_path / "spill").iterdir())  # spill files are removed with the stores
@@ -0,0 +1,85 @@
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from clips import decoded_frames, make_clip, needs_ffmpeg
+from video_enhancer import PipelineError
+from video_enhancer.media import FrameReader, FrameWriter, VideoInfo, probe_video
+
+# Stands in for an ffmpeg that fails part-way: reads 1 MB of frames, then exits
+FAILING_ENCODER = f"""#!{sys.executable}
+import sys
+sys.stdin.buffer.read(1 << 20)
+sys.stderr.write("encoder gave up")
+sys.exit(1)
+"""
+
+
+@needs_ffmpeg
+def test_frames_round_trip_through_raw_pipes(tmp_path):
+    clip = make_clip(tmp_path / "clip.mp4", seconds=1)
+    info = probe_video(str(clip))
+    reader = FrameReader("ffmpeg", str(clip), info, buffer_frames=4)
+    reader.start()
+    output = tmp_path / "copy.mp4"
+    writer = FrameWriter("ffmpeg", str(output), info.width, info.height, info.fps, max_chunks=2)
+    writer.start()
+    chunk = []
+    for frame in reader:
+        assert frame.shape == (48, 64, 3)
+        chunk.append(frame)
+        if len(chunk) == 5:
+            writer.write(chunk)
+            chunk = []
+    writer.write(chunk)
+    writer.close()
+    assert writer.frames_written == info.frame_count == 24
+    assert decoded_frames(output) == 24
+
+
+@needs_ffmpeg
+def test_frame_reader_selects_a_segment(tmp_path):
+    clip = make_clip(tmp_path / "clip.mp4", seconds=2, gop=12)
+    info = probe_video(str(clip))
+    reader = FrameReader("ffmpeg", str(clip), info, buffer_frames=4, start=0.5, frame_limit=10)
+    reader.start()
+    assert len(list(reader)) == 10
+
+
+def test_frame_reader_raises_decoding_errors(tmp_path):
+    info = VideoInfo(64, 48, 24, frame_count=24, duration=1.0)
+    reader = FrameReader(sys.executable, str(tmp_path / "missing.mp4"), info, buffer_frames=2)
+    reader.cmd = [sys.executable, "-c", "import sys; sys.stderr.write('no such file'); sys.exit(1)"]
+    reader.start()
+    with pytest.raises(PipelineError, match="no such file"):
+        list(reader)
+
+
+def test_frame_writer_fails_instead_of_hanging_when_encoder_exits(tmp_path):
+    encoder = tmp_path / "failing-ffmpeg"
+    encoder.write_text(FAILING_ENCODER)
+    encoder.chmod(0o755)
+    writer = FrameWriter(str(encoder), str(tmp_path / "out.mp4"), 256, 256, 24, encoder_args=[], max_chunks=2)
+    writer.start()
+    chunk = [np.zeros((256, 256, 3), dtype=np.uint8)] * 8  # 1.5 MB per chunk
+    outcome = {}
+
+    def produce():
+        try:
+            for _ in range(50):
+                writer.write(chunk)
+            writer.close()
+        except Exception as e:
+            outcome["error"] = e
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    producer.join(timeout=20)
+    assert not producer.is_alive(), "producer still blocked on the writer queue"
+    assert isinstance(outcome.get("error"), (BrokenPipeError, PipelineError))
+
+    # close() reports the encoder's own error once the writer has stopped
+    with pytest.raises(PipelineError, match="encoder gave up"):
+        writer.close()
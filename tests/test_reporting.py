@@ -0,0 +1,75 @@
+import json
+import sys
+
+import pytest
+
+from clips import make_clip, needs_ffmpeg
+from video_enhancer import PipelineError
+from video_enhancer.reporting import DiskUsageMonitor, RunMetrics, run_with_progress
+
+
+def test_run_with_progress_counts_output_pngs(tmp_path):
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    script = f"import pathlib; [pathlib.Path(r'{out_dir}', f'{{i}}.png').write_bytes(b'') for i in range(3)]"
+    run_with_progress([[sys.executable, "-c", script]] * 2, "Writing", total=3, out_dir=out_dir)
+    assert len(list(out_dir.glob("*.png"))) == 3
+
+
+def test_run_with_progress_reports_the_stderr_tail():
+    failing = [sys.executable, "-c", "import sys; print('lots of noise\\n' * 500 + 'real cause', file=sys.stderr);"
+               " sys.exit(3)"]
+    with pytest.raises(PipelineError, match="(?s)^Upscaling failed: .*real cause$") as failure:
+        run_with_progress([[sys.executable, "-c", "pass"], failing], "Upscaling", error="Upscaling failed")
+    assert str(failure.value).count("lots of noise") < 40  # only the tail is kept
+
+
+def test_disk_usage_monitor_keeps_the_peak(tmp_path):
+    monitor = DiskUsageMonitor(tmp_path, interval=60)
+    (tmp_path / "big").write_bytes(b"x" * 5000)
+    monitor.sample()
+    (tmp_path / "big").unlink()
+    (tmp_path / "small").write_bytes(b"x" * 100)
+    monitor.start()
+    assert monitor.stop() == 5000
+
+
+def test_run_metrics_report(tmp_path):
+    metrics = RunMetrics("in.mp4", "out.mp4", "streaming", {"crf": 18})
+    metrics.add_stage("upscale", 2.0, 100, workers=2, shards=3)
+    metrics.add_stage("encode", 0.0, 100)
+    metrics.record_disk(300)
+    metrics.record_disk(200)
+    report = metrics.write(tmp_path / "metrics.json", status="ok", output_frames=100)
+    assert report == json.loads((tmp_path / "metrics.json").read_text())
+    assert report["stages"][0] == {"name": "upscale", "workers": 2, "seconds": 2.0, "frames": 100, "fps": 50.0,
+                                   "shards": 3}
+    assert report["stages"][1]["fps"] is None
+    assert report["peak_disk_bytes"] == 300
+    assert report["output_fps"] > 0 and report["settings"] == {"crf": 18}
+
+
+@needs_ffmpeg
+def test_enhance_writes_a_metrics_report(tmp_path, cpu_enhancer):
+    clip = make_clip(tmp_path / "clip.mp4", seconds=0.5)
+    output = tmp_path / "out.mp4"
+    frames = cpu_enhancer.enhance(str(clip), str(output), skip_interpolation=True, chunk_size=5,
+                                  work_root=str(tmp_path / "work"))
+    report = json.loads((tmp_path / "out.metrics.json").read_text())
+    assert report["status"] == "ok"
+    assert report["mode"] == "streaming"
+    assert report["output_frames"] == frames == 12
+    assert {"decode", "upscale", "encode"} <= {s["name"] for s in report["stages"]}
+    assert report["peak_disk_bytes"] > 0
+
+
+@needs_ffmpeg
+def test_failed_run_still_writes_its_report(tmp_path, cpu_enhancer):
+    broken = tmp_path / "broken.mp4"
+    broken.write_bytes(b"not a video")
+    metrics_json = tmp_path / "report.json"
+    with pytest.raises(PipelineError):
+        cpu_enhancer.enhance(str(broken), str(tmp_path / "out.mp4"), metrics_json=str(metrics_json))
+    report = json.loads(metrics_json.read_text())
+    assert report["status"] == "failed"
+    assert "ffprobe failed" in report["error"]
@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+from video_enhancer.scheduler import StageScheduler
+
+
+def test_items_pass_every_stage_in_order():
+    received = []
+    scheduler = StageScheduler([("double", lambda x, w: x * 2, 1), ("inc", lambda x, w: x + 1, 1)], queue_size=2)
+    stats = scheduler.run(range(20), received.append)
+    assert received == [x * 2 + 1 for x in range(20)]
+    assert [s.name for s in stats] == ["decode", "double", "inc", "encode"]
+    assert all(s.items == 20 for s in stats)
+
+
+def test_workers_of_a_stage_run_concurrently():
+    # Each item waits until three workers hold one at the same time
+    barrier = threading.Barrier(3, timeout=5)
+
+    def work(x, worker):
+        barrier.wait()
+        return x
+
+    received = []
+    StageScheduler([("work", work, 3)], queue_size=3).run(range(9), received.append)
+    assert sorted(received) == list(range(9))
+
+
+def test_source_stays_within_the_bounded_queues():
+    produced = []
+    release = threading.Event()
+
+    def source():
+        for x in range(100):
+            produced.append(x)
+            yield x
+
+    def slow(x, worker):
+        release.wait(5)
+        return x
+
+    scheduler = StageScheduler([("slow", slow, 1)], queue_size=1)
+    runner = threading.Thread(target=scheduler.run, args=(source(), lambda x: None))
+    runner.start()
+    time.sleep(0.5)
+    # One item in the worker, one queued and one in the source's hand at most
+    assert len(produced) <= 3
+    release.set()
+    runner.join(10)
+    assert len(produced) == 100
+
+
+def test_first_error_stops_the_pipeline():
+    def source():
+        x = 0
+        while True:  # never ends on its own
+            yield x
+            x += 1
+
+    def fail(x, worker):
+        if x == 5:
+            raise ValueError("stage failed")
+        return x
+
+    with pytest.raises(ValueError, match="stage failed"):
+        StageScheduler([("fail", fail, 2)], queue_size=2).run(source(), lambda x: None)
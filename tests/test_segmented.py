@@ -0,0 +1,148 @@
+import json
+import math
+import os
+from fractions import Fraction
+
+import pytest
+
+from clips import decoded_frames, make_clip, needs_ffmpeg
+from video_enhancer import PipelineError
+from video_enhancer.media import VideoInfo, probe_video
+from video_enhancer.segmented import SegmentManifest, plan_segments
+
+
+def test_plan_segments_splits_at_keyframes():
+    info = VideoInfo(64, 48, Fraction(24), frame_count=240, duration=10.0)
+    keyframes = [0.0, 0.5, 2.5, 3.0, 4.5, 5.5, 8.5, 9.5]
+    segments = plan_segments(info, keyframes, segment_seconds=2)
+    assert [s["start"] for s in segments] == [0.0, 2.5, 4.5, 8.5]
+    assert [s["frames"] for s in segments] == [60, 48, 96, None]
+    assert plan_segments(info, keyframes, segment_seconds=0) == [{"index": 0, "start": 0.0, "frames": None}]
+
+
+@pytest.fixture
+def segments():
+    return [{"index": 0, "start": 0.0, "frames": 48}, {"index": 1, "start": 2.0, "frames": None}]
+
+
+def test_manifest_resumes_finished_segments(tmp_path, segments):
+    path = tmp_path / "manifest.json"
+    manifest = SegmentManifest.load_or_create(path, "job-a", segments)
+    output = tmp_path / "seg_00000.mp4"
+    output.write_bytes(b"encoded")
+    manifest.mark_done(0, str(output), 120)
+
+    resumed = SegmentManifest.load_or_create(path, "job-a", segments)
+    assert [resumed.is_done(s) for s in resumed.segments] == [True, False]
+    assert resumed.segments[0]["frames_written"] == 120
+    assert not path.with_suffix(".tmp").exists()
+
+
+@pytest.mark.parametrize("change", ["other settings", "fresh", "segment missing", "output deleted", "corrupt"])
+def test_manifest_starts_over(tmp_path, segments, change):
+    path = tmp_path / "manifest.json"
+    output = tmp_path / "seg_00000.mp4"
+    output.write_bytes(b"encoded")
+    SegmentManifest.load_or_create(path, "job-a", segments).mark_done(0, str(output), 120)
+
+    key, fresh = "job-a", False
+    if change == "other settings":
+        key = "job-b"
+    elif change == "fresh":
+        fresh = True
+    elif change == "segment missing":
+        segments = segments[:1]
+    elif change == "output deleted":
+        output.unlink()
+    else:
+        path.write_text("{not json")
+    manifest = SegmentManifest.load_or_create(path, key, segments, fresh=fresh)
+    assert not any(manifest.is_done(s) for s in manifest.segments)
+
+
+@needs_ffmpeg
+def test_concat_segments_joins_without_reencoding(tmp_path, cpu_enhancer):
+    parts = [make_clip(tmp_path / f"part{i}.mp4", seconds=1) for i in range(3)]
+    output = tmp_path / "joined.mp4"
+    cpu_enhancer.concat_segments([str(p) for p in parts], str(output), tmp_path)
+    assert decoded_frames(output) == 3 * decoded_frames(parts[0])
+
+    single = tmp_path / "single.mp4"
+    cpu_enhancer.concat_segments([str(parts[0])], str(single), tmp_path)
+    assert single.read_bytes() == parts[0].read_bytes()
+
+
+@needs_ffmpeg
+def test_segment_chunks_cover_each_segment_once(tmp_path, cpu_enhancer):
+    clip = make_clip(tmp_path / "clip.mp4", seconds=3)
+    info = probe_video(str(clip))
+    segments = [{"index": 0, "start": 0.0, "frames": 36}, {"index": 1, "start": 1.5, "frames": None}]
+    chunks = list(cpu_enhancer.segment_chunks(str(clip), info, segments, Fraction(2), chunk_size=10))
+
+    first = [c for c in chunks if c.segment == 0]
+    second = [c for c in chunks if c.segment == 1]
+    # Segment 0 decodes segment 1's first frame as a lookahead in its final chunk
+    assert [len(c.frames) for c in first] == [10, 10, 10, 7]
+    assert first[-1].final and first[-1].lookahead and first[-1].source_frames == 6
+    assert [c.base for c in first] == [0, 10, 20, 30]
+    assert sum(c.source_frames for c in second) == 36
+    assert second[0].base == 36 and second[0].previous is None
+    assert second[-1].final and not second[-1].lookahead
+    assert second[-1].pad == 1  # ×2: one frame after the last source frame
+
+
+@needs_ffmpeg
+@pytest.mark.parametrize("png_frames, frame_store", [(False, False), (True, False), (False, True)])
+def test_frame_count_divisible_by_chunk_size(tmp_path, cpu_enhancer, png_frames, frame_store):
+    clip = make_clip(tmp_path / "clip.mp4", seconds=1)  # 24 frames, three chunks of 8
+    output = tmp_path / "out.mp4"
+    frames = cpu_enhancer.enhance(str(clip), str(output), skip_upscale=True, chunk_size=8, segment_seconds=0,
+                                  streaming=not png_frames, frame_store=frame_store,
+                                  work_root=str(tmp_path / "work"))
+    assert frames == decoded_frames(output) == 48
+
+
+def os_stat_mtime(path: str) -> int:
+    return os.stat(path).st_mtime_ns
+
+
+def failing_upscaler(enhancer, fail_on_call: int):
+    calls = []
+    upscale = enhancer.upscale_chunk
+
+    def upscale_chunk(frames, work_dir, scale=4):
+        calls.append(len(frames))
+        if len(calls) == fail_on_call:
+            raise PipelineError("upscaler crashed")
+        return upscale(frames, work_dir, scale)
+    enhancer.upscale_chunk = upscale_chunk
+    return calls
+
+
+@needs_ffmpeg
+def test_rerun_resumes_after_a_crash(tmp_path, cpu_enhancer):
+    clip = make_clip(tmp_path / "clip.mp4", seconds=4, fps="24000/1001")
+    output = tmp_path / "out.mp4"
+    options = dict(target_fps=60, chunk_size=10, segment_seconds=1, work_root=str(tmp_path / "work"),
+                   keep_work=True)
+
+    calls = failing_upscaler(cpu_enhancer, fail_on_call=8)
+    with pytest.raises(PipelineError, match="upscaler crashed"):
+        cpu_enhancer.enhance(str(clip), str(output), **options)
+    crashed = json.loads((tmp_path / "out.metrics.json").read_text())
+    assert crashed["status"] == "failed"
+    manifest = json.loads(next((tmp_path / "work").glob("*/manifest.json")).read_text())
+    finished = [s for s in manifest["segments"] if s["done"]]
+    assert finished and len(finished) < len(manifest["segments"])
+    finished_mtimes = [os_stat_mtime(s["output"]) for s in finished]
+
+    calls.clear()
+    frames = cpu_enhancer.enhance(str(clip), str(output), **options)
+    report = json.loads((tmp_path / "out.metrics.json").read_text())
+    assert report["status"] == "ok"
+    assert report["resumed_segments"] == len(finished)
+    assert sum(calls) < decoded_frames(clip) * 5 / 2  # finished segments were not upscaled again
+    assert [os_stat_mtime(s["output"]) for s in finished] == finished_mtimes
+
+    # Every output frame exactly once: the segments meet without gaps or repeats
+    assert frames == decoded_frames(output) == math.ceil(decoded_frames(clip) * Fraction(5, 2))
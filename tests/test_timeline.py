@@ -0,0 +1,85 @@
+from fractions import Fraction
+import math
+
+import numpy as np
+import pytest
+
+from video_enhancer.scheduler import split_chunks
+from video_enhancer.timeline import classify_pairs, interpolation_ratio, output_positions, tail_frames
+
+NTSC_FILM = Fraction(24000, 1001)
+
+
+@pytest.mark.parametrize("source, target, ratio", [
+    (NTSC_FILM, 60, Fraction(5, 2)),                # 23.976 → 59.94
+    (Fraction(25), 60, Fraction(12, 5)),
+    (Fraction(30000, 1001), "60000/1001", Fraction(2)),
+    (Fraction(30), None, Fraction(2)),
+])
+def test_interpolation_ratio(source, target, ratio):
+    assert interpolation_ratio(source, target) == ratio
+
+
+def chunked_positions(frame_count: int, chunk_size: int, ratio: Fraction) -> list:
+    """Video-wide output positions as the pipeline produces them chunk by chunk"""
+    positions = []
+    for chunk in split_chunks(range(frame_count), 0, 0, chunk_size, ratio=ratio):
+        has_previous = chunk.previous is not None
+        start = chunk.base - has_previous
+        count = len(chunk.frames) + has_previous
+        positions += [start + p for p in output_positions(start, count, ratio, include_first=not has_previous)]
+        positions += [positions[-1]] * chunk.pad
+    return positions
+
+
+@pytest.mark.parametrize("ratio", [Fraction(5, 2), Fraction(12, 5), Fraction(2), Fraction(3, 8)])
+@pytest.mark.parametrize("chunk_size", [1, 4, 7, 23, 100])
+def test_chunks_sample_one_grid_for_fractional_ratios(ratio, chunk_size):
+    frame_count = 23
+    positions = chunked_positions(frame_count, chunk_size, ratio)
+
+    # Output frame j sits at source position j / ratio, whatever the chunking
+    on_grid = [Fraction(j) / ratio for j in range(int((frame_count - 1) * ratio) + 1)]
+    assert positions[:len(on_grid)] == on_grid
+    # and the tail holds the last frame so the output lasts as long as the source
+    assert len(positions) == math.ceil(frame_count * ratio)
+    assert positions[len(on_grid):] == [on_grid[-1]] * tail_frames(frame_count, ratio)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 8])
+def test_last_chunk_is_final_when_frames_divide_evenly(chunk_size):
+    chunks = list(split_chunks(range(8), 0, 0, chunk_size, ratio=Fraction(2)))
+    assert [c.final for c in chunks] == [False] * (len(chunks) - 1) + [True]
+    assert sum(c.source_frames for c in chunks) == 8
+    assert chunks[-1].pad == 1
+
+
+def test_segment_boundary_belongs_to_the_next_segment():
+    ratio = Fraction(5, 2)
+    # Segment 0: frames 0..9 plus the lookahead frame 10; segment 1 starts at frame 10
+    first = output_positions(0, 11, ratio, include_last=False)
+    second = output_positions(10, 5, ratio)
+    assert max(first) < 10
+    assert second[0] == 0
+    assert sorted(first + [10 + p for p in second]) == [Fraction(j) / ratio for j in range(36)]
+
+
+def blocks(seed: int, shift: int = 0):
+    """128x128 frame of 16-pixel random gray blocks, shifted right by shift pixels"""
+    rng = np.random.default_rng(seed)
+    gray = np.kron(rng.integers(40, 216, (8, 8)), np.ones((16, 16))).astype(np.uint8)
+    return np.repeat(np.roll(gray, shift, axis=1)[..., None], 3, axis=2)
+
+
+def test_classify_pairs_detects_static_motion_and_cuts():
+    dark = np.full((128, 128, 3), 20, np.uint8)
+    bright = np.full((128, 128, 3), 235, np.uint8)
+    frames = [blocks(1), blocks(1), blocks(1, shift=16), dark, dark, bright]
+    assert classify_pairs(frames) == ["static", "motion", "cut", "static", "cut"]
+
+
+def test_classify_pairs_thresholds_of_zero_disable_the_checks():
+    dark = np.full((128, 128, 3), 20, np.uint8)
+    bright = np.full((128, 128, 3), 235, np.uint8)
+    assert classify_pairs([dark, dark, bright], scene_threshold=0, static_threshold=0) == ["motion", "motion"]
+    assert classify_pairs([dark]) == []
@@ -0,0 +1,72 @@
+"""
+High-Performance Video Enhancement Pipeline
+Uses RIFE (frame interpolation) and Real-ESRGAN (upscaling) with Vulkan acceleration.
+Each stage has pluggable backends: the NCNN binaries, or CPU-only OpenCV
+fallbacks (Farneback optical-flow interpolation, Lanczos or EDSR upscaling)
+that are picked automatically when the binaries aren't installed.
+
+Interpolation converts the source frame rate to --target-fps by any ratio
+(×2 by default). Output frames sit on one grid across the whole video, so
+chunks and segments join seamlessly. Frames across a scene cut are repeated,
+and static stretches are blended, instead of running the model on them.
+
+Encoding uses a profile (--encoder): fast/balanced/archival presets plus x265
+and SVT-AV1 options; --benchmark-encoders compares them on a sample.
+
+By default frames are streamed: ffmpeg decodes raw frames to a pipe, small
+chunks pass through RIFE/Real-ESRGAN, and the results are piped straight into
+the encoding ffmpeg. Only one chunk of frames is on disk at a time, instead of
+three full PNG copies of the video (--png-frames keeps the old behaviour).
+For short clips, --frame-store instead keeps every stage's frames in one
+uint8 array (RAM up to --memory-budget, then a memory-mapped raw file), which
+ffmpeg decodes into and encodes from directly.
+
+Long videos are split into keyframe-aligned segments that are enhanced and
+encoded independently. A manifest in the job's work directory records finished
+segments, so rerunning the same command after a crash resumes where it stopped;
+the segments are joined losslessly (stream copy) at the end.
+
+The stages overlap: decoding, interpolation, upscaling and encoding each run in
+their own threads connected by bounded queues, with a configurable number of
+workers for the interpolation and upscaling stages. A per-stage utilization
+table printed at the end shows which stage is the bottleneck.
+
+Upscaling can be sharded across several Real-ESRGAN processes, each with its
+own tile/thread/device settings (--upscale-shards, or 'auto' to measure the
+fastest count). stub_upscaler.py stands in for Real-ESRGAN on machines
+without a GPU.
+
+Subprocess stages report live progress (ffmpeg via -progress, the NCNN binaries
+by counting the frames they have written), and every run writes a JSON report
+with per-stage time and fps and the peak size of the work directory
+(--metrics-json), so throughput can be compared across versions.
+
+Batch mode: give a directory, a glob pattern or a .txt/.json manifest instead
+of a file. Dependencies are checked once, up to --batch-jobs videos run at a
+time, and outputs already made from the same input content and settings are
+skipped on reruns; a summary is written to batch_report.json.
+
+Layout: common (shared settings), media (ffmpeg pipes, encoder profiles),
+timeline (output frame positions, cut/static detection), scheduler (chunks and
+the stage pipeline), backends, reporting (progress, metrics), the modes
+segmented / png_frames / frame_store / batch mixed into VideoEnhancer
+(pipeline), and cli. enhancer.py at the repository root runs cli.main().
+"""
+from .backends import (INTERPOLATION_BACKENDS, UPSCALE_BACKENDS, FarnebackInterpolator, OpenCVUpscaler,
+                       RealEsrganNcnnUpscaler, RifeNcnnInterpolator)
+from .batch import BatchState, batch_key, collect_batch_inputs, file_digest, is_batch_input
+from .common import PipelineError, WORK_ROOT
+from .frame_store import FrameStore
+from .media import ENCODER_PROFILES, EncoderProfile, VideoInfo, probe_video
+from .pipeline import VideoEnhancer
+from .reporting import RunMetrics
+from .segmented import SegmentManifest, job_key, plan_segments
+from .timeline import classify_pairs, interpolation_ratio, output_positions
+
+__all__ = [
+    "VideoEnhancer", "PipelineError", "WORK_ROOT", "VideoInfo", "probe_video", "EncoderProfile",
+    "ENCODER_PROFILES", "INTERPOLATION_BACKENDS", "UPSCALE_BACKENDS", "RifeNcnnInterpolator",
+    "FarnebackInterpolator", "RealEsrganNcnnUpscaler", "OpenCVUpscaler", "FrameStore", "RunMetrics",
+    "SegmentManifest", "plan_segments", "job_key", "BatchState", "batch_key", "collect_batch_inputs",
+    "file_digest", "is_batch_input", "interpolation_ratio", "output_positions", "classify_pairs",
+]
@@ -0,0 +1,430 @@
+"""Stage backends: RIFE and Real-ESRGAN through their NCNN binaries, and the OpenCV CPU fallbacks."""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from fractions import Fraction
+from pathlib import Path
+import hashlib
+import math
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+from tqdm import tqdm
+
+from .common import DEFAULT_CHUNK_FRAMES, PipelineError
+from .media import read_png_dir, write_png_frames
+from .reporting import run_with_progress
+from .scheduler import split_chunks
+
+
+def ncnn_executable(bin_dir: Path, name: str) -> Path:
+    """Locate an NCNN tool: bin_dir/<name>/<name>, bin_dir/<name>, then PATH.
+    Windows builds are <name>.exe, Linux and macOS builds have no extension."""
+    exe = f"{name}.exe" if os.name == "nt" else name
+    candidates = [bin_dir / name / exe, bin_dir / exe]
+    for path in candidates:
+        if path.exists():
+            return path
+    found = shutil.which(name)
+    return Path(found) if found else candidates[0]
+
+
+def run_ncnn_on_frames(frames: list, work_dir: Path, build_cmd) -> list:
+    """Run an NCNN binary over one chunk of in-memory frames.
+    The chunk is written to work_dir/in, processed into work_dir/out, read back and
+    deleted, so at most one chunk is on disk. PNG compression is kept at the minimum:
+    these files are read once and thrown away."""
+    import cv2
+    in_dir = work_dir / "in"
+    out_dir = work_dir / "out"
+    for d in (in_dir, out_dir):
+        shutil.rmtree(d, ignore_errors=True)
+        d.mkdir(parents=True)
+    try:
+        for i, frame in enumerate(frames):
+            cv2.imwrite(str(in_dir / f"{i:08d}.png"), frame, [cv2.IMWRITE_PNG_COMPRESSION, 0])
+        cmd = build_cmd(str(in_dir), str(out_dir))
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise PipelineError(f"{Path(cmd[0]).name} failed: {result.stderr}")
+        return [cv2.imread(str(path), cv2.IMREAD_COLOR) for path in sorted(out_dir.glob("*.png"))]
+    finally:
+        shutil.rmtree(in_dir, ignore_errors=True)
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+def process_png_dir(frames_dir: Path, out_dir: Path, process, chunk_size: int = DEFAULT_CHUNK_FRAMES,
+                    desc: str = "Processing") -> int:
+    """PNG mode for in-memory backends: feed frames_dir through process(chunk) chunk by chunk
+    and number the results 00000001.png, ... in out_dir. Returns the frame count."""
+    written = 0
+    with tqdm(total=len(list(Path(frames_dir).glob("*.png"))), unit="frame", desc=desc) as bar:
+        for chunk in split_chunks(read_png_dir(frames_dir), 0, 0, chunk_size):
+            written = write_png_frames(process(chunk.frames), out_dir, written)
+            bar.update(len(chunk.frames))
+    return written
+
+
+@dataclass
+class UpscaleShard:
+    """Settings of one Real-ESRGAN process when upscaling is sharded"""
+    tile: int = None        # -t tile size (0 = auto)
+    threads: str = None     # -j load:proc:save thread counts
+    gpu: str = None         # -g device id
+
+    def args(self) -> list:
+        args = []
+        if self.tile is not None:
+            args += ["-t", str(self.tile)]
+        if self.threads:
+            args += ["-j", self.threads]
+        if self.gpu is not None:
+            args += ["-g", str(self.gpu)]
+        return args
+
+
+def build_upscale_shards(count: int, tiles: str = None, threads: str = None, gpus: str = None) -> list:
+    """count UpscaleShards. Each setting is a comma-separated list assigned to the shards in
+    turn, e.g. gpus="0,1" alternates two devices and threads="1:2:2" applies to every shard."""
+    def values(spec):
+        return [v.strip() for v in spec.split(",") if v.strip()] if spec else [None]
+    tiles, threads, gpus = values(tiles), values(threads), values(gpus)
+    return [UpscaleShard(tile=None if tiles[i % len(tiles)] is None else int(tiles[i % len(tiles)]),
+                         threads=threads[i % len(threads)], gpu=gpus[i % len(gpus)])
+            for i in range(max(1, count))]
+
+
+def split_evenly(items: list, parts: int) -> list:
+    """Split items into at most parts contiguous, non-empty runs of near-equal length"""
+    parts = max(1, min(parts, len(items)))
+    size, extra = divmod(len(items), parts)
+    runs, start = [], 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        runs.append(items[start:end])
+        start = end
+    return runs
+
+
+class StageBackend:
+    """One implementation of a pipeline stage"""
+
+    name = ""
+
+    def problem(self) -> str:
+        """Why this backend can't run here, or None if it can"""
+        return None
+
+    def describe(self) -> str:
+        return self.name
+
+    def settings(self) -> dict:
+        """What determines the frames this backend produces, for job and batch keys"""
+        return {"name": self.name}
+
+
+class InterpolationBackend(StageBackend):
+    def synthesize(self, inputs: list, requests: list, work_dir: Path) -> list:
+        """One in-between frame per (i, t) request: time t in (0, 1) between inputs[i] and inputs[i + 1]"""
+        raise NotImplementedError
+
+    def interpolate(self, inputs: list, positions: list, work_dir: Path, kinds: list = None) -> list:
+        """Return one frame per position (see output_positions) over inputs.
+        Whole positions are the source frames themselves. With kinds from classify_pairs,
+        frames across a scene cut repeat the nearest source frame and frames between static
+        neighbours are a plain blend, so only moving pairs reach synthesize()."""
+        import cv2
+        outputs = [None] * len(positions)
+        requests = []
+        for k, position in enumerate(positions):
+            i = math.floor(position)
+            t = position - i
+            kind = kinds[i] if kinds and t else "motion"
+            if not t:
+                outputs[k] = inputs[i]
+            elif kind == "cut":
+                outputs[k] = inputs[i] if t < Fraction(1, 2) else inputs[i + 1]
+            elif kind == "static":
+                outputs[k] = cv2.addWeighted(inputs[i], float(1 - t), inputs[i + 1], float(t), 0)
+            else:
+                requests.append((k, i, t))
+        if requests:
+            frames = self.synthesize(inputs, [(i, t) for _, i, t in requests], work_dir)
+            for (k, _, _), frame in zip(requests, frames):
+                outputs[k] = frame
+        return outputs
+
+
+class UpscaleBackend(StageBackend):
+    def upscale(self, frames: list, work_dir: Path, scale: int = 4) -> list:
+        raise NotImplementedError
+
+    def upscale_dir(self, frames_dir: Path, out_dir: Path, scale: int = 4) -> int:
+        return process_png_dir(frames_dir, out_dir, lambda chunk: self.upscale(
+            chunk, out_dir.parent / "upscale_tmp", scale), desc="Upscaling")
+
+
+class RifeNcnnInterpolator(InterpolationBackend):
+    """RIFE through rife-ncnn-vulkan (GPU)"""
+
+    name = "rife-ncnn"
+    model = "models-ensemble"
+
+    def __init__(self, exe: Path):
+        self.exe = exe
+
+    def problem(self) -> str:
+        return None if self.exe.exists() else f"RIFE executable not found: {self.exe}"
+
+    def describe(self) -> str:
+        return f"RIFE: {self.exe}"
+
+    def settings(self) -> dict:
+        return {"name": self.name, "exe": str(self.exe), "model": self.model}
+
+    def synthesize(self, inputs: list, requests: list, work_dir: Path) -> list:
+        """Requested pairs that follow each other go through one RIFE run over their frames.
+        RIFE places output n of count at source position n * frames / count, so
+        count = steps * frames, with steps the common denominator of the requested times,
+        puts every requested time on an output."""
+        runs = []
+        for i in sorted({i for i, _ in requests}):
+            if runs and runs[-1][-1] == i - 1:
+                runs[-1].append(i)
+            else:
+                runs.append([i])
+        results = {}
+        for run in runs:
+            first, last = run[0], run[-1] + 1
+            times = [(i, t) for i, t in requests if first <= i < last]
+            steps = math.lcm(*(t.denominator for _, t in times))
+            frames = inputs[first:last + 1]
+            count = steps * len(frames)
+            outputs = run_ncnn_on_frames(frames, work_dir, lambda src, dst: [
+                str(self.exe),
+                "-i", src,
+                "-o", dst,
+                "-m", self.model,
+                "-n", str(count)
+            ])
+            if len(outputs) != count:
+                raise PipelineError(f"RIFE produced {len(outputs)} frames, expected {count}")
+            for i, t in times:
+                results[(i, t)] = outputs[(i - first) * steps + int(t * steps)]
+        return [results[request] for request in requests]
+
+
+class FarnebackInterpolator(InterpolationBackend):
+    """CPU fallback: dense Farneback optical flow between neighbouring frames. Each
+    in-between frame blends both neighbours warped along the flow to its time step."""
+
+    name = "farneback"
+
+    def __init__(self):
+        self._grids = {}
+
+    def problem(self) -> str:
+        try:
+            import cv2  # noqa: F401
+            import numpy  # noqa: F401
+        except ImportError:
+            return "Farneback interpolation needs opencv-python and numpy"
+        return None
+
+    def describe(self) -> str:
+        return "Farneback optical flow (OpenCV, CPU)"
+
+    def _grid(self, height: int, width: int):
+        import numpy as np
+        grid = self._grids.get((height, width))
+        if grid is None:
+            ys, xs = np.indices((height, width), dtype=np.float32)
+            grid = self._grids[(height, width)] = (xs, ys)
+        return grid
+
+    def synthesize(self, inputs: list, requests: list, work_dir: Path) -> list:
+        import cv2
+        xs, ys = self._grid(*inputs[0].shape[:2])
+        flows = {}
+        outputs = []
+        for i, t in requests:
+            a, b = inputs[i], inputs[i + 1]
+            if i not in flows:
+                flows[i] = cv2.calcOpticalFlowFarneback(
+                    cv2.cvtColor(a, cv2.COLOR_BGR2GRAY), cv2.cvtColor(b, cv2.COLOR_BGR2GRAY), None,
+                    0.5, 3, 15, 3, 5, 1.2, 0)
+            fx, fy = flows[i][..., 0], flows[i][..., 1]
+            t = float(t)
+            # A pixel at x at time t came from about x - t*flow in a and x + (1-t)*flow in b
+            from_a = cv2.remap(a, xs - t * fx, ys - t * fy, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+            from_b = cv2.remap(b, xs + (1 - t) * fx, ys + (1 - t) * fy, cv2.INTER_LINEAR,
+                               borderMode=cv2.BORDER_REPLICATE)
+            outputs.append(cv2.addWeighted(from_a, 1 - t, from_b, t, 0))
+        return outputs
+
+
+class RealEsrganNcnnUpscaler(UpscaleBackend):
+    """Real-ESRGAN through realesrgan-ncnn-vulkan, optionally sharded across processes"""
+
+    name = "realesrgan-ncnn"
+    model = "realesrgan-x4plus-anime"
+
+    def __init__(self, exe: Path, shards: int = 1, tiles: str = None, threads: str = None, gpus: str = None):
+        self.exe = exe
+        self.shard_settings = {"tiles": tiles, "threads": threads, "gpus": gpus}
+        self.shards = build_upscale_shards(shards, **self.shard_settings)
+
+    def problem(self) -> str:
+        return None if self.exe.exists() else f"Real-ESRGAN executable not found: {self.exe}"
+
+    def describe(self) -> str:
+        return f"Real-ESRGAN: {self.exe}"
+
+    def settings(self) -> dict:
+        """Tiles are included: Real-ESRGAN output differs slightly along tile seams"""
+        return {"name": self.name, "exe": str(self.exe), "model": self.model,
+                "tiles": self.shard_settings["tiles"]}
+
+    def _cmd(self, src: str, dst: str, scale: int, shard: UpscaleShard) -> list:
+        return [
+            str(self.exe),
+            "-i", src,
+            "-o", dst,
+            "-s", str(scale),
+            "-m", self.model,
+            "-n", "4",
+            "-f", "png"
+        ] + shard.args()
+
+    def upscale(self, frames: list, work_dir: Path, scale: int = 4, shards: list = None) -> list:
+        """The chunk is split into one contiguous run per shard, upscaled by concurrent
+        processes in separate work directories and concatenated back in order."""
+        shards = shards or self.shards
+        runs = split_evenly(list(frames), len(shards))
+
+        def upscale_run(i: int) -> list:
+            run_dir = work_dir / f"shard-{i}" if len(runs) > 1 else work_dir
+            return run_ncnn_on_frames(runs[i], run_dir, lambda src, dst: self._cmd(src, dst, scale, shards[i]))
+
+        if len(runs) > 1:
+            with ThreadPoolExecutor(max_workers=len(runs)) as pool:
+                outputs = [frame for run in pool.map(upscale_run, range(len(runs))) for frame in run]
+        else:
+            outputs = upscale_run(0)
+        if len(outputs) != len(frames):
+            raise PipelineError(f"Real-ESRGAN produced {len(outputs)} frames, expected {len(frames)}")
+        return outputs
+
+    def upscale_dir(self, frames_dir: Path, out_dir: Path, scale: int = 4) -> int:
+        """Frames are split into contiguous runs, each upscaled by its own process into the
+        shared output directory; file names are kept, so the merged output stays in order."""
+        files = sorted(Path(frames_dir).glob("*.png"))
+        runs = split_evenly(files, len(self.shards))
+        shard_dirs = [Path(frames_dir)]
+        if len(runs) > 1:
+            shard_dirs = []
+            for i, run in enumerate(runs):
+                shard_dir = Path(frames_dir).parent / f"upscale_shard_{i}"
+                shutil.rmtree(shard_dir, ignore_errors=True)
+                shard_dir.mkdir(parents=True)
+                for path in run:
+                    try:
+                        os.link(path, shard_dir / path.name)
+                    except OSError:
+                        shutil.copy2(path, shard_dir / path.name)
+                shard_dirs.append(shard_dir)
+
+        try:
+            run_with_progress([self._cmd(str(shard_dir), str(out_dir), scale, shard)
+                               for shard_dir, shard in zip(shard_dirs, self.shards)],
+                              "Upscaling", total=len(files), out_dir=out_dir, error="Upscaling failed")
+        finally:
+            if len(runs) > 1:
+                for shard_dir in shard_dirs:
+                    shutil.rmtree(shard_dir, ignore_errors=True)
+        return len(list(out_dir.glob("*.png")))
+
+    def autotune(self, sample: list, work_dir: Path, scale: int = 4, max_shards: int = None) -> int:
+        """Time the sample frames with 1, 2, 4, ... shards and keep the fastest count.
+        Doubling stops once it gains less than 5% frames/sec (or there are fewer frames than shards)."""
+        max_shards = max_shards or os.cpu_count() or 1
+        print(f"🔧 Auto-tuning upscale shards on {len(sample)} frames...")
+        best_count, best_fps = 1, 0.0
+        count = 1
+        try:
+            while count <= min(max_shards, len(sample)):
+                shards = build_upscale_shards(count, **self.shard_settings)
+                started = time.perf_counter()
+                self.upscale(sample, work_dir, scale, shards=shards)
+                fps = len(sample) / max(time.perf_counter() - started, 1e-6)
+                print(f"   {count} shard(s): {fps:.1f} frames/s")
+                if fps < best_fps * 1.05:
+                    break
+                best_count, best_fps = count, fps
+                count *= 2
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        self.shards = build_upscale_shards(best_count, **self.shard_settings)
+        print(f"   Using {best_count} shard(s)\n")
+        return best_count
+
+
+class OpenCVUpscaler(UpscaleBackend):
+    """CPU fallback: Lanczos resampling, or the EDSR super-resolution network through
+    OpenCV's dnn_superres module (opencv-contrib-python plus an EDSR_x<scale>.pb model)."""
+
+    def __init__(self, method: str = "lanczos", model_path: str = None):
+        self.method = method
+        self.name = method
+        self.model_path = model_path
+        self._local = threading.local()  # dnn_superres models aren't shared between threads
+
+    def problem(self) -> str:
+        try:
+            import cv2
+        except ImportError:
+            return f"{self.method} upscaling needs opencv-python"
+        if self.method == "edsr":
+            if not hasattr(cv2, "dnn_superres"):
+                return "EDSR upscaling needs opencv-contrib-python (cv2.dnn_superres)"
+            if not self.model_path or not Path(self.model_path).exists():
+                return f"EDSR model not found: {self.model_path} (pass --edsr-model EDSR_x4.pb)"
+        return None
+
+    def describe(self) -> str:
+        if self.method == "edsr":
+            return f"EDSR (OpenCV dnn_superres, CPU): {self.model_path}"
+        return "Lanczos (OpenCV, CPU)"
+
+    def settings(self) -> dict:
+        """EDSR is identified by its model file's contents as well as its path"""
+        if self.method != "edsr":
+            return {"name": self.name}
+        digest = None
+        if self.model_path and Path(self.model_path).is_file():
+            digest = hashlib.sha256(Path(self.model_path).read_bytes()).hexdigest()
+        return {"name": self.name, "model": str(self.model_path), "model_sha256": digest}
+
+    def _model(self, scale: int):
+        import cv2
+        model = getattr(self._local, "model", None)
+        if model is None or self._local.scale != scale:
+            model = cv2.dnn_superres.DnnSuperResImpl_create()
+            model.readModel(str(self.model_path))
+            model.setModel("edsr", scale)
+            self._local.model, self._local.scale = model, scale
+        return model
+
+    def upscale(self, frames: list, work_dir: Path, scale: int = 4) -> list:
+        import cv2
+        if self.method == "edsr":
+            model = self._model(scale)
+            return [model.upsample(frame) for frame in frames]
+        return [cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_LANCZOS4)
+                for frame in frames]
+
+
+INTERPOLATION_BACKENDS = ("auto", "rife-ncnn", "farneback")
+UPSCALE_BACKENDS = ("auto", "realesrgan-ncnn", "lanczos", "edsr")
@@ -0,0 +1,205 @@
+"""Batch mode: many videos from a directory, glob or manifest, skipping outputs already made."""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import glob
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from .common import DEFAULT_CHUNK_FRAMES, DEFAULT_SEGMENT_SECONDS, PipelineError
+from .media import DEFAULT_ENCODER_PROFILE
+from .reporting import print_batch_report
+
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".mov", ".avi", ".webm", ".m4v", ".wmv", ".flv", ".mpg", ".mpeg", ".ts")
+
+
+def is_batch_input(spec: str) -> bool:
+    """A directory, a glob pattern or a .txt/.json manifest rather than a single video"""
+    path = Path(spec)
+    if path.is_dir():
+        return True
+    if path.is_file():
+        return path.suffix.lower() in (".txt", ".json")
+    return any(c in spec for c in "*?[")
+
+
+def collect_batch_inputs(spec: str) -> list:
+    """Videos named by a directory (its video files), a glob pattern (** recurses) or a
+    manifest: .txt with one path per line (# comments) or .json with a list of paths.
+    Relative manifest paths are taken from the manifest's directory."""
+    path = Path(spec)
+    if path.is_dir():
+        inputs = sorted(p for p in path.iterdir() if p.is_file() and p.suffix.lower() in VIDEO_EXTENSIONS)
+    elif path.is_file() and path.suffix.lower() == ".json":
+        inputs = [path.parent / p for p in json.loads(path.read_text())]
+    elif path.is_file():
+        lines = (line.strip() for line in path.read_text().splitlines())
+        inputs = [path.parent / line for line in lines if line and not line.startswith("#")]
+    else:
+        inputs = sorted(Path(p) for p in glob.glob(spec, recursive=True)
+                        if Path(p).is_file() and Path(p).suffix.lower() in VIDEO_EXTENSIONS)
+    missing = [str(p) for p in inputs if not p.is_file()]
+    if missing:
+        raise PipelineError(f"Batch input(s) not found: {', '.join(missing)}")
+    return inputs
+
+
+def file_digest(path, block_bytes: int = 1 << 20) -> str:
+    """SHA-256 of the file contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_bytes), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def batch_key(content_digest: str, settings: dict) -> str:
+    """Identifies a batch output by input content (not path or mtime) and output-affecting settings"""
+    material = json.dumps({"sha256": content_digest, "settings": settings}, sort_keys=True)
+    return hashlib.sha1(material.encode()).hexdigest()
+
+
+class BatchState:
+    """JSON record of the outputs a batch has finished and the batch_key each was made with,
+    so a rerun skips them. Written atomically after every video, like SegmentManifest."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            self.outputs = json.loads(path.read_text()).get("outputs", {})
+        except (OSError, ValueError):
+            self.outputs = {}
+
+    def is_done(self, output: Path, key: str) -> bool:
+        entry = self.outputs.get(str(output))
+        return (bool(entry) and entry.get("key") == key and output.exists()
+                and output.stat().st_size == entry.get("bytes"))
+
+    def mark_done(self, output: Path, key: str, input_file: Path):
+        with self._lock:
+            self.outputs[str(output)] = {
+                "key": key,
+                "input": str(input_file),
+                "bytes": output.stat().st_size,
+                "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            }
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"outputs": self.outputs}, indent=2))
+            os.replace(tmp, self.path)
+
+
+class BatchMode:
+    """VideoEnhancer's batch mode (a directory, glob or manifest as input)"""
+
+    def batch_settings(self, skip_interpolation: bool = False, skip_upscale: bool = False, target_fps=None,
+                       encoder: str = DEFAULT_ENCODER_PROFILE, crf: int = None, **options) -> dict:
+        """Every setting that changes a batch output, for its batch_key: the stages that run
+        (see stage_settings), the encoder and how the mode cuts the encode into parts.
+        Options enhance() uses only for speed (chunk sizes, workers, memory) are left out."""
+        mode = "frame-store" if options.get("frame_store") else "streaming" if options.get("streaming", True) else "png"
+        settings = dict({"target_fps": None if skip_interpolation else target_fps,
+                         "skip_interpolation": skip_interpolation, "skip_upscale": skip_upscale,
+                         "encoder": encoder, "crf": crf, "mode": mode},
+                        **self.stage_settings(not skip_interpolation, not skip_upscale))
+        if mode == "streaming":
+            settings["segment_seconds"] = options.get("segment_seconds", DEFAULT_SEGMENT_SECONDS)
+        elif mode == "png":
+            settings["encode_jobs"] = options.get("encode_jobs", 1)
+        return settings
+
+    def run_batch(self, spec: str, output_dir: str = None, jobs: int = 1, report_path: str = None,
+                  skip_interpolation: bool = False, skip_upscale: bool = False,
+                  autotune_upscale: bool = False, fresh: bool = False,
+                  chunk_size: int = DEFAULT_CHUNK_FRAMES, work_root: str = None, target_fps=None,
+                  encoder: str = DEFAULT_ENCODER_PROFILE, crf: int = None, **options) -> None:
+        """Enhance every video named by spec (directory, glob or manifest) into output_dir,
+        up to jobs videos at a time; the remaining options are passed to enhance().
+        Dependencies are checked, and shard auto-tuning runs, once for the whole batch.
+        Outputs an earlier run finished from the same input content and settings are skipped
+        (unless fresh). The summary is written to report_path (default
+        <output_dir>/batch_report.json); the exit status is 1 if any video failed."""
+        try:
+            inputs = collect_batch_inputs(spec)
+        except (PipelineError, OSError, ValueError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        if not inputs:
+            print(f"❌ No videos found in {spec}")
+            sys.exit(1)
+
+        if not self.check_dependencies(interpolation=not skip_interpolation, upscaling=not skip_upscale,
+                                       encoder=encoder):
+            sys.exit(1)
+
+        output_dir = Path(output_dir or "enhanced")
+        outputs = [output_dir / f"{p.stem}_enhanced.mp4" for p in inputs]
+        clashes = sorted({str(o) for o in outputs if outputs.count(o) > 1})
+        if clashes:
+            print(f"❌ Several inputs would be written to {', '.join(clashes)}; rename them or split the batch")
+            sys.exit(1)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        settings = self.batch_settings(skip_interpolation, skip_upscale, target_fps, encoder, crf, **options)
+        state = BatchState(output_dir / "batch_state.json")
+        jobs = max(1, jobs)
+
+        print(f"🚀 Batch: {len(inputs)} video(s) → {output_dir}, {jobs} at a time\n")
+        started_at = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        started = time.perf_counter()
+        if autotune_upscale and not skip_upscale:
+            try:
+                self.autotune_from_video(str(inputs[0]), chunk_size, work_root)
+            except Exception as e:
+                print(f"❌ Shard auto-tuning failed: {e}")
+                sys.exit(1)
+
+        def run(input_file: Path, output_file: Path) -> dict:
+            job_started = time.perf_counter()
+            result = {"input": str(input_file), "output": str(output_file)}
+            try:
+                key = batch_key(file_digest(input_file), settings)
+                if not fresh and state.is_done(output_file, key):
+                    print(f"⏭️  {input_file.name}: already enhanced with these settings")
+                    result["status"] = "skipped"
+                else:
+                    print(f"▶️  {input_file.name}")
+                    frames = self.for_job().enhance(
+                        str(input_file), str(output_file), skip_interpolation, skip_upscale,
+                        chunk_size=chunk_size, work_root=work_root, fresh=fresh, target_fps=target_fps,
+                        encoder=encoder, crf=crf, **options)
+                    state.mark_done(output_file, key, input_file)
+                    result.update(status="done", frames=frames, bytes=output_file.stat().st_size)
+            except Exception as e:
+                print(f"❌ {input_file.name}: {e}")
+                result.update(status="failed", error=str(e))
+            result["seconds"] = round(time.perf_counter() - job_started, 3)
+            return result
+
+        pool = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="batch")
+        try:
+            results = list(pool.map(run, inputs, outputs))
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            print("\n⚠️  Batch interrupted by user; finished videos are skipped when it is rerun")
+            sys.exit(1)
+        pool.shutdown()
+        wall = time.perf_counter() - started
+
+        counts = {status: sum(r["status"] == status for r in results) for status in ("done", "skipped", "failed")}
+        report_path = Path(report_path or output_dir / "batch_report.json")
+        report_path.write_text(json.dumps(dict({
+            "input": spec,
+            "output_dir": str(output_dir),
+            "started_at": started_at,
+            "jobs": jobs,
+            "settings": settings,
+            "wall_seconds": round(wall, 3),
+        }, **counts, videos=results), indent=2))
+        print_batch_report(results, wall)
+        print(f"📄 Batch report: {report_path}")
+        if counts["failed"]:
+            sys.exit(1)
@@ -0,0 +1,392 @@
+"""Command line of the video enhancement pipeline (python enhancer.py --help)."""
+from fractions import Fraction
+import argparse
+import sys
+
+from .backends import INTERPOLATION_BACKENDS, UPSCALE_BACKENDS
+from .batch import is_batch_input
+from .common import (DEFAULT_BENCHMARK_FRAMES, DEFAULT_CHUNK_FRAMES, DEFAULT_MAX_INFLIGHT_CHUNKS,
+                     DEFAULT_MEMORY_BUDGET_MB, DEFAULT_SCENE_THRESHOLD, DEFAULT_SEGMENT_SECONDS,
+                     DEFAULT_STATIC_THRESHOLD, WORK_ROOT)
+from .media import DEFAULT_ENCODER_PROFILE, ENCODER_PROFILES
+from .pipeline import VideoEnhancer
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="High-Performance Video Enhancement with RIFE + Real-ESRGAN",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python enhancer.py video.mp4
+  python enhancer.py video.mp4 -o enhanced.mp4
+  python enhancer.py video.mp4 --skip-upscale
+  python enhancer.py video.mp4 --target-fps 60          # 24 → 60 fps interpolates ×2.5
+  python enhancer.py video.mp4 --bin-dir /custom/bin/path
+  python enhancer.py video.mp4 --chunk-size 64
+  python enhancer.py video.mp4 --png-frames
+  python enhancer.py clip.mp4 --frame-store --memory-budget 4096 --spill-dir /dev/shm
+  python enhancer.py video.mp4 --upscale-workers 2
+  python enhancer.py video.mp4 --upscale-shards auto --upscale-threads 1:2:2
+  python enhancer.py video.mp4 --esrgan-exe ./stub_upscaler.py --upscale-shards 4   # no GPU needed
+  python enhancer.py video.mp4 --interpolator farneback --upscaler lanczos          # CPU only
+  python enhancer.py video.mp4 --benchmark-backends
+  python enhancer.py video.mp4 --encoder x265 --crf 20
+  python enhancer.py video.mp4 --benchmark-encoders
+  python enhancer.py long_video.mp4 --segment-seconds 120   # rerun after a crash to resume
+  python enhancer.py clips/ --output-dir enhanced --batch-jobs 2
+  python enhancer.py "footage/**/*.mov" --encoder fast       # rerun skips finished videos
+  python enhancer.py videos.txt                              # one path per line
+        """
+    )
+    
+    parser.add_argument(
+        "input",
+        help="Input video file path, or for batch mode a directory, glob pattern or "
+             ".txt/.json manifest of videos"
+    )
+    
+    parser.add_argument(
+        "-o", "--output",
+        default=None,
+        help="Output video file path (default: {input}_enhanced.mp4)"
+    )
+    
+    parser.add_argument(
+        "--skip-interpolation",
+        action="store_true",
+        help="Skip frame interpolation (keep the source frame rate)"
+    )
+    
+    parser.add_argument(
+        "--skip-upscale",
+        action="store_true",
+        help="Skip upscaling (4K enhancement)"
+    )
+    
+    parser.add_argument(
+        "--bin-dir",
+        default="./bin",
+        help="Path to bin directory containing NCNN executables (default: ./bin)"
+    )
+    
+    parser.add_argument(
+        "--png-frames",
+        action="store_true",
+        help="Write every stage's frames to disk as PNG instead of streaming (debugging)"
+    )
+
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_FRAMES,
+        help=f"Frames per chunk handed to RIFE/Real-ESRGAN in streaming mode (default: {DEFAULT_CHUNK_FRAMES})"
+    )
+
+    parser.add_argument(
+        "--max-inflight",
+        type=int,
+        default=DEFAULT_MAX_INFLIGHT_CHUNKS,
+        help=f"Chunks buffered between stages in streaming mode (default: {DEFAULT_MAX_INFLIGHT_CHUNKS})"
+    )
+    
+    parser.add_argument(
+        "--interpolate-workers",
+        type=int,
+        default=1,
+        help="Chunks interpolated concurrently, one RIFE process each (default: 1)"
+    )
+
+    parser.add_argument(
+        "--upscale-workers",
+        type=int,
+        default=1,
+        help="Chunks upscaled concurrently, one Real-ESRGAN process each (default: 1)"
+    )
+
+    parser.add_argument(
+        "--target-fps",
+        default=None,
+        help="Output frame rate, e.g. 60 or 60000/1001; any ratio to the source works "
+             "(default: double the source frame rate)"
+    )
+
+    parser.add_argument(
+        "--scene-threshold",
+        type=float,
+        default=DEFAULT_SCENE_THRESHOLD,
+        help="Histogram distance (0-1) above which neighbouring frames count as a scene cut and are "
+             f"repeated instead of interpolated; 0 disables (default: {DEFAULT_SCENE_THRESHOLD})"
+    )
+
+    parser.add_argument(
+        "--static-threshold",
+        type=float,
+        default=DEFAULT_STATIC_THRESHOLD,
+        help="Mean difference in gray levels below which neighbouring frames count as static and are "
+             f"blended without the model; 0 disables (default: {DEFAULT_STATIC_THRESHOLD})"
+    )
+
+    parser.add_argument(
+        "--interpolator",
+        choices=INTERPOLATION_BACKENDS,
+        default="auto",
+        help="Interpolation backend: RIFE NCNN binary, or Farneback optical flow on the CPU "
+             "(default: auto = RIFE if installed)"
+    )
+
+    parser.add_argument(
+        "--upscaler",
+        choices=UPSCALE_BACKENDS,
+        default="auto",
+        help="Upscaling backend: Real-ESRGAN NCNN binary, or Lanczos / EDSR on the CPU "
+             "(default: auto = Real-ESRGAN if installed, else Lanczos)"
+    )
+
+    parser.add_argument(
+        "--edsr-model",
+        default=None,
+        help="EDSR_x<scale>.pb model for --upscaler edsr (needs opencv-contrib-python)"
+    )
+
+    parser.add_argument(
+        "--encoder",
+        choices=list(ENCODER_PROFILES),
+        default=DEFAULT_ENCODER_PROFILE,
+        help="Encoder profile: " + ", ".join(f"{p.name} = {p.description}" for p in ENCODER_PROFILES.values())
+             + f" (default: {DEFAULT_ENCODER_PROFILE})"
+    )
+
+    parser.add_argument(
+        "--crf",
+        type=int,
+        default=None,
+        help="Override the encoder profile's CRF quality (lower = better, larger files)"
+    )
+
+    parser.add_argument(
+        "--encode-jobs",
+        type=int,
+        default=1,
+        help="PNG mode: encode this many frame ranges in parallel and join them (streaming mode "
+             "already encodes each segment in its own process) (default: 1)"
+    )
+
+    parser.add_argument(
+        "--benchmark-backends",
+        action="store_true",
+        help="Time every available stage backend on the first --benchmark-frames frames of the input and exit"
+    )
+
+    parser.add_argument(
+        "--benchmark-encoders",
+        action="store_true",
+        help="Encode the first --benchmark-frames frames (at output size) with every encoder profile, "
+             "print fps and bitrate, and exit"
+    )
+
+    parser.add_argument(
+        "--benchmark-frames",
+        type=int,
+        default=DEFAULT_BENCHMARK_FRAMES,
+        help=f"Sample length for the benchmark modes (default: {DEFAULT_BENCHMARK_FRAMES})"
+    )
+
+    parser.add_argument(
+        "--upscale-shards",
+        default="1",
+        help="Real-ESRGAN processes each chunk is split across, or 'auto' to pick the fastest count "
+             "on a sample of the video (default: 1)"
+    )
+
+    parser.add_argument(
+        "--upscale-tile",
+        default=None,
+        help="Real-ESRGAN tile size (-t); comma-separated values are assigned to shards in turn"
+    )
+
+    parser.add_argument(
+        "--upscale-threads",
+        default=None,
+        help="Real-ESRGAN load:proc:save threads (-j), e.g. 1:2:2; comma-separated per shard"
+    )
+
+    parser.add_argument(
+        "--upscale-gpu",
+        default=None,
+        help="Real-ESRGAN device id (-g); comma-separated per shard, e.g. 0,1"
+    )
+
+    parser.add_argument(
+        "--esrgan-exe",
+        default=None,
+        help="Real-ESRGAN executable to use instead of the one in --bin-dir "
+             "(e.g. ./stub_upscaler.py to test without a GPU)"
+    )
+
+    parser.add_argument(
+        "--segment-seconds",
+        type=float,
+        default=DEFAULT_SEGMENT_SECONDS,
+        help=f"Split into keyframe-aligned segments of about this length; 0 = one segment (default: {DEFAULT_SEGMENT_SECONDS})"
+    )
+
+    parser.add_argument(
+        "--work-dir",
+        default=None,
+        help=f"Root for per-job work directories with the resume manifest (default: {WORK_ROOT})"
+    )
+
+    parser.add_argument(
+        "--keep-work",
+        action="store_true",
+        help="Keep the job's work directory (segments, manifest) after success"
+    )
+
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="Ignore an existing manifest and start the job over"
+    )
+
+    parser.add_argument(
+        "--metrics-json",
+        default=None,
+        help="Where to write the run report with per-stage time, fps and peak disk usage "
+             "(default: {output}.metrics.json)"
+    )
+
+    parser.add_argument(
+        "--frame-store",
+        action="store_true",
+        help="Keep frames between stages in a memory-mapped frame store instead of streaming "
+             "segments or PNG directories (fastest for short clips)"
+    )
+
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        default=DEFAULT_MEMORY_BUDGET_MB,
+        help=f"Frame store RAM budget in MB; frames beyond it spill to a memory-mapped file "
+             f"(default: {DEFAULT_MEMORY_BUDGET_MB})"
+    )
+
+    parser.add_argument(
+        "--spill-dir",
+        default=None,
+        help="Directory for frame store spill files, e.g. /dev/shm for tmpfs (default: the work directory)"
+    )
+
+    parser.add_argument(
+        "--output-dir",
+        default=None,
+        help="Batch mode: directory for the enhanced videos, their metrics and the batch report "
+             "(default: ./enhanced)"
+    )
+
+    parser.add_argument(
+        "--batch-jobs",
+        type=int,
+        default=1,
+        help="Batch mode: videos enhanced at the same time (default: 1)"
+    )
+
+    parser.add_argument(
+        "--batch-report",
+        default=None,
+        help="Batch mode: summary report path (default: {output-dir}/batch_report.json)"
+    )
+
+    args = parser.parse_args()
+    if args.target_fps is not None:
+        try:
+            if Fraction(args.target_fps) <= 0:
+                raise ValueError
+        except (ValueError, ZeroDivisionError):
+            parser.error("--target-fps must be a positive number or fraction")
+    autotune_upscale = args.upscale_shards.lower() == "auto"
+    if not autotune_upscale and not args.upscale_shards.isdigit():
+        parser.error("--upscale-shards must be a number or 'auto'")
+    if args.frame_store and args.png_frames:
+        parser.error("--frame-store and --png-frames are alternative modes; pick one")
+    batch = is_batch_input(args.input)
+    if batch and (args.output or args.metrics_json):
+        parser.error("batch mode writes to --output-dir; -o/--metrics-json take a single video")
+    if batch and (args.benchmark_backends or args.benchmark_encoders):
+        parser.error("benchmarks take a single video")
+    
+    enhancer = VideoEnhancer(
+        bin_dir=args.bin_dir,
+        esrgan_exe=args.esrgan_exe,
+        upscale_shards=1 if autotune_upscale else int(args.upscale_shards),
+        upscale_tile=args.upscale_tile,
+        upscale_threads=args.upscale_threads,
+        upscale_gpu=args.upscale_gpu,
+        interpolator=args.interpolator,
+        upscaler=args.upscaler,
+        edsr_model=args.edsr_model,
+        scene_threshold=args.scene_threshold,
+        static_threshold=args.static_threshold
+    )
+    if args.benchmark_backends or args.benchmark_encoders:
+        if not enhancer.ffmpeg_exe or not enhancer.ffprobe_exe:
+            print("❌ FFmpeg and FFprobe are required for benchmarking")
+            sys.exit(1)
+        if args.benchmark_backends:
+            enhancer.benchmark_backends(args.input, frames=args.benchmark_frames, work_root=args.work_dir)
+        if args.benchmark_encoders:
+            enhancer.benchmark_encoders(args.input, frames=args.benchmark_frames,
+                                        scale=1 if args.skip_upscale else 4, crf=args.crf,
+                                        work_root=args.work_dir)
+        return
+    if batch:
+        enhancer.run_batch(
+            args.input,
+            output_dir=args.output_dir,
+            jobs=args.batch_jobs,
+            report_path=args.batch_report,
+            skip_interpolation=args.skip_interpolation,
+            skip_upscale=args.skip_upscale,
+            autotune_upscale=autotune_upscale,
+            fresh=args.fresh,
+            chunk_size=args.chunk_size,
+            work_root=args.work_dir,
+            target_fps=args.target_fps,
+            encoder=args.encoder,
+            crf=args.crf,
+            streaming=not args.png_frames,
+            max_inflight=args.max_inflight,
+            segment_seconds=args.segment_seconds,
+            keep_work=args.keep_work,
+            interpolate_workers=args.interpolate_workers,
+            upscale_workers=args.upscale_workers,
+            encode_jobs=args.encode_jobs,
+            frame_store=args.frame_store,
+            memory_budget_mb=args.memory_budget,
+            spill_dir=args.spill_dir
+        )
+        return
+    enhancer.run_pipeline(
+        input_file=args.input,
+        output_file=args.output,
+        skip_interpolation=args.skip_interpolation,
+        skip_upscale=args.skip_upscale,
+        streaming=not args.png_frames,
+        chunk_size=args.chunk_size,
+        max_inflight=args.max_inflight,
+        segment_seconds=args.segment_seconds,
+        work_root=args.work_dir,
+        keep_work=args.keep_work,
+        fresh=args.fresh,
+        interpolate_workers=args.interpolate_workers,
+        upscale_workers=args.upscale_workers,
+        autotune_upscale=autotune_upscale,
+        target_fps=args.target_fps,
+        encoder=args.encoder,
+        crf=args.crf,
+        encode_jobs=args.encode_jobs,
+        metrics_json=args.metrics_json,
+        frame_store=args.frame_store,
+        memory_budget_mb=args.memory_budget,
+        spill_dir=args.spill_dir
+    )
@@ -0,0 +1,21 @@
+"""Settings shared by the pipeline modules, and the error every stage raises."""
+from pathlib import Path
+import tempfile
+
+# Raw frames travel between processes as packed BGR, OpenCV's native layout
+FRAME_PIX_FMT = "bgr24"
+DEFAULT_CHUNK_FRAMES = 32
+DEFAULT_MAX_INFLIGHT_CHUNKS = 2
+DEFAULT_SEGMENT_SECONDS = 60
+DEFAULT_BENCHMARK_FRAMES = 120
+DEFAULT_MEMORY_BUDGET_MB = 2048   # frame-store mode: RAM for frames before spilling to a mapped file
+# Output/source frame-rate ratios are rounded to this denominator, so output frames fall on
+# a grid of 1/8 source frame at worst (23.976 → 60 fps becomes 5/2, i.e. 59.94 fps)
+MAX_RATIO_DENOMINATOR = 8
+DEFAULT_SCENE_THRESHOLD = 0.4   # histogram (Bhattacharyya) distance marking a scene cut
+DEFAULT_STATIC_THRESHOLD = 0.5  # mean absolute difference (gray levels) below which frames are static
+WORK_ROOT = Path(tempfile.gettempdir()) / "video_enhancement"
+
+
+class PipelineError(RuntimeError):
+    """A pipeline stage or external tool failed"""
@@ -0,0 +1,212 @@
+"""Frame-store mode: each stage's frames in one array (RAM, then a memory-mapped file) for short clips."""
+from fractions import Fraction
+from pathlib import Path
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from tqdm import tqdm
+
+from .common import DEFAULT_CHUNK_FRAMES, DEFAULT_MEMORY_BUDGET_MB, WORK_ROOT, PipelineError
+from .media import DEFAULT_ENCODER_PROFILE, ENCODER_PROFILES, FrameWriter, decode_cmd, probe_video
+from .reporting import DiskUsageMonitor, RunMetrics
+from .scheduler import split_chunks
+from .timeline import interpolation_ratio
+
+
+class FrameStore:
+    """Frames of one size in a single uint8 array of shape (count, height, width, 3).
+    The array lives in RAM while it fits budget_bytes and spills to a memory-mapped raw file
+    in spill_dir past that (point spill_dir at a tmpfs such as /dev/shm to keep it off disk).
+    Indexing and iteration return views, and ffmpeg reads into and writes from the array
+    buffer directly, so stages pass frames without PNG files or intermediate copies."""
+
+    def __init__(self, height: int, width: int, capacity: int, budget_bytes: int, spill_dir: Path):
+        self.frame_shape = (height, width, 3)
+        self.frame_bytes = height * width * 3
+        self.budget_bytes = budget_bytes
+        self.spill_dir = Path(spill_dir)
+        self.path = None
+        self.array = None
+        self.count = 0
+        self._allocate(max(1, capacity))
+
+    @property
+    def spilled(self) -> bool:
+        return self.path is not None
+
+    @property
+    def ram_bytes(self) -> int:
+        return 0 if self.spilled or self.array is None else self.array.nbytes
+
+    def _allocate(self, capacity: int):
+        import numpy as np
+        shape = (capacity,) + self.frame_shape
+        if self.path is None and capacity * self.frame_bytes <= self.budget_bytes:
+            array = np.empty(shape, dtype=np.uint8)
+        else:
+            if self.path is None:
+                self.spill_dir.mkdir(parents=True, exist_ok=True)
+                fd, path = tempfile.mkstemp(prefix="frames_", suffix=".raw", dir=self.spill_dir)
+                os.close(fd)
+                self.path = Path(path)
+            elif self.array is not None:
+                self.array.flush()  # growing: the file already holds the frames
+            os.truncate(self.path, capacity * self.frame_bytes)
+            array = np.memmap(self.path, dtype=np.uint8, mode="r+", shape=shape)
+        if self.array is not None and not isinstance(self.array, np.memmap):
+            array[:self.count] = self.array[:self.count]
+        self.array = array
+
+    def _reserve(self, frames: int):
+        if self.count + frames > len(self.array):
+            self._allocate(max(self.count + frames, len(self.array) * 3 // 2 + 1))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index):
+        return self.array[:self.count][index]
+
+    def __iter__(self):
+        return iter(self.array[:self.count])
+
+    def append(self, frames: list):
+        """Copy frames into the next slots, growing (and spilling) as needed"""
+        self._reserve(len(frames))
+        for frame in frames:
+            self.array[self.count] = frame
+            self.count += 1
+
+    def read_from(self, stream) -> int:
+        """Fill from a raw BGR stream until it ends, reading straight into the array"""
+        while True:
+            self._reserve(1)
+            slot = memoryview(self.array[self.count]).cast("B")
+            filled = 0
+            while filled < self.frame_bytes:
+                n = stream.readinto(slot[filled:])
+                if not n:
+                    return self.count
+                filled += n
+            self.count += 1
+
+    def close(self):
+        self.array = None
+        if self.path is not None:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+    def describe(self) -> str:
+        height, width, _ = self.frame_shape
+        size_mb = self.count * self.frame_bytes / (1024 * 1024)
+        where = f"spilled to {self.path}" if self.spilled else "in RAM"
+        return f"{self.count} frames {width}x{height}, {size_mb:.1f} MB {where}"
+
+
+class FrameStoreMode:
+    """VideoEnhancer's frame-store mode (--frame-store)"""
+
+    def run_frame_store(self, input_file: str, output_file: str, skip_interpolation: bool = False,
+                        skip_upscale: bool = False, chunk_size: int = DEFAULT_CHUNK_FRAMES,
+                        work_root: str = None, keep_work: bool = False, target_fps=None,
+                        encoder: str = DEFAULT_ENCODER_PROFILE, crf: int = None,
+                        memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB, spill_dir: str = None,
+                        metrics: RunMetrics = None) -> int:
+        """Frame-store mode for short clips: the decoded, interpolated and upscaled frames each
+        live in a FrameStore instead of a PNG directory, so nothing is compressed between stages
+        and ffmpeg decodes into, and encodes from, the store directly. Frames beyond
+        memory_budget_mb (shared by the stores alive at once) spill to a memory-mapped file in
+        spill_dir, the work directory by default."""
+        info = probe_video(input_file, self.ffprobe_exe)
+        ratio = Fraction(1) if skip_interpolation else interpolation_ratio(info.fps, target_fps)
+        scale = 1 if skip_upscale else 4
+        work_dir = Path(work_root or WORK_ROOT) / f"store_{os.getpid()}_{threading.get_ident()}_{int(time.time())}"
+        work_dir.mkdir(parents=True, exist_ok=True)
+        spill_dir = Path(spill_dir) if spill_dir else work_dir
+        budget = int(memory_budget_mb * 1024 * 1024)
+        metrics = metrics or RunMetrics(input_file, output_file, "frame-store")
+        stores = []
+
+        def new_store(height: int, width: int, capacity: int) -> FrameStore:
+            store = FrameStore(height, width, capacity, budget - sum(s.ram_bytes for s in stores), spill_dir)
+            stores.append(store)
+            return store
+
+        def finish(name: str, store: FrameStore, started: float):
+            print(f"   {name}: {store.describe()}")
+            metrics.add_stage(name, time.perf_counter() - started, len(store), spilled=store.spilled)
+
+        print(f"📹 {info.width}x{info.height} @ {float(info.fps):.3f}fps "
+              f"→ {info.width * scale}x{info.height * scale} @ {float(info.fps * ratio):.3f}fps, "
+              f"frame store budget {memory_budget_mb:g} MB")
+        disk = DiskUsageMonitor(work_dir)
+        disk.start()
+        try:
+            started = time.perf_counter()
+            frames = new_store(info.height, info.width, info.frame_count)
+            process = subprocess.Popen(decode_cmd(self.ffmpeg_exe, input_file, info),
+                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            frames.read_from(process.stdout)
+            if process.wait() != 0:
+                raise PipelineError(f"Frame decoding failed: {process.stderr.read().decode(errors='replace')}")
+            finish("decode", frames, started)
+
+            if ratio != 1:
+                started = time.perf_counter()
+                out = new_store(info.height, info.width, math.ceil(len(frames) * ratio))
+                with tqdm(total=len(frames), unit="frame", desc="Interpolating") as bar:
+                    for chunk in split_chunks(frames, 0, 0, chunk_size, ratio=ratio):
+                        result = self.interpolate_chunk(chunk, ratio, work_dir / "interpolate")
+                        if chunk.pad:
+                            result = result + [result[-1] if result else chunk.frames[-1]] * chunk.pad
+                        out.append(result)
+                        bar.update(len(chunk.frames))
+                frames.close()
+                frames = out
+                finish("interpolate", frames, started)
+                self.print_pair_report()
+
+            if scale > 1:
+                started = time.perf_counter()
+                out = new_store(info.height * scale, info.width * scale, len(frames))
+                with tqdm(total=len(frames), unit="frame", desc="Upscaling") as bar:
+                    for start in range(0, len(frames), chunk_size):
+                        batch = list(frames[start:start + chunk_size])
+                        out.append(self.upscale_chunk(batch, work_dir / "upscale", scale))
+                        bar.update(len(batch))
+                frames.close()
+                frames = out
+                finish("upscale", frames, started)
+
+            started = time.perf_counter()
+            writer = FrameWriter(self.ffmpeg_exe, output_file, info.width * scale, info.height * scale,
+                                 info.fps * ratio, encoder_args=ENCODER_PROFILES[encoder].args(crf))
+            writer.start()
+            try:
+                with tqdm(total=len(frames), unit="frame", desc="Encoding") as bar:
+                    for start in range(0, len(frames), chunk_size):
+                        writer.write(list(frames[start:start + chunk_size]))
+                        bar.update(min(chunk_size, len(frames) - start))
+            except BaseException:
+                writer.process.kill()
+                raise
+            writer.close()
+            metrics.add_stage("encode", time.perf_counter() - started, writer.frames_written)
+        finally:
+            for store in stores:
+                store.close()
+            metrics.record_disk(disk.stop())
+            metrics.update(memory_budget_bytes=budget)
+        if not keep_work:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        file_size_mb = Path(output_file).stat().st_size / (1024 * 1024)
+        print(f"✅ Encoded {writer.frames_written} frames ({file_size_mb:.2f} MB)\n")
+        return writer.frames_written
@@ -0,0 +1,269 @@
+"""ffmpeg/ffprobe access: probing, encoder profiles, raw-frame pipes and PNG frame directories."""
+from dataclasses import dataclass
+from fractions import Fraction
+from pathlib import Path
+import json
+import queue
+import shutil
+import subprocess
+import threading
+
+from .common import DEFAULT_MAX_INFLIGHT_CHUNKS, FRAME_PIX_FMT, PipelineError
+
+
+@dataclass
+class VideoInfo:
+    width: int
+    height: int
+    fps: Fraction
+    frame_count: int
+    duration: float
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.width * self.height * 3
+
+
+def probe_video(video_path: str, ffprobe_exe: str = None) -> VideoInfo:
+    """Read resolution, frame rate and length of the first video stream."""
+    cmd = [
+        ffprobe_exe or shutil.which("ffprobe") or "ffprobe",
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=width,height,avg_frame_rate,r_frame_rate,nb_frames:format=duration",
+        "-of", "json",
+        video_path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise PipelineError(f"ffprobe failed: {result.stderr.strip()}")
+    data = json.loads(result.stdout)
+    stream = data["streams"][0]
+    rate = stream.get("avg_frame_rate") or "0/1"
+    if rate in ("0/0", "0/1"):
+        rate = stream.get("r_frame_rate", "30/1")
+    fps = Fraction(rate)
+    duration = float(data.get("format", {}).get("duration") or 0)
+    frame_count = int(stream.get("nb_frames") or 0) or round(duration * fps)
+    return VideoInfo(int(stream["width"]), int(stream["height"]), fps, frame_count, duration)
+
+
+def find_keyframes(video_path: str, ffprobe_exe: str = None) -> list:
+    """Timestamps (seconds) of the video keyframes, read from packet flags without decoding."""
+    cmd = [
+        ffprobe_exe or shutil.which("ffprobe") or "ffprobe",
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "json",
+        video_path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise PipelineError(f"ffprobe failed: {result.stderr.strip()}")
+    packets = json.loads(result.stdout).get("packets", [])
+    return sorted(float(p["pts_time"]) for p in packets
+                  if "K" in p.get("flags", "") and p.get("pts_time") not in (None, "N/A"))
+
+
+@dataclass(frozen=True)
+class EncoderProfile:
+    """Video encoder settings for ffmpeg"""
+    name: str
+    codec: str
+    preset: str
+    crf: int
+    description: str = ""
+    pix_fmt: str = "yuv420p"
+    extra: tuple = ()
+
+    def args(self, crf: int = None) -> list:
+        return [
+            "-c:v", self.codec,
+            "-preset", self.preset,
+            "-crf", str(self.crf if crf is None else crf),
+            "-pix_fmt", self.pix_fmt,
+            *self.extra
+        ]
+
+
+# CRF scales differ per codec: x265 and SVT-AV1 reach x264's quality at higher values
+ENCODER_PROFILES = {
+    "fast": EncoderProfile("fast", "libx264", "veryfast", 20, "H.264, quick previews"),
+    "balanced": EncoderProfile("balanced", "libx264", "slow", 18, "H.264, plays everywhere"),
+    "archival": EncoderProfile("archival", "libx265", "slow", 16, "HEVC at near-transparent quality",
+                               extra=("-tag:v", "hvc1", "-x265-params", "log-level=error")),
+    "x265": EncoderProfile("x265", "libx265", "medium", 22, "HEVC, about half the H.264 bitrate",
+                           extra=("-tag:v", "hvc1", "-x265-params", "log-level=error")),
+    "av1": EncoderProfile("av1", "libsvtav1", "8", 30, "AV1 via SVT-AV1, smallest files"),
+}
+
+
+DEFAULT_ENCODER_PROFILE = "balanced"
+
+
+_encoders = {}
+
+
+def available_encoders(ffmpeg_exe: str) -> set:
+    """Names of the encoders compiled into this ffmpeg build"""
+    if ffmpeg_exe not in _encoders:
+        result = subprocess.run([ffmpeg_exe, "-hide_banner", "-encoders"], capture_output=True, text=True)
+        names = set()
+        listed = False  # the flag legend (" V..... = Video") ends at the "------" line
+        for line in result.stdout.splitlines():
+            parts = line.split()
+            if parts and set(parts[0]) == {"-"}:
+                listed = True
+            elif listed and len(parts) >= 2 and len(parts[0]) == 6 and parts[0][0] in "VAS":
+                names.add(parts[1])
+        _encoders[ffmpeg_exe] = names
+    return _encoders[ffmpeg_exe]
+
+
+def decode_cmd(ffmpeg_exe: str, video_path: str, info: VideoInfo, start: float = 0.0,
+               frame_limit: int = None) -> list:
+    """ffmpeg command decoding video_path to raw frames on stdout at the source fps"""
+    cmd = [ffmpeg_exe, "-v", "error"]
+    if start:
+        # Input seeking to a keyframe-aligned start is both fast and exact
+        cmd += ["-ss", f"{start:.6f}"]
+    cmd += ["-i", video_path, "-map", "0:v:0", "-r", str(info.fps)]
+    if frame_limit is not None:
+        cmd += ["-frames:v", str(frame_limit)]
+    return cmd + ["-f", "rawvideo", "-pix_fmt", FRAME_PIX_FMT, "pipe:1"]
+
+
+class FrameReader(threading.Thread):
+    """Decodes a video with ffmpeg into raw frames on a bounded queue.
+    Yields numpy arrays of shape (height, width, 3); None marks the end.
+    start/frame_limit select a segment; output is constant-rate at the source fps
+    so frame counts per segment are predictable."""
+
+    def __init__(self, ffmpeg_exe: str, video_path: str, info: VideoInfo, buffer_frames: int,
+                 start: float = 0.0, frame_limit: int = None):
+        super().__init__(name="frame-reader", daemon=True)
+        self.info = info
+        self.frames = queue.Queue(maxsize=buffer_frames)
+        self.error = None
+        self.cmd = decode_cmd(ffmpeg_exe, video_path, info, start, frame_limit)
+        self.process = None
+
+    def run(self):
+        import numpy as np
+        try:
+            self.process = subprocess.Popen(self.cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            shape = (self.info.height, self.info.width, 3)
+            while True:
+                data = self.process.stdout.read(self.info.frame_bytes)
+                if len(data) < self.info.frame_bytes:
+                    break
+                self.frames.put(np.frombuffer(data, dtype=np.uint8).reshape(shape))
+            if self.process.wait() != 0:
+                raise PipelineError(f"Frame decoding failed: {self.process.stderr.read().decode(errors='replace')}")
+        except Exception as e:
+            self.error = e
+        finally:
+            self.frames.put(None)
+
+    def __iter__(self):
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                if self.error:
+                    raise self.error
+                return
+            yield frame
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.kill()
+
+
+class FrameWriter(threading.Thread):
+    """Encodes raw frames piped into ffmpeg's stdin. Chunks are handed over through a
+    bounded queue so encoding overlaps with processing of the next chunk."""
+
+    def __init__(self, ffmpeg_exe: str, output_path: str, width: int, height: int, fps,
+                 encoder_args: list = None, max_chunks: int = DEFAULT_MAX_INFLIGHT_CHUNKS):
+        super().__init__(name="frame-writer", daemon=True)
+        self.chunks = queue.Queue(maxsize=max_chunks)
+        self.error = None
+        self.frames_written = 0
+        self.cmd = [
+            ffmpeg_exe, "-v", "error",
+            "-f", "rawvideo", "-pix_fmt", FRAME_PIX_FMT,
+            "-s", f"{width}x{height}",
+            "-framerate", str(fps),
+            "-i", "pipe:0",
+            *(encoder_args or ENCODER_PROFILES[DEFAULT_ENCODER_PROFILE].args()),
+            output_path,
+            "-y"
+        ]
+        self.process = subprocess.Popen(self.cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def _put(self, item) -> bool:
+        """Queue item unless the writer thread has failed (e.g. ffmpeg exited), rechecking
+        while the queue is full so a producer never waits on a writer that stopped reading"""
+        while self.error is None:
+            try:
+                self.chunks.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def write(self, frames: list):
+        if not self._put(frames):
+            raise self.error
+
+    def run(self):
+        import numpy as np
+        try:
+            while True:
+                frames = self.chunks.get()
+                if frames is None:
+                    break
+                for frame in frames:
+                    # Contiguous frames (the usual case) are written from their own buffer
+                    self.process.stdin.write(np.ascontiguousarray(frame))
+                self.frames_written += len(frames)
+        except Exception as e:
+            self.error = e
+            # Nothing reads the queue any more; free it so a blocked put returns at once
+            while True:
+                try:
+                    self.chunks.get_nowait()
+                except queue.Empty:
+                    break
+        finally:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+
+    def close(self):
+        """Flush remaining chunks and wait for ffmpeg to finish the file"""
+        self._put(None)
+        self.join()
+        stderr = self.process.stderr.read().decode(errors="replace")
+        if self.process.wait() != 0:
+            raise PipelineError(f"Encoding failed: {stderr}")
+        if self.error:
+            raise self.error
+
+
+def read_png_dir(frames_dir: Path):
+    """Yield the frames of a PNG directory in name order"""
+    import cv2
+    for path in sorted(Path(frames_dir).glob("*.png")):
+        yield cv2.imread(str(path), cv2.IMREAD_COLOR)
+
+
+def write_png_frames(frames: list, out_dir: Path, written: int = 0) -> int:
+    """Append frames to out_dir as 00000001.png, ... after the written ones; returns the new count"""
+    import cv2
+    for frame in frames:
+        written += 1
+        cv2.imwrite(str(out_dir / f"{written:08d}.png"), frame, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    return written
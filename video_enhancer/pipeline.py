@@ -0,0 +1,394 @@
+"""VideoEnhancer: stage backend selection, per-chunk stage calls, benchmarks and the run entry points.
+The pipeline modes are mixed in from segmented, png_frames, frame_store and batch."""
+from fractions import Fraction
+from pathlib import Path
+import copy
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from .backends import (FarnebackInterpolator, OpenCVUpscaler, RealEsrganNcnnUpscaler, RifeNcnnInterpolator,
+                       ncnn_executable)
+from .batch import BatchMode
+from .common import (DEFAULT_BENCHMARK_FRAMES, DEFAULT_CHUNK_FRAMES, DEFAULT_MAX_INFLIGHT_CHUNKS,
+                     DEFAULT_MEMORY_BUDGET_MB, DEFAULT_SCENE_THRESHOLD, DEFAULT_SEGMENT_SECONDS,
+                     DEFAULT_STATIC_THRESHOLD, WORK_ROOT, PipelineError)
+from .frame_store import FrameStoreMode
+from .media import DEFAULT_ENCODER_PROFILE, ENCODER_PROFILES, FrameReader, FrameWriter, available_encoders, probe_video
+from .png_frames import PngFramesMode
+from .reporting import RunMetrics
+from .scheduler import Chunk
+from .segmented import SegmentedMode
+from .timeline import classify_pairs, output_positions
+
+
+class VideoEnhancer(SegmentedMode, PngFramesMode, FrameStoreMode, BatchMode):
+    def __init__(self, bin_dir="./bin", esrgan_exe: str = None, upscale_shards: int = 1,
+                 upscale_tile: str = None, upscale_threads: str = None, upscale_gpu: str = None,
+                 interpolator: str = "auto", upscaler: str = "auto", edsr_model: str = None,
+                 scene_threshold: float = DEFAULT_SCENE_THRESHOLD,
+                 static_threshold: float = DEFAULT_STATIC_THRESHOLD):
+        self.bin_dir = Path(bin_dir)
+        self.rife_exe = ncnn_executable(self.bin_dir, "rife-ncnn-vulkan")
+        self.esrgan_exe = ncnn_executable(self.bin_dir, "realesrgan-ncnn-vulkan")
+        if esrgan_exe:
+            self.esrgan_exe = Path(esrgan_exe).resolve() if Path(esrgan_exe).exists() else Path(shutil.which(esrgan_exe) or esrgan_exe)
+        self.ffmpeg_exe = shutil.which("ffmpeg")
+        self.ffprobe_exe = shutil.which("ffprobe")
+        self.scene_threshold = scene_threshold
+        self.static_threshold = static_threshold
+        self.pair_counts = {"motion": 0, "static": 0, "cut": 0}
+        self._counts_lock = threading.Lock()
+
+        # Stage backends; "auto" takes the NCNN binary when present, else the OpenCV fallback
+        self.backend_notes = []
+        self.interpolator = self._select_backend("interpolation", interpolator, {
+            "rife-ncnn": lambda: RifeNcnnInterpolator(self.rife_exe),
+            "farneback": FarnebackInterpolator,
+        })
+        self.upscaler = self._select_backend("upscaling", upscaler, {
+            "realesrgan-ncnn": lambda: RealEsrganNcnnUpscaler(self.esrgan_exe, upscale_shards, upscale_tile,
+                                                              upscale_threads, upscale_gpu),
+            "lanczos": lambda: OpenCVUpscaler("lanczos"),
+            "edsr": lambda: OpenCVUpscaler("edsr", edsr_model),
+        })
+
+    def for_job(self):
+        """Copy sharing the tools and backends but with its own pair counts,
+        so several videos can be enhanced at the same time."""
+        job = copy.copy(self)
+        job.pair_counts = dict.fromkeys(self.pair_counts, 0)
+        job._counts_lock = threading.Lock()
+        return job
+
+    def _select_backend(self, stage: str, choice: str, factories: dict):
+        if choice != "auto":
+            if choice not in factories:
+                raise PipelineError(f"Unknown {stage} backend: {choice} (choose from {', '.join(factories)})")
+            return factories[choice]()
+        backends = [factory() for factory in factories.values()]
+        for backend in backends:
+            if backend.problem() is None:
+                if backend is not backends[0]:
+                    self.backend_notes.append(
+                        f"{backends[0].problem()}; using {backend.describe()} for {stage}")
+                return backend
+        return backends[0]
+
+    def stage_settings(self, interpolation: bool = True, upscaling: bool = True) -> dict:
+        """Settings of the stages that run which change the frames they produce: the backends
+        (with their executables and models) and the scene-cut/static thresholds."""
+        settings = {}
+        if interpolation:
+            settings.update(interpolator=self.interpolator.settings(),
+                            scene_threshold=self.scene_threshold, static_threshold=self.static_threshold)
+        if upscaling:
+            settings["upscaler"] = self.upscaler.settings()
+        return settings
+
+    def check_dependencies(self, interpolation: bool = True, upscaling: bool = True,
+                           encoder: str = DEFAULT_ENCODER_PROFILE) -> bool:
+        """Verify the tools and stage backends this run needs are available."""
+        print("🔍 Checking dependencies...")
+        
+        missing = []
+        
+        for needed, label, backend in ((interpolation, "Interpolation", self.interpolator),
+                                       (upscaling, "Upscaling", self.upscaler)):
+            if not needed:
+                continue
+            problem = backend.problem()
+            if problem:
+                missing.append(problem)
+            else:
+                print(f"  ✓ {label}: {backend.describe()}")
+            
+        if not self.ffmpeg_exe:
+            missing.append("FFmpeg not found. Install via: winget install ffmpeg (or brew/apt)")
+        else:
+            print(f"  ✓ FFmpeg: {self.ffmpeg_exe}")
+
+        if not self.ffprobe_exe:
+            missing.append("FFprobe not found (ships with FFmpeg)")
+        
+        profile = ENCODER_PROFILES[encoder]
+        if self.ffmpeg_exe and profile.codec not in available_encoders(self.ffmpeg_exe):
+            missing.append(f"This FFmpeg build has no {profile.codec} encoder (profile '{profile.name}')")
+        
+        for note in self.backend_notes:
+            print(f"  ⚠️  {note}")
+        
+        if missing:
+            print("\n❌ Missing dependencies:")
+            for msg in missing:
+                print(f"   {msg}")
+            print("\n💡 Run 'setup_env.bat' (or setup_env.sh) to download the NCNN binaries, "
+                  "pick a CPU backend with --interpolator/--upscaler, or another --encoder profile.")
+            return False
+        
+        print("✅ All dependencies found!\n")
+        return True
+
+    
+    def interpolate_chunk(self, chunk: Chunk, ratio: Fraction, work_dir: Path) -> list:
+        """Interpolate one chunk with the interpolation backend: the output frames from
+        chunk.previous (exclusive) to its last frame, on the video-wide grid for ratio.
+        A final chunk with a lookahead stops short of it; the next segment owns that frame."""
+        inputs = ([chunk.previous] if chunk.previous is not None else []) + list(chunk.frames)
+        start = chunk.base - (1 if chunk.previous is not None else 0)
+        positions = output_positions(start, len(inputs), ratio, include_first=chunk.previous is None,
+                                     include_last=not (chunk.final and chunk.lookahead))
+        kinds = None
+        if self.scene_threshold or self.static_threshold:
+            kinds = classify_pairs(inputs, self.scene_threshold, self.static_threshold)
+            with self._counts_lock:
+                for kind in kinds:
+                    self.pair_counts[kind] += 1
+        return self.interpolator.interpolate(inputs, positions, work_dir, kinds)
+
+    def upscale_chunk(self, frames: list, work_dir: Path, scale: int = 4) -> list:
+        """Upscale one chunk with the upscaling backend."""
+        return self.upscaler.upscale(frames, work_dir, scale)
+
+    def autotune_upscale_shards(self, sample: list, work_dir: Path, scale: int = 4) -> int:
+        """Pick the fastest Real-ESRGAN shard count on sample (NCNN backend only)."""
+        if not isinstance(self.upscaler, RealEsrganNcnnUpscaler):
+            print(f"🔧 Shard auto-tuning only applies to Real-ESRGAN; {self.upscaler.name} runs in-process\n")
+            return 1
+        return self.upscaler.autotune(sample, work_dir, scale)
+
+    def benchmark_backends(self, input_file: str, frames: int = DEFAULT_BENCHMARK_FRAMES,
+                           ratio: Fraction = Fraction(2), scale: int = 4, work_root: str = None) -> list:
+        """Time every usable backend of each stage on the first frames of input_file.
+        Returns [{stage, backend, frames_in, frames_out, seconds, fps}] and prints a table."""
+        info = probe_video(input_file, self.ffprobe_exe)
+        reader = FrameReader(self.ffmpeg_exe, input_file, info, buffer_frames=frames, frame_limit=frames)
+        reader.start()
+        sample = list(reader)
+        work_dir = Path(work_root or WORK_ROOT) / f"benchmark_{os.getpid()}"
+        positions = output_positions(0, len(sample), ratio)
+        candidates = [
+            ("interpolate", RifeNcnnInterpolator(self.rife_exe),
+             lambda b: b.interpolate(sample, positions, work_dir)),
+            ("interpolate", FarnebackInterpolator(),
+             lambda b: b.interpolate(sample, positions, work_dir)),
+            ("upscale", self.upscaler if isinstance(self.upscaler, RealEsrganNcnnUpscaler)
+             else RealEsrganNcnnUpscaler(self.esrgan_exe), lambda b: b.upscale(sample, work_dir, scale)),
+            ("upscale", OpenCVUpscaler("lanczos"), lambda b: b.upscale(sample, work_dir, scale)),
+            ("upscale", self.upscaler if getattr(self.upscaler, "method", None) == "edsr"
+             else OpenCVUpscaler("edsr"), lambda b: b.upscale(sample, work_dir, scale)),
+        ]
+        print(f"⏱️  Benchmarking stage backends on {len(sample)} frames of {info.width}x{info.height}")
+        print(f"   {'stage':<12}{'backend':<18}{'frames':>8}{'seconds':>10}{'fps':>10}")
+        results = []
+        try:
+            for stage, backend, run in candidates:
+                problem = backend.problem()
+                if problem:
+                    print(f"   {stage:<12}{backend.name:<18}{'skipped: ' + problem}")
+                    continue
+                started = time.perf_counter()
+                outputs = run(backend)
+                seconds = time.perf_counter() - started
+                results.append({"stage": stage, "backend": backend.name, "frames_in": len(sample),
+                                "frames_out": len(outputs), "seconds": round(seconds, 3),
+                                "fps": round(len(sample) / max(seconds, 1e-6), 2)})
+                print(f"   {stage:<12}{backend.name:<18}{len(outputs):>8}{seconds:>10.2f}{results[-1]['fps']:>10.1f}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return results
+
+    def print_pair_report(self) -> None:
+        counts = self.pair_counts
+        total = sum(counts.values())
+        if total:
+            print(f"🎞️  {total} frame pairs: {counts['motion']} interpolated, {counts['cut']} scene cuts "
+                  f"repeated, {counts['static']} static blended")
+
+    def concat_segments(self, segment_files: list, output_file: str, work_dir: Path) -> None:
+        """Join encoded segments without re-encoding (concat demuxer, stream copy)."""
+        if len(segment_files) == 1:
+            shutil.copyfile(segment_files[0], output_file)
+            return
+        list_file = work_dir / "concat.txt"
+        list_file.write_text("".join(f"file '{Path(f).resolve().as_posix()}'\n" for f in segment_files))
+        cmd = [
+            self.ffmpeg_exe, "-v", "error",
+            "-f", "concat", "-safe", "0",
+            "-i", str(list_file),
+            "-c", "copy",
+            output_file,
+            "-y"
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise PipelineError(f"Concatenating segments failed: {result.stderr}")
+
+    
+    def benchmark_encoders(self, input_file: str, frames: int = DEFAULT_BENCHMARK_FRAMES, scale: int = 4,
+                           crf: int = None, work_root: str = None) -> list:
+        """Encode the first frames of input_file (upscaled by scale with Lanczos, to match the
+        pipeline's output size) with every encoder profile this ffmpeg supports.
+        Returns [{profile, codec, frames, seconds, fps, kbps, size_bytes}] and prints a table."""
+        import cv2
+        info = probe_video(input_file, self.ffprobe_exe)
+        reader = FrameReader(self.ffmpeg_exe, input_file, info, buffer_frames=frames, frame_limit=frames)
+        reader.start()
+        sample = [cv2.resize(f, None, fx=scale, fy=scale, interpolation=cv2.INTER_LANCZOS4) if scale > 1 else f
+                  for f in reader]
+        height, width = sample[0].shape[:2]
+        duration = len(sample) / info.fps
+        work_dir = Path(work_root or WORK_ROOT) / f"encode_benchmark_{os.getpid()}"
+        work_dir.mkdir(parents=True, exist_ok=True)
+        available = available_encoders(self.ffmpeg_exe)
+        print(f"⏱️  Benchmarking encoder profiles on {len(sample)} frames of {width}x{height}")
+        print(f"   {'profile':<10}{'codec':<12}{'seconds':>9}{'fps':>9}{'kbit/s':>10}")
+        results = []
+        try:
+            for profile in ENCODER_PROFILES.values():
+                if profile.codec not in available:
+                    print(f"   {profile.name:<10}{profile.codec:<12}skipped: not in this ffmpeg build")
+                    continue
+                output = work_dir / f"{profile.name}.mp4"
+                started = time.perf_counter()
+                writer = FrameWriter(self.ffmpeg_exe, str(output), width, height, info.fps,
+                                     encoder_args=profile.args(crf), max_chunks=1)
+                writer.start()
+                writer.write(sample)
+                writer.close()
+                seconds = time.perf_counter() - started
+                size = output.stat().st_size
+                results.append({"profile": profile.name, "codec": profile.codec, "frames": len(sample),
+                                "seconds": round(seconds, 3), "fps": round(len(sample) / max(seconds, 1e-6), 2),
+                                "kbps": round(size * 8 / float(duration) / 1000, 1), "size_bytes": size})
+                print(f"   {profile.name:<10}{profile.codec:<12}{seconds:>9.2f}{results[-1]['fps']:>9.1f}"
+                      f"{results[-1]['kbps']:>10.0f}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return results
+
+    def enhance(self, input_file: str, output_file: str, skip_interpolation: bool = False,
+                skip_upscale: bool = False, streaming: bool = True, chunk_size: int = DEFAULT_CHUNK_FRAMES,
+                max_inflight: int = DEFAULT_MAX_INFLIGHT_CHUNKS,
+                segment_seconds: float = DEFAULT_SEGMENT_SECONDS, work_root: str = None,
+                keep_work: bool = False, fresh: bool = False, interpolate_workers: int = 1,
+                upscale_workers: int = 1, target_fps=None, encoder: str = DEFAULT_ENCODER_PROFILE,
+                crf: int = None, encode_jobs: int = 1, metrics_json: str = None, frame_store: bool = False,
+                memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB, spill_dir: str = None) -> int:
+        """Enhance one video and write its run report (per-stage time and fps, peak disk usage)
+        to metrics_json, by default <output>.metrics.json next to the output.
+        Returns the number of frames encoded; errors are raised after the report is written."""
+        metrics_json = metrics_json or str(Path(output_file).with_name(Path(output_file).stem + ".metrics.json"))
+        mode = "frame-store" if frame_store else "streaming" if streaming else "png"
+        metrics = RunMetrics(input_file, output_file, mode, {
+            "target_fps": target_fps, "skip_interpolation": skip_interpolation,
+            "skip_upscale": skip_upscale, "interpolator": self.interpolator.name,
+            "upscaler": self.upscaler.name, "encoder": encoder, "crf": crf,
+            "chunk_size": chunk_size, "segment_seconds": segment_seconds,
+            "interpolate_workers": interpolate_workers, "upscale_workers": upscale_workers,
+            "upscale_shards": len(getattr(self.upscaler, "shards", ())) or None,
+            "encode_jobs": encode_jobs,
+        })
+        try:
+            if frame_store:
+                frames = self.run_frame_store(input_file, output_file, skip_interpolation, skip_upscale,
+                                              chunk_size=chunk_size, work_root=work_root, keep_work=keep_work,
+                                              target_fps=target_fps, encoder=encoder, crf=crf,
+                                              memory_budget_mb=memory_budget_mb, spill_dir=spill_dir,
+                                              metrics=metrics)
+            elif streaming:
+                frames = self.run_segmented(input_file, output_file, skip_interpolation, skip_upscale,
+                                            chunk_size=chunk_size, max_inflight=max_inflight,
+                                            segment_seconds=segment_seconds, work_root=work_root,
+                                            keep_work=keep_work, fresh=fresh,
+                                            interpolate_workers=interpolate_workers,
+                                            upscale_workers=upscale_workers, target_fps=target_fps,
+                                            encoder=encoder, crf=crf, metrics=metrics)
+            else:
+                frames = self.run_png_frames(input_file, output_file, skip_interpolation, skip_upscale,
+                                             work_root=work_root, keep_work=keep_work, target_fps=target_fps,
+                                             encoder=encoder, crf=crf, encode_jobs=encode_jobs,
+                                             metrics=metrics)
+        except KeyboardInterrupt:
+            self.write_metrics(metrics, metrics_json, status="interrupted")
+            raise
+        except Exception as e:
+            self.write_metrics(metrics, metrics_json, status="failed", error=str(e))
+            raise
+        self.write_metrics(metrics, metrics_json, output_file, output_frames=frames)
+        return frames
+
+    def autotune_from_video(self, input_file: str, chunk_size: int = DEFAULT_CHUNK_FRAMES,
+                            work_root: str = None) -> int:
+        """Auto-tune the Real-ESRGAN shard count on the first chunk of input_file."""
+        info = probe_video(input_file, self.ffprobe_exe)
+        reader = FrameReader(self.ffmpeg_exe, input_file, info, buffer_frames=chunk_size,
+                             frame_limit=chunk_size)
+        reader.start()
+        return self.autotune_upscale_shards(list(reader), Path(work_root or WORK_ROOT) / f"autotune_{os.getpid()}")
+
+    def run_pipeline(self, input_file: str, output_file: str = None, 
+                     skip_interpolation: bool = False, skip_upscale: bool = False,
+                     streaming: bool = True, chunk_size: int = DEFAULT_CHUNK_FRAMES,
+                     max_inflight: int = DEFAULT_MAX_INFLIGHT_CHUNKS,
+                     segment_seconds: float = DEFAULT_SEGMENT_SECONDS, work_root: str = None,
+                     keep_work: bool = False, fresh: bool = False, interpolate_workers: int = 1,
+                     upscale_workers: int = 1, autotune_upscale: bool = False, target_fps=None,
+                     encoder: str = DEFAULT_ENCODER_PROFILE, crf: int = None, encode_jobs: int = 1,
+                     metrics_json: str = None, frame_store: bool = False,
+                     memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB, spill_dir: str = None) -> None:
+        """Run the complete enhancement pipeline."""
+        
+        if not Path(input_file).exists():
+            print(f"❌ Input file not found: {input_file}")
+            sys.exit(1)
+        
+        if not self.check_dependencies(interpolation=not skip_interpolation, upscaling=not skip_upscale,
+                                       encoder=encoder):
+            sys.exit(1)
+        
+        if output_file is None:
+            stem = Path(input_file).stem
+            output_file = f"{stem}_enhanced.mp4"
+        
+        print(f"🚀 Starting Video Enhancement Pipeline")
+        print(f"   Input:  {input_file}")
+        print(f"   Output: {output_file}\n")
+
+        try:
+            if autotune_upscale and not skip_upscale:
+                self.autotune_from_video(input_file, chunk_size, work_root)
+            self.enhance(input_file, output_file, skip_interpolation, skip_upscale, streaming=streaming,
+                         chunk_size=chunk_size, max_inflight=max_inflight, segment_seconds=segment_seconds,
+                         work_root=work_root, keep_work=keep_work, fresh=fresh,
+                         interpolate_workers=interpolate_workers, upscale_workers=upscale_workers,
+                         target_fps=target_fps, encoder=encoder, crf=crf, encode_jobs=encode_jobs,
+                         metrics_json=metrics_json, frame_store=frame_store,
+                         memory_budget_mb=memory_budget_mb, spill_dir=spill_dir)
+            print("🎉 Pipeline completed successfully!")
+            
+        except KeyboardInterrupt:
+            print("\n⚠️  Pipeline interrupted by user")
+            sys.exit(1)
+        except Exception as e:
+            print(f"\n❌ Pipeline error: {e}")
+            sys.exit(1)
+
+    def write_metrics(self, metrics: RunMetrics, path: str, output_file: str = None, status: str = "ok",
+                      **extra) -> None:
+        """Write the run report; a failure to write it never fails the run itself."""
+        if output_file and Path(output_file).exists():
+            extra["output_bytes"] = Path(output_file).stat().st_size
+        if any(self.pair_counts.values()):
+            extra["pairs"] = dict(self.pair_counts)
+        try:
+            report = metrics.write(path, status=status, **extra)
+        except OSError as e:
+            print(f"⚠️  Could not write metrics to {path}: {e}")
+            return
+        if status == "ok":
+            peak_mb = report["peak_disk_bytes"] / (1024 * 1024)
+            print(f"📈 Metrics: {report['wall_seconds']:.1f}s wall, peak work dir {peak_mb:.1f} MB → {path}")
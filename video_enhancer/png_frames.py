@@ -0,0 +1,174 @@
+"""PNG mode: every stage writes a full frame directory to disk (useful to inspect frames)."""
+from fractions import Fraction
+from pathlib import Path
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from tqdm import tqdm
+
+from .backends import split_evenly
+from .common import WORK_ROOT
+from .media import DEFAULT_ENCODER_PROFILE, ENCODER_PROFILES, probe_video, read_png_dir, write_png_frames
+from .reporting import DiskUsageMonitor, RunMetrics, count_frames, run_with_progress
+from .scheduler import split_chunks
+from .timeline import interpolation_ratio
+
+
+class PngFramesMode:
+    """VideoEnhancer's PNG mode (--png-frames)"""
+
+    
+    def extract_frames(self, video_path: str, fps=None, work_dir: str = None) -> str:
+        """Extract video frames to the job's work directory, at the source frame rate unless fps is given."""
+        temp_dir = Path(work_dir) if work_dir else Path(tempfile.mkdtemp(prefix="video_enhancement_"))
+        frames_dir = temp_dir / "frames_extracted"
+        frames_dir.mkdir(parents=True, exist_ok=True)
+        
+        print(f"📹 Extracting frames from: {video_path}")
+        output_pattern = str(frames_dir / "%06d.png")
+        
+        info = probe_video(video_path, self.ffprobe_exe)
+        fps = fps or info.fps
+        cmd = [
+            self.ffmpeg_exe,
+            "-v", "error",
+            "-i", video_path,
+            "-r", str(fps),
+            "-q:v", "2",
+            output_pattern
+        ]
+        
+        run_with_progress([cmd], "Extracting", total=round(info.duration * fps) or info.frame_count,
+                          error="Frame extraction failed")
+        
+        frame_count = len(list(frames_dir.glob("*.png")))
+        print(f"✅ Extracted {frame_count} frames\n")
+        return str(frames_dir)
+
+    
+    def interpolate_frames(self, frames_dir: str, target_fps=None, source_fps=None) -> str:
+        """Interpolate frames from source_fps to target_fps (default: double the frame rate)."""
+        interpolated_dir = Path(frames_dir).parent / "frames_interpolated"
+        interpolated_dir.mkdir(parents=True, exist_ok=True)
+        
+        ratio = interpolation_ratio(source_fps, target_fps) if source_fps else Fraction(2)
+        print(f"🎬 Interpolating frames ×{float(ratio):g} with {self.interpolator.name}...")
+        
+        frame_count = 0
+        total = len(list(Path(frames_dir).glob("*.png")))
+        with tqdm(total=total, unit="frame", desc="Interpolating") as bar:
+            for chunk in split_chunks(read_png_dir(frames_dir), 0, 0, ratio=ratio):
+                frames = self.interpolate_chunk(chunk, ratio, interpolated_dir.parent / "interpolate_tmp")
+                if chunk.pad:
+                    frames = frames + [frames[-1] if frames else chunk.frames[-1]] * chunk.pad
+                frame_count = write_png_frames(frames, interpolated_dir, frame_count)
+                bar.update(len(chunk.frames))
+        print(f"✅ Interpolated to {frame_count} frames\n")
+        return str(interpolated_dir)
+
+    
+    def upscale_frames(self, frames_dir: str, scale: int = 4) -> str:
+        """Upscale frames to 4K."""
+        upscaled_dir = Path(frames_dir).parent / "frames_upscaled"
+        upscaled_dir.mkdir(parents=True, exist_ok=True)
+        
+        print(f"🎨 Upscaling frames {scale}x with {self.upscaler.name}...")
+        
+        frame_count = self.upscaler.upscale_dir(Path(frames_dir), upscaled_dir, scale)
+        print(f"✅ Upscaled {frame_count} frames\n")
+        return str(upscaled_dir)
+
+    def encode_video(self, frames_dir: str, output_path: str, fps=60, encoder: str = DEFAULT_ENCODER_PROFILE,
+                     crf: int = None, jobs: int = 1) -> None:
+        """Encode frames back into video with an encoder profile.
+        With jobs > 1 the frames are split into contiguous ranges encoded by concurrent
+        ffmpeg processes, then joined with a stream copy."""
+        profile = ENCODER_PROFILES[encoder]
+        print(f"🎥 Encoding video to: {output_path}")
+        print(f"   FPS: {float(fps):g}, Profile: {profile.name} ({profile.codec} {profile.preset}), "
+              f"Quality: {profile.crf if crf is None else crf} (lower = better)")
+        
+        # ffmpeg names frames %06d, RIFE and Real-ESRGAN keep or use %08d
+        frames = sorted(Path(frames_dir).glob("*.png"))
+        input_pattern = str(Path(frames_dir) / f"%0{len(frames[0].stem)}d.png")
+        first_number = int(frames[0].stem)
+        
+        def encode_cmd(start: int, count: int, path: str) -> list:
+            return [
+                self.ffmpeg_exe, "-v", "error",
+                "-framerate", str(fps),
+                "-start_number", str(first_number + start),
+                "-i", input_pattern,
+                "-frames:v", str(count),
+                *profile.args(crf),
+                path,
+                "-y"
+            ]
+        
+        ranges = split_evenly(list(range(len(frames))), jobs)
+        if len(ranges) == 1:
+            commands = [encode_cmd(0, len(frames), output_path)]
+            parts = [output_path]
+        else:
+            parts = [str(Path(frames_dir).parent / f"encode_part_{i:03d}{Path(output_path).suffix}")
+                     for i in range(len(ranges))]
+            commands = [encode_cmd(r[0], len(r), part) for r, part in zip(ranges, parts)]
+            print(f"   {len(ranges)} parallel encodes of ~{len(ranges[0])} frames")
+        
+        run_with_progress(commands, "Encoding", total=len(frames), error="Encoding failed")
+        
+        if len(parts) > 1:
+            self.concat_segments(parts, output_path, Path(frames_dir).parent)
+            for part in parts:
+                Path(part).unlink(missing_ok=True)
+        
+        file_size_mb = Path(output_path).stat().st_size / (1024 * 1024)
+        print(f"✅ Video encoded successfully ({file_size_mb:.2f} MB)\n")
+
+    
+    def run_png_frames(self, input_file: str, output_file: str, skip_interpolation: bool = False,
+                       skip_upscale: bool = False, work_root: str = None, keep_work: bool = False,
+                       target_fps=None, encoder: str = DEFAULT_ENCODER_PROFILE, crf: int = None,
+                       encode_jobs: int = 1, metrics: RunMetrics = None) -> int:
+        """PNG mode: every stage writes a full frame set to disk (useful to inspect frames)."""
+        work_dir = Path(work_root or WORK_ROOT) / f"png_{os.getpid()}_{threading.get_ident()}_{int(time.time())}"
+        work_dir.mkdir(parents=True, exist_ok=True)
+        metrics = metrics or RunMetrics(input_file, output_file, "png")
+        source_fps = probe_video(input_file, self.ffprobe_exe).fps
+        ratio = Fraction(1) if skip_interpolation else interpolation_ratio(source_fps, target_fps)
+        disk = DiskUsageMonitor(work_dir)
+        disk.start()
+        try:
+            # Step 1: Extract frames (at the source rate; resampling here would only add work)
+            started = time.perf_counter()
+            frames_dir = self.extract_frames(input_file, fps=source_fps, work_dir=str(work_dir))
+            metrics.add_stage("extract", time.perf_counter() - started, count_frames(frames_dir))
+
+            # Step 2: Interpolate (optional)
+            if ratio != 1:
+                started = time.perf_counter()
+                frames_dir = self.interpolate_frames(frames_dir, target_fps=source_fps * ratio,
+                                                     source_fps=source_fps)
+                metrics.add_stage("interpolate", time.perf_counter() - started, count_frames(frames_dir))
+                self.print_pair_report()
+
+            # Step 3: Upscale (optional)
+            if not skip_upscale:
+                started = time.perf_counter()
+                frames_dir = self.upscale_frames(frames_dir, scale=4)
+                metrics.add_stage("upscale", time.perf_counter() - started, count_frames(frames_dir))
+
+            # Step 4: Encode
+            started = time.perf_counter()
+            self.encode_video(frames_dir, output_file, fps=source_fps * ratio, encoder=encoder, crf=crf,
+                              jobs=encode_jobs)
+            frames = count_frames(frames_dir)
+            metrics.add_stage("encode", time.perf_counter() - started, frames, workers=encode_jobs)
+        finally:
+            metrics.record_disk(disk.stop())
+        if not keep_work:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return frames
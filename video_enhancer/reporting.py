@@ -0,0 +1,173 @@
+"""Progress bars, stage and batch summaries, disk usage sampling and the JSON run report."""
+from collections import deque
+from pathlib import Path
+import json
+import os
+import subprocess
+import threading
+import time
+
+from tqdm import tqdm
+
+from .common import PipelineError
+
+
+def print_stage_report(stats: list, wall: float) -> None:
+    """Per-stage utilization table; the busiest stage is the one to give more workers (or a faster backend)"""
+    print(f"\n📊 Stage utilization over {wall:.1f}s")
+    print(f"   {'stage':<12}{'workers':>8}{'items':>8}{'busy':>8}{'starved':>10}{'blocked':>10}")
+    for s in stats:
+        print(f"   {s.name:<12}{s.workers:>8}{s.items:>8}{s.utilization(wall):>8.0%}"
+              f"{s.starved / s.workers:>9.1f}s{s.blocked / s.workers:>9.1f}s")
+    bottleneck = max(stats, key=lambda s: s.utilization(wall))
+    print(f"   Bottleneck: {bottleneck.name} ({bottleneck.utilization(wall):.0%} busy)")
+
+
+def run_with_progress(commands: list, desc: str, total: int = None, out_dir: Path = None,
+                      error: str = None) -> float:
+    """Run commands concurrently with a live progress bar instead of buffering their output.
+    ffmpeg commands get -progress pipe:1 and report encoded/decoded frames as they go; other
+    tools (NCNN binaries) are tracked by the PNGs appearing in out_dir. stderr is drained
+    continuously and its tail kept for the error message. Returns the elapsed seconds."""
+    started = time.perf_counter()
+    frames = [0] * len(commands)
+    tails = [deque(maxlen=40) for _ in commands]
+    processes, threads = [], []
+
+    def read_progress(i: int, stream):
+        for line in stream:
+            if line.startswith("frame="):
+                try:
+                    frames[i] = int(line.split("=", 1)[1])
+                except ValueError:
+                    pass
+
+    def drain(i: int, stream):
+        for line in stream:
+            tails[i].append(line)
+
+    for i, cmd in enumerate(commands):
+        is_ffmpeg = Path(cmd[0]).stem.lower() == "ffmpeg"
+        if is_ffmpeg:
+            cmd = [cmd[0], "-progress", "pipe:1", "-nostats"] + list(cmd[1:])
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE if is_ffmpeg else subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE, text=True, errors="replace")
+        processes.append(process)
+        readers = [(drain, process.stderr)] + ([(read_progress, process.stdout)] if is_ffmpeg else [])
+        for target, stream in readers:
+            thread = threading.Thread(target=target, args=(i, stream), daemon=True)
+            thread.start()
+            threads.append(thread)
+
+    with tqdm(total=total or None, unit="frame", desc=desc) as bar:
+        try:
+            while any(p.poll() is None for p in processes):
+                done = sum(frames)
+                if out_dir is not None:
+                    done = sum(1 for _ in out_dir.glob("*.png"))
+                bar.update(done - bar.n)
+                time.sleep(0.5)
+        except BaseException:
+            for process in processes:
+                process.kill()
+            raise
+        for thread in threads:
+            thread.join()
+        done = sum(frames) if out_dir is None else sum(1 for _ in out_dir.glob("*.png"))
+        bar.update(done - bar.n)
+
+    for process, tail in zip(processes, tails):
+        if process.returncode != 0:
+            raise PipelineError(f"{error or Path(process.args[0]).name + ' failed'}: {''.join(tail).strip()}")
+    return time.perf_counter() - started
+
+
+def count_frames(frames_dir) -> int:
+    return sum(1 for _ in Path(frames_dir).glob("*.png"))
+
+
+def dir_size(path: Path) -> int:
+    """Bytes used by the files under path (files vanishing mid-walk are skipped)"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.stat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class DiskUsageMonitor(threading.Thread):
+    """Samples the size of a work directory every interval seconds and keeps the peak"""
+
+    def __init__(self, path: Path, interval: float = 1.0):
+        super().__init__(name="disk-usage", daemon=True)
+        self.path = Path(path)
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def sample(self):
+        self.peak = max(self.peak, dir_size(self.path))
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        self.join()
+        self.sample()
+        return self.peak
+
+
+class RunMetrics:
+    """Time and throughput per stage plus peak work-directory disk usage, written as JSON
+    at the end of a run so performance can be tracked across versions."""
+
+    def __init__(self, input_file: str, output_file: str, mode: str, settings: dict = None):
+        self.report = {
+            "input": str(input_file),
+            "output": str(output_file),
+            "mode": mode,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "settings": settings or {},
+            "stages": [],
+            "peak_disk_bytes": 0,
+        }
+        self._started = time.perf_counter()
+
+    def add_stage(self, name: str, seconds: float, frames: int, workers: int = 1, **extra):
+        self.report["stages"].append(dict({
+            "name": name,
+            "workers": workers,
+            "seconds": round(seconds, 3),
+            "frames": frames,
+            "fps": round(frames / seconds, 2) if seconds > 0 else None,
+        }, **extra))
+
+    def update(self, **fields):
+        self.report.update(fields)
+
+    def record_disk(self, peak_bytes: int):
+        self.report["peak_disk_bytes"] = max(self.report["peak_disk_bytes"], peak_bytes)
+
+    def write(self, path: str, **extra) -> dict:
+        self.report.update(extra)
+        wall = time.perf_counter() - self._started
+        self.report["wall_seconds"] = round(wall, 3)
+        output_frames = self.report.get("output_frames")
+        if output_frames:
+            self.report["output_fps"] = round(output_frames / wall, 2)
+        Path(path).write_text(json.dumps(self.report, indent=2))
+        return self.report
+
+
+def print_batch_report(results: list, wall: float) -> None:
+    counts = {status: sum(r["status"] == status for r in results) for status in ("done", "skipped", "failed")}
+    print(f"\n📦 Batch finished in {wall:.1f}s: {counts['done']} enhanced, "
+          f"{counts['skipped']} skipped, {counts['failed']} failed")
+    for r in results:
+        detail = r.get("error") or (f"{r['frames']} frames" if "frames" in r else "")
+        print(f"   {r['status']:<8}{r['seconds']:>8.1f}s  {Path(r['input']).name}  {detail}")
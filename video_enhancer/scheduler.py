@@ -0,0 +1,216 @@
+"""Chunks of frames and the threaded stage pipeline that moves them from decoder to encoder."""
+from dataclasses import dataclass
+from fractions import Fraction
+import queue
+import threading
+import time
+
+from .common import DEFAULT_CHUNK_FRAMES, DEFAULT_MAX_INFLIGHT_CHUNKS
+from .timeline import tail_frames
+
+
+@dataclass
+class Chunk:
+    """A run of consecutive frames of one segment on its way through the stages"""
+    segment: int
+    seq: int
+    frames: list
+    previous: object = None     # last source frame of the preceding chunk, for interpolation
+    final: bool = False         # last chunk of its segment
+    lookahead: bool = False     # final chunk ends with the next segment's first frame
+    source_frames: int = 0      # source frames this chunk accounts for (progress)
+    base: int = 0               # video-wide index of frames[0]
+    pad: int = 0                # copies of the last output frame to append (end of the video)
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    items: int = 0
+    frames: int = 0         # frames in the items this stage produced
+    busy: float = 0.0       # seconds spent working, summed over workers
+    starved: float = 0.0    # seconds waiting for input
+    blocked: float = 0.0    # seconds waiting for room in the next stage's queue
+
+    def utilization(self, wall: float) -> float:
+        return self.busy / (wall * self.workers) if wall > 0 else 0.0
+
+
+class _Aborted(Exception):
+    """Unwinds stage threads after another stage failed"""
+
+
+_DONE = object()
+
+
+class StageScheduler:
+    """Producer/consumer pipeline over threads.
+    A source thread feeds items through the stages, which are connected by bounded queues
+    and each run their own pool of workers, so consecutive chunks (and segments) are in
+    different stages at the same time. The sink receives items from the last stage in
+    completion order; with more than one worker per stage, reordering is up to the sink.
+    The first exception in any thread stops the whole pipeline and is re-raised by run()."""
+
+    def __init__(self, stages: list, queue_size: int = DEFAULT_MAX_INFLIGHT_CHUNKS):
+        # stages: (name, fn(item, worker_index) -> item, workers)
+        self.stages = [(name, fn, max(1, workers)) for name, fn, workers in stages]
+        self.queue_size = max(1, queue_size)
+        self.wall = 0.0
+        self._lock = threading.Lock()
+        self._failed = threading.Event()
+        self._error = None
+
+    def run(self, source, sink, source_name: str = "decode", sink_name: str = "encode") -> list:
+        """Run every item of source through the stages into sink. Returns per-stage StageStats."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        stats = ([StageStats(source_name, 1)]
+                 + [StageStats(name, workers) for name, _, workers in self.stages]
+                 + [StageStats(sink_name, 1)])
+
+        threads = [threading.Thread(target=self._source, args=(source, queues[0], stats[0]),
+                                    name=source_name, daemon=True)]
+        for i, (name, fn, workers) in enumerate(self.stages):
+            remaining = [workers]  # the last worker to finish passes end-of-stream downstream
+            for w in range(workers):
+                threads.append(threading.Thread(
+                    target=self._worker, args=(fn, w, queues[i], queues[i + 1], stats[i + 1], remaining),
+                    name=f"{name}-{w}", daemon=True))
+        threads.append(threading.Thread(target=self._sink, args=(sink, queues[-1], stats[-1]),
+                                        name=sink_name, daemon=True))
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.2)
+        except BaseException as e:
+            self._fail(e)
+            for thread in threads:
+                thread.join()
+        self.wall = time.perf_counter() - started
+        if self._error is not None:
+            raise self._error
+        return stats
+
+    def _fail(self, error: BaseException):
+        with self._lock:
+            if self._error is None:
+                self._error = error
+        self._failed.set()
+
+    def _get(self, inbox: queue.Queue, stats: StageStats):
+        started = time.perf_counter()
+        while True:
+            # Checked before every hand-over, not only while waiting: a pipeline that keeps
+            # flowing must still stop as soon as another stage fails
+            if self._failed.is_set():
+                raise _Aborted()
+            try:
+                item = inbox.get(timeout=0.1)
+                break
+            except queue.Empty:
+                pass
+        with self._lock:
+            stats.starved += time.perf_counter() - started
+        return item
+
+    def _put(self, outbox: queue.Queue, item, stats: StageStats):
+        started = time.perf_counter()
+        while True:
+            if self._failed.is_set():
+                raise _Aborted()
+            try:
+                outbox.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        with self._lock:
+            stats.blocked += time.perf_counter() - started
+
+    def _record(self, stats: StageStats, started: float, item=None):
+        with self._lock:
+            stats.busy += time.perf_counter() - started
+            stats.items += 1
+            stats.frames += len(getattr(item, "frames", None) or ())
+
+    def _source(self, source, outbox: queue.Queue, stats: StageStats):
+        iterator = iter(source)
+        try:
+            while True:
+                started = time.perf_counter()
+                item = next(iterator, _DONE)
+                if item is _DONE:
+                    break
+                self._record(stats, started, item)
+                self._put(outbox, item, stats)
+            self._put(outbox, _DONE, stats)
+        except _Aborted:
+            pass
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+    def _worker(self, fn, index: int, inbox: queue.Queue, outbox: queue.Queue, stats: StageStats,
+                remaining: list):
+        try:
+            while True:
+                item = self._get(inbox, stats)
+                if item is _DONE:
+                    self._put(inbox, _DONE, stats)  # let the other workers of this stage see it
+                    break
+                started = time.perf_counter()
+                result = fn(item, index)
+                self._record(stats, started, result)
+                self._put(outbox, result, stats)
+            with self._lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                self._put(outbox, _DONE, stats)
+        except _Aborted:
+            pass
+        except BaseException as e:
+            self._fail(e)
+
+    def _sink(self, sink, inbox: queue.Queue, stats: StageStats):
+        try:
+            while True:
+                item = self._get(inbox, stats)
+                if item is _DONE:
+                    break
+                started = time.perf_counter()
+                sink(item)
+                self._record(stats, started, item)
+        except _Aborted:
+            pass
+        except BaseException as e:
+            self._fail(e)
+
+
+def split_chunks(frames, segment: int, base: int, chunk_size: int = DEFAULT_CHUNK_FRAMES,
+                 lookahead: bool = False, ratio: Fraction = Fraction(1)):
+    """Group a segment's frames (video-wide index base onwards) into Chunks of chunk_size.
+    A full chunk is handed on once the next frame arrives, so the last chunk is always the
+    final one, even when the frames divide evenly into chunks. The lookahead frame, when
+    there is one, stays in the final chunk. The final chunk of the video (no lookahead)
+    carries the tail padding for ratio."""
+    previous = None
+    chunk = []
+    seq = 0
+    decoded = 0
+    for frame in frames:
+        if len(chunk) == chunk_size:
+            yield Chunk(segment, seq, chunk, previous, source_frames=len(chunk), base=base + decoded - len(chunk))
+            previous, chunk = chunk[-1], []
+            seq += 1
+        decoded += 1
+        chunk.append(frame)
+    if chunk:
+        yield Chunk(segment, seq, chunk, previous, final=True, lookahead=lookahead,
+                    source_frames=len(chunk) - int(lookahead), base=base + decoded - len(chunk),
+                    pad=0 if lookahead else tail_frames(base + decoded, ratio))
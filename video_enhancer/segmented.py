@@ -0,0 +1,291 @@
+"""Streaming mode: keyframe-aligned segments through the stage scheduler, resumable from a manifest."""
+from fractions import Fraction
+from pathlib import Path
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+
+from tqdm import tqdm
+
+from .common import (DEFAULT_CHUNK_FRAMES, DEFAULT_MAX_INFLIGHT_CHUNKS, DEFAULT_SEGMENT_SECONDS, WORK_ROOT,
+                     PipelineError)
+from .media import (DEFAULT_ENCODER_PROFILE, ENCODER_PROFILES, FrameReader, FrameWriter, VideoInfo,
+                    find_keyframes, probe_video)
+from .reporting import DiskUsageMonitor, RunMetrics, print_stage_report
+from .scheduler import Chunk, StageScheduler, split_chunks
+from .timeline import interpolation_ratio
+
+
+def plan_segments(info: VideoInfo, keyframes: list, segment_seconds: float) -> list:
+    """Split at the first keyframe at or after every segment_seconds.
+    Each segment is {index, start, frames}; the last one has frames=None (until the end)."""
+    starts = [0.0]
+    if segment_seconds and segment_seconds > 0:
+        for t in keyframes:
+            if t - starts[-1] >= segment_seconds and (not info.duration or t < info.duration - 1):
+                starts.append(t)
+    segments = []
+    for i, start in enumerate(starts):
+        frames = None
+        if i + 1 < len(starts):
+            frames = round(starts[i + 1] * info.fps) - round(start * info.fps)
+        segments.append({"index": i, "start": start, "frames": frames})
+    return segments
+
+
+class SegmentManifest:
+    """JSON record of a job's segments and which of them are finished.
+    Written atomically after every segment so a crash never leaves it half-written."""
+
+    def __init__(self, path: Path, job_key: str, segments: list):
+        self.path = path
+        self.job_key = job_key
+        self.segments = segments
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load_or_create(cls, path: Path, job_key: str, segments: list, fresh: bool = False):
+        if path.exists() and not fresh:
+            try:
+                data = json.loads(path.read_text())
+                if data.get("job_key") == job_key and len(data.get("segments", [])) == len(segments):
+                    return cls(path, job_key, data["segments"])
+            except (OSError, ValueError):
+                pass
+        manifest = cls(path, job_key, [dict(seg, done=False) for seg in segments])
+        manifest.save()
+        return manifest
+
+    def save(self):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"job_key": self.job_key, "segments": self.segments}, indent=2))
+        os.replace(tmp, self.path)
+
+    def mark_done(self, index: int, output: str, frames_written: int):
+        with self._lock:
+            self.segments[index].update(done=True, output=output, frames_written=frames_written)
+            self.save()
+
+    def is_done(self, segment: dict) -> bool:
+        return bool(segment.get("done")) and Path(segment.get("output", "")).exists()
+
+
+def job_key(input_file: str, settings: dict) -> str:
+    """Identifies a job by input file identity and output-affecting settings"""
+    stat = Path(input_file).stat()
+    material = json.dumps({
+        "input": str(Path(input_file).resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "settings": settings,
+    }, sort_keys=True)
+    return hashlib.sha1(material.encode()).hexdigest()
+
+
+class SegmentSink:
+    """Encode stage of the scheduler: puts each segment's chunks back in order and streams
+    them into that segment's encoder. A finished segment is closed, renamed and marked done
+    in the manifest on a background thread, so waiting for the encoder to flush doesn't hold
+    up the chunks of the next segment."""
+
+    def __init__(self, ffmpeg_exe: str, info: VideoInfo, manifest: SegmentManifest, segments_dir: Path,
+                 fps: Fraction, scale: int, encoder_args: list = None,
+                 max_inflight: int = DEFAULT_MAX_INFLIGHT_CHUNKS, progress=None):
+        self.ffmpeg_exe = ffmpeg_exe
+        self.info = info
+        self.manifest = manifest
+        self.segments_dir = segments_dir
+        self.fps = fps
+        self.scale = scale
+        self.encoder_args = encoder_args
+        self.max_inflight = max_inflight
+        self.progress = progress
+        self.open = {}          # segment index -> {"writer", "next", "pending", "last"}
+        self.finishing = []
+        self.errors = []
+
+    def __call__(self, chunk: Chunk):
+        state = self.open.get(chunk.segment)
+        if state is None:
+            partial_path = self.segments_dir / f"seg_{chunk.segment:05d}.partial.mp4"
+            writer = FrameWriter(self.ffmpeg_exe, str(partial_path), self.info.width * self.scale,
+                                 self.info.height * self.scale, self.fps,
+                                 encoder_args=self.encoder_args, max_chunks=self.max_inflight)
+            writer.start()
+            state = self.open[chunk.segment] = {"writer": writer, "next": 0, "pending": {}, "last": None}
+        state["pending"][chunk.seq] = chunk
+        while state["next"] in state["pending"]:
+            chunk = state["pending"].pop(state["next"])
+            state["next"] += 1
+            if chunk.frames:
+                state["writer"].write(chunk.frames)
+                state["last"] = chunk.frames[-1]
+            if self.progress is not None:
+                self.progress.update(chunk.source_frames)
+            if chunk.final:
+                if chunk.pad and state["last"] is not None:
+                    # End of the video: hold the last frame for the remaining slots so the
+                    # duration matches the source
+                    state["writer"].write([state["last"]] * chunk.pad)
+                del self.open[chunk.segment]
+                thread = threading.Thread(target=self._finish, args=(chunk.segment, state["writer"]),
+                                          name=f"finish-{chunk.segment}", daemon=True)
+                thread.start()
+                self.finishing.append(thread)
+
+    def _finish(self, index: int, writer: FrameWriter):
+        try:
+            writer.close()
+            final_path = self.segments_dir / f"seg_{index:05d}.mp4"
+            os.replace(self.segments_dir / f"seg_{index:05d}.partial.mp4", final_path)
+            self.manifest.mark_done(index, str(final_path), writer.frames_written)
+        except Exception as e:
+            self.errors.append(e)
+
+    def close(self):
+        """Wait for segments still being finalized; raises the first encoding error"""
+        for thread in self.finishing:
+            thread.join()
+        if self.errors:
+            raise self.errors[0]
+
+    def abort(self):
+        for state in self.open.values():
+            state["writer"].process.kill()
+            try:
+                state["writer"].chunks.put_nowait(None)
+            except queue.Full:
+                pass
+        self.open.clear()
+        for thread in self.finishing:
+            thread.join()
+
+
+class SegmentedMode:
+    """VideoEnhancer's streaming mode (the default)"""
+
+    def segment_chunks(self, input_file: str, info: VideoInfo, segments: list, ratio: Fraction,
+                       chunk_size: int = DEFAULT_CHUNK_FRAMES,
+                       max_inflight: int = DEFAULT_MAX_INFLIGHT_CHUNKS):
+        """Decode stage: yield the given segments as Chunks, one segment after the other.
+
+        Every segment but the last also decodes the next segment's first frame as a
+        lookahead, so the in-between frames at the boundary are interpolated with this
+        segment; the output frames on the boundary frame itself belong to the next one."""
+        for segment in segments:
+            lookahead = segment["frames"] is not None and ratio != 1
+            frame_limit = None if segment["frames"] is None else segment["frames"] + int(lookahead)
+            reader = FrameReader(self.ffmpeg_exe, input_file, info, buffer_frames=chunk_size * max_inflight,
+                                 start=segment["start"], frame_limit=frame_limit)
+            reader.start()
+            try:
+                yield from split_chunks(reader, segment["index"], round(segment["start"] * info.fps),
+                                        chunk_size, lookahead, ratio)
+            finally:
+                reader.stop()
+
+    def run_segmented(self, input_file: str, output_file: str, skip_interpolation: bool = False,
+                      skip_upscale: bool = False, chunk_size: int = DEFAULT_CHUNK_FRAMES,
+                      max_inflight: int = DEFAULT_MAX_INFLIGHT_CHUNKS, crf: int = None,
+                      segment_seconds: float = DEFAULT_SEGMENT_SECONDS, work_root: str = None,
+                      keep_work: bool = False, fresh: bool = False, interpolate_workers: int = 1,
+                      upscale_workers: int = 1, target_fps=None,
+                      encoder: str = DEFAULT_ENCODER_PROFILE, metrics: RunMetrics = None) -> int:
+        """Enhance a video segment by segment, resuming from the job manifest if one exists.
+
+        The stages run concurrently as a StageScheduler pipeline: while chunks of one segment
+        are upscaled, later chunks (or the next segment) are already being interpolated and
+        decoded, and earlier ones encoded. Stage timings and peak disk usage of the work
+        directory are added to metrics when given."""
+        info = probe_video(input_file, self.ffprobe_exe)
+        ratio = Fraction(1) if skip_interpolation else interpolation_ratio(info.fps, target_fps)
+        scale = 1 if skip_upscale else 4
+        settings = dict({"ratio": str(ratio), "scale": scale, "encoder": encoder, "crf": crf,
+                         "segment_seconds": segment_seconds}, **self.stage_settings(ratio != 1, scale > 1))
+        key = job_key(input_file, settings)
+        work_dir = Path(work_root or WORK_ROOT) / key[:16]
+        segments_dir = work_dir / "segments"
+        segments_dir.mkdir(parents=True, exist_ok=True)
+
+        keyframes = find_keyframes(input_file, self.ffprobe_exe) if segment_seconds else []
+        manifest = SegmentManifest.load_or_create(
+            work_dir / "manifest.json", key, plan_segments(info, keyframes, segment_seconds), fresh=fresh)
+        done = [seg for seg in manifest.segments if manifest.is_done(seg)]
+
+        print(f"📹 {info.width}x{info.height} @ {float(info.fps):.3f}fps "
+              f"→ {info.width * scale}x{info.height * scale} @ {float(info.fps * ratio):.3f}fps")
+        if target_fps and not skip_interpolation and info.fps * ratio != Fraction(str(target_fps)):
+            print(f"   Target {target_fps}fps rounded to ×{ratio} of the source rate")
+        print(f"   {len(manifest.segments)} segment(s), chunks of {chunk_size} frames, work dir {work_dir}")
+        if done:
+            print(f"   ♻️  Resuming: {len(done)}/{len(manifest.segments)} segment(s) already finished")
+
+        stages = []
+        if ratio != 1:
+            def interpolate(chunk: Chunk, worker: int) -> Chunk:
+                chunk.frames = self.interpolate_chunk(chunk, ratio, work_dir / f"interpolate-{worker}")
+                chunk.previous = None
+                return chunk
+            stages.append(("interpolate", interpolate, interpolate_workers))
+        if scale > 1:
+            def upscale(chunk: Chunk, worker: int) -> Chunk:
+                if chunk.frames:
+                    chunk.frames = self.upscale_chunk(chunk.frames, work_dir / f"upscale-{worker}", scale)
+                return chunk
+            stages.append(("upscale", upscale, upscale_workers))
+
+        pending = [seg for seg in manifest.segments if not manifest.is_done(seg)]
+        progress = tqdm(total=info.frame_count or None, unit="frame", desc="Enhancing")
+        progress.update(sum(seg["frames"] or 0 for seg in done))
+        sink = SegmentSink(self.ffmpeg_exe, info, manifest, segments_dir, info.fps * ratio, scale,
+                           encoder_args=ENCODER_PROFILES[encoder].args(crf), max_inflight=max_inflight,
+                           progress=progress)
+        scheduler = StageScheduler(stages, queue_size=max_inflight)
+        if metrics:
+            metrics.update(job=key[:16], segments=len(manifest.segments), resumed_segments=len(done))
+        disk = DiskUsageMonitor(work_dir)
+        disk.start()
+        try:
+            stats = scheduler.run(
+                self.segment_chunks(input_file, info, pending, ratio, chunk_size, max_inflight), sink)
+            sink.close()
+            missing = [seg["index"] for seg in manifest.segments if not manifest.is_done(seg)]
+            if missing:
+                raise PipelineError(f"Segment(s) {missing} produced no frames")
+        except BaseException:
+            sink.abort()
+            progress.close()
+            peak_disk = disk.stop()
+            if metrics:
+                metrics.record_disk(peak_disk)
+            print(f"\n💾 Finished segments are kept in {work_dir}; rerun the same command to resume.")
+            raise
+        progress.close()
+        if pending:
+            print_stage_report(stats, scheduler.wall)
+            self.print_pair_report()
+            if metrics:
+                for s in stats:
+                    metrics.add_stage(s.name, s.busy, s.frames, workers=s.workers, items=s.items,
+                                      utilization=round(s.utilization(scheduler.wall), 3),
+                                      starved_seconds=round(s.starved, 3),
+                                      blocked_seconds=round(s.blocked, 3))
+                metrics.update(pipeline_wall_seconds=round(scheduler.wall, 3))
+
+        started = time.perf_counter()
+        self.concat_segments([seg["output"] for seg in manifest.segments], output_file, work_dir)
+        total_frames = sum(seg["frames_written"] for seg in manifest.segments)
+        peak_disk = disk.stop()
+        if metrics:
+            metrics.add_stage("concat", time.perf_counter() - started, total_frames)
+            metrics.record_disk(peak_disk)
+        if not keep_work:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        file_size_mb = Path(output_file).stat().st_size / (1024 * 1024)
+        print(f"✅ Encoded {total_frames} frames ({file_size_mb:.2f} MB)\n")
+        return total_frames
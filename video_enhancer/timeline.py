@@ -0,0 +1,62 @@
+"""Where output frames fall on the source timeline, and which neighbouring frames need the model."""
+from fractions import Fraction
+import math
+
+from .common import DEFAULT_SCENE_THRESHOLD, DEFAULT_STATIC_THRESHOLD, MAX_RATIO_DENOMINATOR
+
+
+def interpolation_ratio(source_fps: Fraction, target_fps=None) -> Fraction:
+    """Output/source frame ratio for target_fps (default: double the source rate), rounded
+    to a denominator of at most MAX_RATIO_DENOMINATOR."""
+    if not target_fps:
+        return Fraction(2)
+    return (Fraction(str(target_fps)) / source_fps).limit_denominator(MAX_RATIO_DENOMINATOR)
+
+
+def output_positions(base: int, count: int, ratio: Fraction, include_first: bool = True,
+                     include_last: bool = True) -> list:
+    """Positions of the output frames that fall on source frames base..base+count-1,
+    relative to base (1.5 = halfway between the second and third frame).
+    Output frame j sits at source position j / ratio across the whole video, so chunks and
+    segments sample one grid and meet without gaps or repeats. include_first/include_last
+    say whether the chunk owns outputs exactly on its first and last frame."""
+    last = base + count - 1
+    lo = math.ceil(base * ratio) if include_first else math.floor(base * ratio) + 1
+    hi = math.floor(last * ratio) if include_last else math.ceil(last * ratio) - 1
+    return [Fraction(j) / ratio - base for j in range(lo, hi + 1)]
+
+
+def tail_frames(frame_count: int, ratio: Fraction) -> int:
+    """Output frames after the video's last source frame: those between it and the end of its
+    display time. Repeating the last frame for them keeps the duration of the source."""
+    return math.ceil(frame_count * ratio) - math.floor((frame_count - 1) * ratio) - 1
+
+
+def classify_pairs(frames: list, scene_threshold: float = DEFAULT_SCENE_THRESHOLD,
+                   static_threshold: float = DEFAULT_STATIC_THRESHOLD) -> list:
+    """Label each pair of neighbouring frames "cut", "static" or "motion".
+    Works on 64-pixel-wide gray thumbnails: a pair is static when the mean absolute
+    difference is under static_threshold gray levels, and a cut when the Bhattacharyya
+    distance of their 32-bin histograms exceeds scene_threshold. 0 disables a check."""
+    import cv2
+    import numpy as np
+    if len(frames) < 2:
+        return []
+    height, width = frames[0].shape[:2]
+    size = (64, max(1, round(64 * height / width)))
+    thumbs = np.stack([cv2.resize(cv2.cvtColor(f, cv2.COLOR_BGR2GRAY), size, interpolation=cv2.INTER_AREA)
+                       for f in frames]).astype(np.int16)
+    flat = thumbs.reshape(len(frames), -1)
+    hists = np.stack([np.bincount(row >> 3, minlength=32) for row in flat]).astype(np.float64)
+    hists /= flat.shape[1]
+    distance = np.sqrt(np.clip(1.0 - np.sqrt(hists[:-1] * hists[1:]).sum(axis=1), 0.0, 1.0))
+    difference = np.abs(np.diff(flat, axis=0)).mean(axis=1)
+    kinds = []
+    for dist, diff in zip(distance, difference):
+        if static_threshold and diff < static_threshold:
+            kinds.append("static")
+        elif scene_threshold and dist > scene_threshold:
+            kinds.append("cut")
+        else:
+            kinds.append("motion")
+    return kinds